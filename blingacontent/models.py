@@ -4,7 +4,6 @@ from pathlib import Path
 
 from django.conf import settings
 from django.core import urlresolvers
-from django.core.cache import caches
 from django.core.exceptions import ValidationError, NON_FIELD_ERRORS
 from django.db import models
 from django.template.loader import render_to_string
@@ -13,16 +12,14 @@ from slugify import slugify
 
 from tagging.fields import TagField
 
-from blingaleague.models import Member, EXPANSION_SEASON, pre_build_cache
-from blingaleague.utils import clear_cached_properties
+from blingaleague.models import Member, EXPANSION_SEASON, pre_build_cache, \
+                                invalidate_cached_years
+from blingaleague.utils import cache_delete, ALL_TIME_CACHE_TAG
 
 from .utils import send_gazette_to_members, new_gazette_body_template, \
                    add_player_links_to_text  # noqa: F401
 
 
-CACHE = caches['blingaleague']
-
-
 class Meme(models.Model):
     name = models.CharField(max_length=100)
     url = models.URLField()
@@ -167,7 +164,7 @@ class Gazette(models.Model):
         super().clean()
 
     def save(self, *args, **kwargs):
-        CACHE.delete(self.body_cache_key)
+        cache_delete(self.body_cache_key, tag=ALL_TIME_CACHE_TAG)
 
         self.slug = slugify(
             "{}-{}".format(
@@ -271,7 +268,7 @@ class PowerRanking(models.Model):
 
     def save(self, **kwargs):
         super().save(**kwargs)
-        clear_cached_properties()
+        invalidate_cached_years(self, [self.year])
 
     def __str__(self):
         return "{} Blingapower Rankings".format(self.year)
@@ -6,7 +6,6 @@ from httplib2 import Http
 
 from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import ordinal
-from django.core.cache import caches
 
 from googleapiclient.discovery import build
 
@@ -16,11 +15,10 @@ from blingaleague.models import Week, Season, TeamSeason, TeamMultiSeasons, \
                                 Member, FakeMember, Player, \
                                 SEMIFINALS_TITLE_BASE, QUARTERFINALS_TITLE_BASE, \
                                 BLINGABOWL_TITLE_BASE, PLAYOFF_TEAMS
-from blingaleague.utils import regular_season_weeks, blingabowl_week, semifinals_week
+from blingaleague.utils import regular_season_weeks, blingabowl_week, semifinals_week, \
+                               cache_get, cache_set, ALL_TIME_CACHE_TAG
 
 
-CACHE = caches['blingaleague']
-
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
     'https://www.googleapis.com/auth/gmail.compose',
@@ -348,7 +346,8 @@ def build_player_link(raw_name):
 
 
 def add_player_links_to_text(gazette):
-    cached_body = CACHE.get(gazette.body_cache_key)
+    # player links depend on draft and keeper data from every season
+    cached_body = cache_get(gazette.body_cache_key, None, tag=ALL_TIME_CACHE_TAG)
     if cached_body:
         return cached_body
 
@@ -400,6 +399,6 @@ def add_player_links_to_text(gazette):
 
     new_body = newline_char.join(new_lines)
 
-    CACHE.set(gazette.body_cache_key, new_body)
+    cache_set(gazette.body_cache_key, new_body, tag=ALL_TIME_CACHE_TAG)
 
     return new_body
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.core.cache import caches
 from django.core.management.base import LabelCommand
 
+from blingaleague.utils import clear_cached_properties
+
 
 def _print_and_log(message):
     logger = logging.getLogger('blingaleague')
@@ -28,5 +30,11 @@ class Command(LabelCommand):
                 raise ValueError(
                     "Cache {} does not exist".format(cache_name),
                 )
-            cache.clear()
+
+            if cache_name == 'blingaleague':
+                # also tells every process to drop its local property cache
+                clear_cached_properties()
+            else:
+                cache.clear()
+
             _print_and_log("{} cached cleared".format(cache_name))
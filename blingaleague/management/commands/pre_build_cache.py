@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
 from blingaleague.models import pre_build_cache
@@ -7,5 +8,13 @@ class Command(BaseCommand):
 
     label = 'caches_to_clear'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PRE_BUILD_CACHE_WORKERS,
+            help='Number of processes to split the seasons across',
+        )
+
     def handle(self, *args, **kwargs):
-        pre_build_cache()
+        pre_build_cache(workers=kwargs['workers'])
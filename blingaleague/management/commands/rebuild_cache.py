@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blingaleague.models import rebuild_whole_cache
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PRE_BUILD_CACHE_WORKERS,
+            help='Number of processes to split the seasons across',
+        )
+
+    def handle(self, *args, **kwargs):
+        rebuild_whole_cache(workers=kwargs['workers'])
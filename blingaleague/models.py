@@ -1,32 +1,45 @@
+import bisect
 import datetime
 import decimal
-import itertools
+import io
 import logging
 import math
-import random
+import multiprocessing
+import numpy
 import statistics
+import threading
+import time
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import ordinal, intcomma
 from django.core import urlresolvers
-from django.core.cache import caches
 from django.core.exceptions import ValidationError, NON_FIELD_ERRORS
-from django.db import models
+from django.db import connections, models
 
 from slugify import slugify
 
-from .utils import int_to_roman, fully_cached_property, clear_cached_properties, value_by_pick, \
+from .utils import int_to_roman, fully_cached_property, value_by_pick, \
                    regular_season_weeks, quarterfinals_week, semifinals_week, blingabowl_week, \
                    get_power_rankings, get_gazette_issues, calculate_log5_probability, \
-                   possible_outcomes_for_games
+                   clinch_table, poisson_binomial_distribution, LOCAL_CACHE, \
+                   cache_get, cache_set, CACHE_MISS, prefetch_cached_properties, \
+                   ALL_TIME_CACHE_TAG, CROSS_YEAR_CACHE_TAG, year_cache_tag, \
+                   invalidate_cache_tags, cache_tag_generation, cross_year_value, \
+                   new_cache_generation, building_cache_generation, switch_cache_generation, \
+                   cache_generation, use_cache_generation, CACHE, tagged_cache_key, \
+                   SharedInstance, shared_instances, simulate_remaining_games, \
+                   rank_simulated_standings, simulate_playoff_brackets, simulation_batches, \
+                   wilson_score_interval, playoff_bracket_distribution
 
 
-CACHE = caches['blingaleague']
-
 BYE_TEAMS = 2
 PLAYOFF_TEAMS = 6
+
+PLAYOFF_ODDS_SIMULATIONS = 100000
+PLAYOFF_ODDS_BATCH_SIZE = 10000
 FIRST_SEASON = 2008
 EXPANSION_SEASON = 2012
 
@@ -78,6 +91,10 @@ POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF']
 HALF = decimal.Decimal(0.5)
 TIE_VALUE = HALF
 
+EXPECTED_WINS_ENGINE_DECIMAL = 'decimal'
+EXPECTED_WINS_ENGINE_BATCH = 'batch'
+EXPECTED_WINS_ENGINE_VERIFY = 'verify'
+
 MAX_DRAFT_ROUND = 16
 
 
@@ -116,41 +133,336 @@ def _calculate_expected_wins_simple(*game_scores, year_min=None, year_max=None,
 
 
 def calculate_expected_wins(*game_scores, base_year=None, include_playoffs=False):  # noqa: E501
-    all_scores_with_year = Game.all_scores_with_year(include_playoffs=include_playoffs)
+    score_index = ExpectedWinsIndex.load(base_year=base_year, include_playoffs=include_playoffs)
+
+    expected_wins = sum(score_index.win_expectancy(score) for score in game_scores)
+
+    return expected_wins
+
+
+def calculate_expected_wins_batch(game_scores, base_year=None, include_playoffs=False):
+    # returns one expected wins value per score, in the same order as game_scores
+    score_index = ExpectedWinsIndex.load(base_year=base_year, include_playoffs=include_playoffs)
+
+    engine = settings.EXPECTED_WINS_ENGINE
+
+    if engine == EXPECTED_WINS_ENGINE_DECIMAL:
+        return [score_index.win_expectancy(score) for score in game_scores]
+
+    batch_values = score_index.win_expectancies(game_scores)
+
+    if engine == EXPECTED_WINS_ENGINE_VERIFY:
+        logger = logging.getLogger('blingaleague')
+
+        mismatch_count = 0
+        for score, batch_value in zip(game_scores, batch_values):
+            decimal_value = score_index.win_expectancy(score)
+            if batch_value != decimal_value:
+                mismatch_count += 1
+                logger.warning(
+                    "Expected wins mismatch for {} (base year {}): batch {}, decimal {}".format(
+                        score,
+                        base_year,
+                        batch_value,
+                        decimal_value,
+                    ),
+                )
+
+        logger.info(
+            "Verified {} batch expected wins values (base year {}), {} mismatches".format(
+                len(batch_values),
+                base_year,
+                mismatch_count,
+            ),
+        )
+
+    return batch_values
+
+
+class ExpectedWinsIndex(object):
+    # every historical score, sorted once, along with the total smoothing weight
+    # of all scores below it; this turns each win expectancy lookup into a
+    # binary search, rather than a pass over every score in league history
+
+    def __init__(self, base_year=None, include_playoffs=False):
+        self.base_year = base_year
+        self.include_playoffs = include_playoffs
+
+        all_scores_with_year = Game.all_scores_with_year(include_playoffs=include_playoffs)
 
-    def _smoothing_factor(given_year):
-        if base_year is None:
+        weight_by_score = {}
+        total_weight = 0
+        for (score, year) in all_scores_with_year:
+            factor = self._smoothing_factor(year)
+            weight_by_score[score] = weight_by_score.get(score, 0) + factor
+            total_weight += factor
+
+        # the smoothing factors are all powers of two, so these partial sums are exact
+        # in the default decimal context, and match the old score-by-score totals
+        self.scores = sorted(weight_by_score.keys())
+        self.score_weights = [weight_by_score[score] for score in self.scores]
+
+        self.weight_below = [0]
+        running_weight = 0
+        for weight in self.score_weights:
+            running_weight += weight
+            self.weight_below.append(running_weight)
+
+        self.total_weight = total_weight
+
+        # parallel arrays for batch lookups; the weights stay as Decimals (object arrays)
+        # so that batch results are identical to the one-at-a-time results
+        self.score_array = numpy.array(self.scores, dtype=float)
+        self.score_weights_array = numpy.array(self.score_weights, dtype=object)
+        self.weight_below_array = numpy.array(self.weight_below, dtype=object)
+
+    def _smoothing_factor(self, given_year):
+        if self.base_year is None:
             return 1
 
-        year_diff = abs(base_year - given_year)
+        year_diff = abs(self.base_year - given_year)
         return decimal.Decimal(1 / (2 ** year_diff))
 
-    all_scores_with_factor = []
-    total_denomator = 0
-    for (score, year) in all_scores_with_year:
-        factor = _smoothing_factor(year)
-        all_scores_with_factor.append((score, factor))
-        total_denomator += factor
+    def win_expectancy(self, test_score):
+        index = bisect.bisect_left(self.scores, test_score)
 
-    def _win_expectancy(test_score):
-        win_sum = 0
-        tie_sum = 0
+        win_sum = self.weight_below[index]
 
-        for score, factor in all_scores_with_factor:
-            if score < test_score:
-                win_sum += factor
-            elif score == test_score:
-                tie_sum += factor
+        tie_sum = 0
+        if index < len(self.scores) and self.scores[index] == test_score:
+            tie_sum = self.score_weights[index]
 
         total_numerator = win_sum + HALF * tie_sum
 
-        win_expectancy_value = total_numerator / total_denomator
+        return total_numerator / self.total_weight
 
-        return win_expectancy_value
+    def win_expectancies(self, test_scores):
+        if len(test_scores) == 0 or len(self.scores) == 0:
+            return [self.win_expectancy(score) for score in test_scores]
 
-    expected_wins = sum(_win_expectancy(score) for score in game_scores)
+        test_array = numpy.array(test_scores, dtype=float)
 
-    return expected_wins
+        lower = numpy.searchsorted(self.score_array, test_array, side='left')
+        upper = numpy.searchsorted(self.score_array, test_array, side='right')
+
+        win_sums = self.weight_below_array[lower]
+
+        # lower can point one past the end for scores above the all-time high;
+        # those are never ties, so clamping the index is only to keep the lookup valid
+        tie_index = numpy.minimum(lower, len(self.scores) - 1)
+        tie_sums = numpy.where(upper > lower, self.score_weights_array[tie_index], 0)
+
+        total_numerators = win_sums + HALF * tie_sums
+
+        return list(total_numerators / self.total_weight)
+
+    @classmethod
+    def cache_key(cls, base_year=None, include_playoffs=False):
+        return "blingaleague_expected_wins_index|{}|{}".format(
+            base_year,
+            include_playoffs,
+        )
+
+    @classmethod
+    def load(cls, base_year=None, include_playoffs=False):
+        cache_key = cls.cache_key(base_year=base_year, include_playoffs=include_playoffs)
+
+        score_index = cache_get(cache_key, None, tag=ALL_TIME_CACHE_TAG)
+
+        if score_index is None:
+            score_index = cls(base_year=base_year, include_playoffs=include_playoffs)
+
+            cache_set(cache_key, score_index, tag=ALL_TIME_CACHE_TAG)
+
+        return score_index
+
+
+class LeagueStore(object):
+    # a snapshot of Game, FutureGame, Postseason and Member, loaded with one query per table
+    # and shared by everything in the process; lookups by year, week and team are masks over
+    # NumPy columns, rather than database round trips. Games are built fresh for each lookup,
+    # so nothing computed on one caller's games leaks into another's; members come from the
+    # request's identity map (see SharedInstance)
+
+    # threads can briefly disagree on the version right after a save, so keep the
+    # newest couple of snapshots rather than reloading back and forth between them
+    MAX_VERSIONS = 2
+
+    _by_version = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, version=None):
+        self.version = version
+
+        self.member_fields, self.member_rows = self._load_rows(Member)
+        self.member_index = {
+            row[self.member_fields.index('id')]: i for i, row in enumerate(self.member_rows)
+        }
+
+        self.postseason_fields, self.postseason_rows = self._load_rows(Postseason)
+        self.postseason_index = {
+            row[self.postseason_fields.index('year')]: i
+            for i, row in enumerate(self.postseason_rows)
+        }
+
+        self.game_fields, self.game_rows = self._load_rows(Game)
+        self.game_columns = self._columns(
+            self.game_fields,
+            self.game_rows,
+            ('year', 'week', 'winner_id', 'loser_id'),
+        )
+
+        self.future_game_fields, self.future_game_rows = self._load_rows(FutureGame)
+        self.future_game_columns = self._columns(
+            self.future_game_fields,
+            self.future_game_rows,
+            ('year', 'week', 'team_1_id', 'team_2_id'),
+        )
+
+    @classmethod
+    def load(cls):
+        # every save invalidates the all-time tag, so its key changes whenever the data does
+        version = tagged_cache_key('blingaleague_league_store', ALL_TIME_CACHE_TAG)
+
+        store = cls._by_version.get(version)
+        if store is not None:
+            return store
+
+        with cls._lock:
+            store = cls._by_version.get(version)
+
+            if store is None:
+                store = cls._by_version[version] = cls(version=version)
+
+                while len(cls._by_version) > cls.MAX_VERSIONS:
+                    cls._by_version.popitem(last=False)
+
+        return store
+
+    @staticmethod
+    def _load_rows(model):
+        field_names = [field.attname for field in model._meta.concrete_fields]
+        rows = list(model.objects.order_by('pk').values_list(*field_names))
+        return field_names, rows
+
+    @staticmethod
+    def _columns(field_names, rows, column_names):
+        return {
+            column_name: numpy.array(
+                [row[field_names.index(column_name)] for row in rows],
+                dtype=numpy.int64,
+            )
+            for column_name in column_names
+        }
+
+    def _member_instance(self, member_id):
+        instances = shared_instances()
+        identity_key = (Member, str(member_id))
+
+        member = instances.get(identity_key)
+        if member is None:
+            row = self.member_rows[self.member_index[member_id]]
+            member = instances[identity_key] = Member.from_db('default', self.member_fields, row)
+
+        return member
+
+    def _instance_with_members(self, model, field_names, row, member_fields):
+        instance = model.from_db('default', field_names, row)
+
+        # attach the related members up front, so following them doesn't query either
+        for member_field in member_fields:
+            member_id = getattr(instance, "{}_id".format(member_field))
+            setattr(
+                instance,
+                model._meta.get_field(member_field).get_cache_name(),
+                self._member_instance(member_id),
+            )
+
+        return instance
+
+    def member(self, member_id):
+        # ids straight from a URL are strings
+        member_id = int(member_id)
+
+        if member_id not in self.member_index:
+            raise Member.DoesNotExist("Member {} does not exist".format(member_id))
+
+        return self._member_instance(member_id)
+
+    def members(self):
+        return [self._member_instance(member_id) for member_id in self.member_index]
+
+    def postseason(self, year):
+        year = int(year)
+
+        if year not in self.postseason_index:
+            return None
+
+        return Postseason.from_db(
+            'default',
+            self.postseason_fields,
+            self.postseason_rows[self.postseason_index[year]],
+        )
+
+    def _mask(self, columns, year=None, year_min=None, week=None, week_min=None, week_max=None):
+        mask = numpy.ones(len(columns['year']), dtype=bool)
+
+        if year is not None:
+            mask &= columns['year'] == int(year)
+        if year_min is not None:
+            mask &= columns['year'] >= int(year_min)
+        if week is not None:
+            mask &= columns['week'] == int(week)
+        if week_min is not None:
+            mask &= columns['week'] >= int(week_min)
+        if week_max is not None:
+            mask &= columns['week'] <= int(week_max)
+
+        return mask
+
+    def game_year_weeks(self):
+        return set(zip(
+            self.game_columns['year'].tolist(),
+            self.game_columns['week'].tolist(),
+        ))
+
+    def games(self, winner_id=None, loser_id=None, team_id=None, **filters):
+        columns = self.game_columns
+        mask = self._mask(columns, **filters)
+
+        if winner_id is not None:
+            mask &= columns['winner_id'] == winner_id
+        if loser_id is not None:
+            mask &= columns['loser_id'] == loser_id
+        if team_id is not None:
+            mask &= (columns['winner_id'] == team_id) | (columns['loser_id'] == team_id)
+
+        return [
+            self._instance_with_members(
+                Game,
+                self.game_fields,
+                self.game_rows[i],
+                ('winner', 'loser'),
+            )
+            for i in numpy.flatnonzero(mask)
+        ]
+
+    def future_games(self, team_id=None, **filters):
+        columns = self.future_game_columns
+        mask = self._mask(columns, **filters)
+
+        if team_id is not None:
+            mask &= (columns['team_1_id'] == team_id) | (columns['team_2_id'] == team_id)
+
+        return [
+            self._instance_with_members(
+                FutureGame,
+                self.future_game_fields,
+                self.future_game_rows[i],
+                ('team_1', 'team_2'),
+            )
+            for i in numpy.flatnonzero(mask)
+        ]
 
 
 def overall_pick_with_reversal(round, pick_in_round, picks_per_round):
@@ -160,6 +472,71 @@ def overall_pick_with_reversal(round, pick_in_round, picks_per_round):
     return (round - 1) * picks_per_round + pick_in_round
 
 
+def invalidate_cached_years(source, years, cross_year=False):
+    # all-time aggregates (career stats, top seasons, etc.) can change with any single year;
+    # cross_year also drops values in other years that were built from these years' results
+    tags = [year_cache_tag(year) for year in years]
+    tags.append(ALL_TIME_CACHE_TAG)
+
+    if cross_year:
+        tags.append(CROSS_YEAR_CACHE_TAG)
+
+    return invalidate_cache_tags(tags, source=source)
+
+
+# blingalytics models, which rebuild themselves from Game and friends (see queue_finder_refresh)
+FINDER_TABLE_NAMES = ('TeamSeasonStats', 'TeamGameFacts')
+
+
+def _week_mins(year_weeks):
+    # (year, week) tuples down to the first week for each year
+    week_mins = {}
+    for year, week in year_weeks:
+        week_mins[year] = min(week, week_mins.get(year, week))
+
+    return week_mins
+
+
+def delete_stored_playoff_odds(year_weeks):
+    # stored playoff odds live in the database rather than the cache, so they're dropped
+    # on write instead, and the next request for them queues a fresh run. odds through a
+    # given week only simulate from that week on, so earlier weeks' odds are left alone;
+    # year_weeks are (year, first week that changed) tuples
+    PlayoffOddsJob = apps.get_model('blingalytics', 'PlayoffOddsJob')
+
+    for year, week_min in _week_mins(year_weeks).items():
+        PlayoffOddsJob.objects.filter(
+            models.Q(week_max__gte=week_min) | models.Q(week_max__isnull=True),
+            year=year,
+        ).delete()
+
+
+def queue_finder_refresh(year_weeks, table_names=FINDER_TABLE_NAMES):
+    # the season and game finders' tables live in the database rather than the cache, so
+    # they're refreshed after a write instead; that takes a while, so it's left to the
+    # refresh_finder_tables command. year_weeks are (year, first week that changed) tuples
+    FinderRefreshRequest = apps.get_model('blingalytics', 'FinderRefreshRequest')
+
+    for year, week_min in sorted(_week_mins(year_weeks).items()):
+        for table_name in table_names:
+            FinderRefreshRequest.request(table_name, year, week_min)
+
+
+def _adjacent_years(year):
+    # previous/next links, and keeper counts, look one season in either direction
+    return [year - 1, year, year + 1]
+
+
+def _stored_years(model_obj):
+    # a save can move an object to a new year, which leaves the old year stale too
+    if model_obj.pk is None:
+        return []
+
+    return list(
+        type(model_obj).objects.filter(pk=model_obj.pk).values_list('year', flat=True),
+    )
+
+
 class ComparableObject(object):
 
     @property
@@ -261,9 +638,31 @@ class Member(models.Model, ComparableObject):
     def gazette_link(self):
         return "{}{}".format(settings.FULL_SITE_URL, self.href)
 
+    @property
+    def years_active(self):
+        years = set(Game.objects.filter(
+            models.Q(winner=self) | models.Q(loser=self),
+        ).values_list('year', flat=True))
+
+        years.update(FutureGame.objects.filter(
+            models.Q(team_1=self) | models.Q(team_2=self),
+        ).values_list('year', flat=True))
+
+        return sorted(years)
+
     def save(self, **kwargs):
         super().save(**kwargs)
-        clear_cached_properties()
+
+        # names show up in every season the member played in
+        invalidate_cached_years(self, self.years_active)
+
+    def __reduce__(self):
+        # like SharedInstance, pickle by id, so members inside cached games
+        # and seasons come back as the shared instance
+        if self.pk is None:
+            return super().__reduce__()
+
+        return (_shared_member, (self.pk,))
 
     def __str__(self):
         return self.nickname
@@ -275,6 +674,10 @@ class Member(models.Model, ComparableObject):
         ordering = ['nickname', 'first_name', 'last_name']
 
 
+def _shared_member(member_id):
+    return LeagueStore.load().member(member_id)
+
+
 class FakeMember(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -305,6 +708,22 @@ class AbstractGame(ComparableObject):
     def cache_key(self):
         return str(self.pk)
 
+    @property
+    def cache_tag(self):
+        return year_cache_tag(self.year)
+
+    @property
+    def cached_years(self):
+        # the first and last weeks of a season are linked to the neighboring seasons
+        years = [self.year]
+
+        if self.week == 1:
+            years.append(self.year - 1)
+        elif self.week == blingabowl_week(self.year):
+            years.append(self.year + 1)
+
+        return years
+
     @fully_cached_property
     def year_week_id(self):
         return (self.year, self.week, self.pk)
@@ -335,6 +754,9 @@ class Game(models.Model, AbstractGame):
     loser_score = models.DecimalField(max_digits=6, decimal_places=2, db_index=True)
     notes = models.TextField(blank=True, null=True)
 
+    # everything a standings or expected wins number can come from; notes aren't in here
+    RESULT_FIELDS = ('year', 'week', 'winner_id', 'loser_id', 'winner_score', 'loser_score')
+
     @fully_cached_property
     def winner_team_season(self):
         return TeamSeason(self.winner.id, self.year)
@@ -453,7 +875,7 @@ class Game(models.Model, AbstractGame):
             include_playoffs,
         )
 
-        all_scores_with_year = CACHE.get(cache_key)
+        all_scores_with_year = cache_get(cache_key, None, tag=ALL_TIME_CACHE_TAG)
 
         if all_scores_with_year is None:
             all_scores_with_year = []
@@ -483,7 +905,7 @@ class Game(models.Model, AbstractGame):
                     (loser_score, year),
                 ])
 
-            CACHE.set(cache_key, all_scores_with_year)
+            cache_set(cache_key, all_scores_with_year, tag=ALL_TIME_CACHE_TAG)
 
         return all_scores_with_year
 
@@ -495,12 +917,12 @@ class Game(models.Model, AbstractGame):
             include_playoffs,
         )
 
-        all_scores = CACHE.get(cache_key)
+        all_scores = cache_get(cache_key, None, tag=ALL_TIME_CACHE_TAG)
 
         if all_scores is None:
             all_scores = [score for (score, year) in cls.all_scores_with_year()]
 
-            CACHE.set(cache_key, all_scores)
+            cache_set(cache_key, all_scores, tag=ALL_TIME_CACHE_TAG)
 
         return all_scores
 
@@ -647,14 +1069,52 @@ class Game(models.Model, AbstractGame):
         super().clean()
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
+        stored_results = []
+        if self.pk is not None:
+            stored_results = list(
+                Game.objects.filter(pk=self.pk).values_list(*self.RESULT_FIELDS),
+            )
+        stored_year_weeks = [result[:2] for result in stored_results]
+
         super().save(**kwargs)
 
+        saved_results = list(Game.objects.filter(pk=self.pk).values_list(*self.RESULT_FIELDS))
+
+        was_scheduled = False
         for future_game in FutureGame.objects.filter(year=self.year, week=self.week):
             teams = set([future_game.team_1, future_game.team_2])
             if self.winner in teams and self.loser in teams:
                 future_game.delete()
+                was_scheduled = True
+
+        # expected wins measure each score against every season's scores (see
+        # ExpectedWinsIndex), and similar seasons are searched for across every season,
+        # so a new or changed result reaches cached values in other years too
+        invalidate_cached_years(
+            self,
+            stored_years + self.cached_years,
+            cross_year=saved_results != stored_results,
+        )
+
+        if saved_results != stored_results:
+            odds_year_weeks = stored_year_weeks + [(self.year, self.week)]
 
-        clear_cached_properties()
+            stored_matchups = [
+                (year, week, frozenset([winner_id, loser_id]))
+                for year, week, winner_id, loser_id, _winner_score, _loser_score
+                in stored_results
+            ]
+            matchup = (self.year, self.week, frozenset([self.winner_id, self.loser_id]))
+            if not was_scheduled and stored_matchups != [matchup]:
+                # the schedule itself changed, and odds from earlier weeks simulated this
+                # game as one still to be played
+                odds_year_weeks = [(year, 1) for year, _week in odds_year_weeks]
+
+            delete_stored_playoff_odds(odds_year_weeks)
+
+            queue_finder_refresh(stored_year_weeks + [(self.year, self.week)])
 
     @fully_cached_property
     def gazette_str(self):
@@ -822,8 +1282,20 @@ class FutureGame(models.Model, AbstractGame):
         super().clean()
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
         super().save(**kwargs)
-        clear_cached_properties()
+
+        invalidate_cached_years(self, stored_years + self.cached_years)
+
+        # every week's odds up to this game simulated the schedule left
+        delete_stored_playoff_odds([(year, 1) for year in stored_years + [self.year]])
+
+        # the schedule left decides clinches and eliminations all season long
+        queue_finder_refresh(
+            [(year, 1) for year in stored_years + [self.year]],
+            table_names=['TeamSeasonStats'],
+        )
 
     def __str__(self):
         return "{}: {} vs. {}".format(self.week_object, self.team_1, self.team_2)
@@ -880,6 +1352,10 @@ class Postseason(models.Model):
     def cache_key(self):
         return str(self.pk)
 
+    @property
+    def cache_tag(self):
+        return year_cache_tag(self.year)
+
     @fully_cached_property
     def regular_season(self):
         return Season(self.year)
@@ -936,7 +1412,11 @@ class Postseason(models.Model):
 
     def save(self, **kwargs):
         super().save(**kwargs)
-        clear_cached_properties()
+        invalidate_cached_years(self, [self.year])
+        # only odds that reach into the playoffs can see how they turned out
+        delete_stored_playoff_odds([(self.year, regular_season_weeks(self.year) + 1)])
+        # every week's stats say who went on to win it all
+        queue_finder_refresh([(self.year, 1)], table_names=['TeamSeasonStats'])
 
     def __str__(self):
         return "{} postseason".format(self.year)
@@ -948,14 +1428,17 @@ class Postseason(models.Model):
         ordering = ['-year']
 
 
-class TeamSeason(ComparableObject):
+class TeamSeason(ComparableObject, SharedInstance):
     _comparison_attr = 'year_team'
 
     is_single_season = True
 
     def __init__(self, team_id, year, include_playoffs=False, week_max=None):
         self.year = int(year)
-        self.team = Member.objects.get(id=team_id)
+
+        store = LeagueStore.load()
+
+        self.team = store.member(team_id)
         if week_max is None:
             if include_playoffs:
                 week_max = blingabowl_week(self.year)
@@ -963,12 +1446,11 @@ class TeamSeason(ComparableObject):
                 week_max = regular_season_weeks(self.year)
         self.week_max = week_max
 
-        try:
-            self.postseason = Postseason.objects.get(year=self.year)
-        except Postseason.DoesNotExist:
-            self.postseason = None  # this is ok, it's the current season
+        # this is None for the current season, which is ok
+        self.postseason = store.postseason(self.year)
 
         self.cache_key = '|'.join(map(str, (team_id, year, include_playoffs, week_max)))
+        self.cache_tag = year_cache_tag(self.year)
 
     @fully_cached_property
     def year_team(self):
@@ -984,15 +1466,13 @@ class TeamSeason(ComparableObject):
         if self.games:
             last_week_played = self.games[-1].week
 
-        future_games = list(
-            FutureGame.objects.filter(
-                models.Q(team_1=self.team) | models.Q(team_2=self.team),
-            ).filter(
+        future_games = sorted(
+            LeagueStore.load().future_games(
+                team_id=self.team.id,
                 year=self.year,
-                week__gt=last_week_played,
-            ).order_by(
-                'year', 'week',
+                week_min=last_week_played + 1,
             ),
+            key=lambda x: (x.year, x.week),
         )
 
         # for when someone requests a partial historical season;
@@ -1013,13 +1493,19 @@ class TeamSeason(ComparableObject):
 
     @fully_cached_property
     def wins(self):
-        wins = self.team.games_won.filter(year=self.year, week__lte=self.week_max)
-        return list(wins)
+        return LeagueStore.load().games(
+            winner_id=self.team.id,
+            year=self.year,
+            week_max=self.week_max,
+        )
 
     @fully_cached_property
     def losses(self):
-        losses = self.team.games_lost.filter(year=self.year, week__lte=self.week_max)
-        return list(losses)
+        return LeagueStore.load().games(
+            loser_id=self.team.id,
+            year=self.year,
+            week_max=self.week_max,
+        )
 
     @fully_cached_property
     def win_count(self):
@@ -1285,12 +1771,21 @@ class TeamSeason(ComparableObject):
     def is_upcoming_season(self):
         return self.season_object.is_upcoming_season and not self.team.defunct
 
+    def _raw_expected_wins_for_scores(self, scores):
+        expected_wins_by_score = Season(self.year).raw_expected_wins_by_score
+
+        raw_expected_wins = []
+        for score in scores:
+            if score in expected_wins_by_score:
+                raw_expected_wins.append(expected_wins_by_score[score])
+            else:
+                raw_expected_wins.append(calculate_expected_wins(score, base_year=self.year))
+
+        return raw_expected_wins
+
     @fully_cached_property
     def raw_expected_wins_by_game(self):
-        return list(map(
-            lambda x: calculate_expected_wins(x, base_year=self.year),
-            self.game_scores,
-        ))
+        return self._raw_expected_wins_for_scores(self.game_scores)
 
     @fully_cached_property
     def expected_wins_by_game(self):
@@ -1309,10 +1804,7 @@ class TeamSeason(ComparableObject):
 
     @fully_cached_property
     def raw_expected_wins_against(self):
-        return calculate_expected_wins(
-            *self.game_scores_against,
-            base_year=self.year,
-        )
+        return sum(self._raw_expected_wins_for_scores(self.game_scores_against))
 
     @fully_cached_property
     def expected_wins_against(self):
@@ -1375,45 +1867,33 @@ class TeamSeason(ComparableObject):
         return self.expected_wins / len(self.games)
 
     @fully_cached_property
-    def expected_win_distribution(self):
-        if not self.is_single_season:
-            # too expensive to calculate for more than one season
-            return {}
-
-        if len(self.games) == 0:
-            return {0: 1}
-
+    def regular_season_expected_wins_by_game(self):
         expected_wins_by_game = self.expected_wins_by_game
-        num_games = len(expected_wins_by_game)
-        if num_games > regular_season_weeks(self.year):
-            # we only care about this for the regular season
+
+        if len(expected_wins_by_game) > regular_season_weeks(self.year):
             expected_wins_by_game = self.regular_season.expected_wins_by_game
-            num_games = regular_season_weeks(self.year)
 
-        outcome_combos = itertools.product([0, 1], repeat=num_games)
+        return expected_wins_by_game
 
-        win_distribution = defaultdict(decimal.Decimal)
+    @fully_cached_property
+    def expected_win_distribution(self):
+        if len(self.games) == 0:
+            return {0: 1}
 
-        for outcome_combo in outcome_combos:
-            win_count = 0
-            running_prob = decimal.Decimal(1)
-            for i, outcome in enumerate(outcome_combo):
-                # per-game expected wins can be <0 or >1 in edge cases
-                wp = min(max(expected_wins_by_game[i], 0), 1)
-                if outcome:
-                    win_count += 1
-                    running_prob *= wp
-                else:
-                    running_prob *= (1 - wp)
+        # we only care about this for the regular season;
+        # per-game expected wins can be <0 or >1 in edge cases
+        win_probabilities = [
+            min(max(wp, 0), 1) for wp in self.regular_season_expected_wins_by_game
+        ]
 
-            win_distribution[win_count] += running_prob
+        win_distribution = poisson_binomial_distribution(win_probabilities)
 
         # for low enough values, it can sometimes dip below zero
         for win_count, probability in win_distribution.items():
             if probability < 0:
                 win_distribution[win_count] = 0
 
-        return dict(win_distribution)
+        return win_distribution
 
     @fully_cached_property
     def odds_of_more_wins(self):
@@ -1607,12 +2087,27 @@ class TeamSeason(ComparableObject):
 
     @fully_cached_property
     def points_rank(self):
+        if len(self.games) <= regular_season_weeks(self.year):
+            return self._timeline_rank(len(self.games), 'points rank')
         return self.rank_by_stat('points')
 
     @fully_cached_property
     def expected_wins_rank(self):
+        if len(self.games) <= regular_season_weeks(self.year):
+            return self._timeline_rank(len(self.games), 'expected wins rank')
         return self.rank_by_stat('expected_wins')
 
+    def _timeline_rank(self, week, rank_name):
+        # ranks as of the given week, read off the season's standings timeline
+        if week < 1:
+            return None
+
+        team_week = Season(self.year).standings_timeline[week]['teams'].get(self.team.id)
+        if team_week is None:
+            return None
+
+        return team_week[rank_name]
+
     def rank_by_stat(self, stat):
         sorted_table = sorted(
             Season(self.year, week_max=len(self.games)).standings_table,
@@ -1630,15 +2125,18 @@ class TeamSeason(ComparableObject):
     def rank_by_week(self):
         rank_by_week = {}
 
+        timeline = Season(self.year).standings_timeline
+
         week_max = min(len(self.games), regular_season_weeks(self.year))
         week = 1
         while week <= week_max:
-            ts_week = TeamSeason(self.team.id, self.year, week_max=week)
+            # the stat ranks are as of the team's own games played, as in rank_by_stat
+            games_played = timeline[week]['teams'][self.team.id]['games']
 
             rank_by_week[week] = {
-                'place': ts_week.place_numeric,
-                'points': ts_week.points_rank,
-                'expected wins': ts_week.expected_wins_rank,
+                'place': self._timeline_rank(week, 'place'),
+                'points': self._timeline_rank(games_played, 'points rank'),
+                'expected wins': self._timeline_rank(games_played, 'expected wins rank'),
             }
 
             week += 1
@@ -1792,57 +2290,34 @@ class TeamSeason(ComparableObject):
         return self.bye
 
     def clinched(self, target_place):
-        standings_table = self.season_object.standings_table
-
-        if target_place >= len(standings_table):
-            # no matter what, every team has clinched at least last place
-            return True
+        return self._clinch_table_entry(target_place)['clinched']
 
-        if self.place_numeric > target_place:
-            return False
+    def _clinch_table_entry(self, target_place):
+        clinch_table = self.season_object.clinch_table
 
-        # don't subtract one because we actually want to measure the place
-        # after the target; i.e. to make the playoffs, we need to have more
-        # wins than the 7th place team can get
-        cur_target_wins = standings_table[target_place].win_count
-        max_target_wins = cur_target_wins + self.weeks_remaining
+        if target_place >= len(clinch_table):
+            # no matter what, every team has clinched at least last place
+            return {'clinched': True, 'eliminated': False, 'magic_number': 0}
 
-        if self.win_count > max_target_wins:
-            return True
-        elif self.win_count == max_target_wins:
-            teams_that_can_tie = [ts for ts in standings_table if ts.win_count == cur_target_wins]
-
-            worst_tie_place = max([ts.place_numeric for ts in teams_that_can_tie])
-            teams_needed_to_lose = worst_tie_place - target_place
-
-            # assume every team tied with (target_place+1)th place beats any team that
-            # isn't among those tied; call those "free_wins" for this scenario
-            free_wins = dict([(ts.team, cur_target_wins) for ts in teams_that_can_tie])
-            games_between_tied = []
-            for team_season in teams_that_can_tie:
-                other_tie_teams = set(
-                    [ts.team for ts in teams_that_can_tie if ts != team_season]
-                )
+        return clinch_table[self.team][target_place]
 
-                for opponent in team_season.yet_to_play:
-                    if opponent not in other_tie_teams:
-                        free_wins[team_season.team] += 1
-                    elif opponent > team_season.team:
-                        games_between_tied.append((team_season.team, opponent))
+    @fully_cached_property
+    def playoff_magic_number(self):
+        if self.is_partial:
+            return self.magic_number(PLAYOFF_TEAMS)
 
-            possible_outcomes = possible_outcomes_for_games(games_between_tied, free_wins)
-            for win_counts in possible_outcomes:
-                teams_short_of_target = 0
-                for team, wins in win_counts.items():
-                    if wins < self.win_count:
-                        teams_short_of_target += 1
+        return None
 
-                if teams_short_of_target < teams_needed_to_lose:
-                    return False
+    @fully_cached_property
+    def bye_magic_number(self):
+        if self.is_partial:
+            return self.magic_number(BYE_TEAMS)
 
-            return True
+        return None
 
-        return False
+    def magic_number(self, target_place):
+        # None once a team is eliminated from the target place
+        return self._clinch_table_entry(target_place)['magic_number']
 
     @fully_cached_property
     def eliminated_playoffs_early(self):
@@ -1854,44 +2329,7 @@ class TeamSeason(ComparableObject):
 
     def eliminated_early_from_place(self, target_place):
         if self.is_partial:
-            standings_table = self.season_object.standings_table
-
-            target_wins = standings_table[target_place - 1].win_count
-            max_wins = self.win_count + self.weeks_remaining
-
-            if max_wins < target_wins:
-                return True
-            elif max_wins == target_wins:
-                teams_that_can_tie = [ts for ts in standings_table if ts.win_count == target_wins]
-
-                best_tie_place = min([ts.place_numeric for ts in teams_that_can_tie])
-
-                teams_needed_to_win = 1 + target_place - best_tie_place
-
-                games_between_tied = []
-                for team_season in teams_that_can_tie:
-                    other_tie_teams = set(
-                        [ts.team for ts in teams_that_can_tie if ts != team_season]
-                    )
-
-                    for opponent in team_season.yet_to_play:
-                        if opponent in other_tie_teams and opponent > team_season.team:
-                            games_between_tied.append((team_season.team, opponent))
-
-                current_wins = dict([(ts.team, target_wins) for ts in teams_that_can_tie])
-                possible_outcomes = possible_outcomes_for_games(games_between_tied, current_wins)
-                for win_counts in possible_outcomes:
-                    teams_above_target = 0
-                    for team, wins in win_counts.items():
-                        if wins > max_wins:
-                            teams_above_target += 1
-
-                    if teams_above_target < teams_needed_to_win:
-                        return False
-
-                return True
-
-            return False
+            return self._clinch_table_entry(target_place)['eliminated']
 
         # if it's a complete season, it's not an early elimination
         return False
@@ -2196,11 +2634,18 @@ class TeamSeason(ComparableObject):
 
     @classmethod
     def all(cls):
-        for season in Season.all():
-            for team_id in Member.objects.all().values_list('id', flat=True):
-                team_season = cls(team_id, season.year)
-                if len(team_season.games) > 0:
-                    yield team_season
+        team_ids = list(Member.objects.all().values_list('id', flat=True))
+
+        team_seasons = [
+            cls(team_id, season.year)
+            for season in Season.all()
+            for team_id in team_ids
+        ]
+        prefetch_cached_properties(team_seasons, ['games'])
+
+        for team_season in team_seasons:
+            if len(team_season.games) > 0:
+                yield team_season
 
     @fully_cached_property
     def gazette_standings_str(self):
@@ -2268,11 +2713,12 @@ class TeamMultiSeasons(TeamSeason):
 
         self.year_min = year_min
         self.year_max = year_max
-        self.team = Member.objects.get(id=team_id)
+        self.team = LeagueStore.load().member(team_id)
         self.include_playoffs = include_playoffs
         self.week_max = week_max
 
         self.cache_key = '|'.join(map(str, (team_id, year_min, year_max, include_playoffs, week_max)))  # noqa: E501
+        self.cache_tag = ALL_TIME_CACHE_TAG
 
     def _sum_seasonal_values(self, prop_name):
         return sum(getattr(ts, prop_name, 0) for ts in self)
@@ -2364,6 +2810,10 @@ class TeamMultiSeasons(TeamSeason):
     def expected_wins_by_game(self):
         return self._extend_seasonal_values('expected_wins_by_game')
 
+    @fully_cached_property
+    def regular_season_expected_wins_by_game(self):
+        return self._extend_seasonal_values('regular_season_expected_wins_by_game')
+
     @fully_cached_property
     def raw_expected_wins(self):
         return self._sum_seasonal_values('raw_expected_wins')
@@ -2554,7 +3004,359 @@ class TeamMultiSeasons(TeamSeason):
         return str(self)
 
 
-class Season(ComparableObject):
+class RemainingSchedulePlan(object):
+    # everything the playoff odds simulations need that stays the same from one run
+    # to the next: the standings so far, each remaining game's teams and adjusted win
+    # probability, and log5 odds for every pairing in a playoff bracket. Teams are
+    # referred to by their index in the standings, which is what the simulations use
+
+    def __init__(self, season):
+        self.year = season.year
+
+        standings = season.standings_table
+        self.teams = [team_season.team for team_season in standings]
+        self.team_to_index = dict((team, i) for i, team in enumerate(self.teams))
+
+        self.wins = numpy.array([ts.win_count for ts in standings], dtype=int)
+        self.points = numpy.array([float(ts.points) for ts in standings], dtype=float)
+
+        game_weeks, game_team_1, game_team_2, game_team_1_win_probabilities = [], [], [], []
+        for week, team_1, team_2, prob_1 in self._remaining_game_probabilities(season):
+            game_weeks.append(week)
+            game_team_1.append(self.team_to_index[team_1])
+            game_team_2.append(self.team_to_index[team_2])
+            game_team_1_win_probabilities.append(float(prob_1))
+
+        self.game_weeks = numpy.array(game_weeks, dtype=int)
+        self.game_team_1 = numpy.array(game_team_1, dtype=int)
+        self.game_team_2 = numpy.array(game_team_2, dtype=int)
+        self._game_team_1_win_probabilities = numpy.array(
+            game_team_1_win_probabilities,
+            dtype=float,
+        )
+
+        # the bracket is always played out with each team's full regular season
+        team_seasons = [TeamSeason(team.id, self.year) for team in self.teams]
+        self._bracket_win_probabilities = numpy.array(
+            [
+                [float(calculate_log5_probability(ts_1, ts_2)) for ts_2 in team_seasons]
+                for ts_1 in team_seasons
+            ],
+            dtype=float,
+        ).reshape(len(team_seasons), len(team_seasons))
+
+    @staticmethod
+    def _remaining_game_probabilities(season):
+        # yields a tuple of (week, team_1, team_2, probability that team_1 wins)
+        weeks_played = season.weeks_with_games
+        weeks_left = regular_season_weeks(season.year) - weeks_played
+
+        for game in season._remaining_games:
+            # don't use game.win_probabilities, as that will use the expected win pct
+            # from the week before the game; for already-played games, that means we aren't
+            # calculating the odds as they looked at *this* point in the season
+            team_season_1 = TeamSeason(game.team_1.id, season.year, week_max=weeks_played)
+            team_season_2 = TeamSeason(game.team_2.id, season.year, week_max=weeks_played)
+
+            raw_prob_1 = calculate_log5_probability(team_season_1, team_season_2)
+
+            weeks_until_game = game.week - weeks_played
+
+            weight_50 = decimal.Decimal(weeks_until_game - 1) / weeks_left
+            weight_past = 1 - weight_50
+
+            adj_prob_1 = raw_prob_1 * weight_past + decimal.Decimal(0.5) * weight_50
+
+            yield (game.week, game.team_1, game.team_2, adj_prob_1)
+
+    def team_indexes(self, teams):
+        return numpy.array([self.team_to_index[team] for team in teams], dtype=int)
+
+    def game_win_probabilities(self, forced_outcomes=None):
+        # forced outcomes are (winner, loser) tuples, and are applied to a copy,
+        # so what-if runs never change the plan itself
+        win_probabilities = self._game_team_1_win_probabilities.copy()
+
+        for i, (team_1, team_2) in enumerate(zip(self.game_team_1, self.game_team_2)):
+            team_1, team_2 = self.teams[team_1], self.teams[team_2]
+            if forced_outcomes is not None and (team_1, team_2) in forced_outcomes:
+                win_probabilities[i] = 1
+            elif forced_outcomes is not None and (team_2, team_1) in forced_outcomes:
+                win_probabilities[i] = 0
+
+        return win_probabilities
+
+    def bracket_win_probabilities(self, forced_outcomes=None):
+        # entry [i, j] is the probability that team i beats team j in the playoffs
+        win_probabilities = self._bracket_win_probabilities.copy()
+
+        for winner, loser in (forced_outcomes or []):
+            if winner in self.team_to_index and loser in self.team_to_index:
+                win_probabilities[self.team_to_index[winner], self.team_to_index[loser]] = 1
+                win_probabilities[self.team_to_index[loser], self.team_to_index[winner]] = 0
+
+        return win_probabilities
+
+
+class PlayoffOddsSampleSet(object):
+    # the raw results of every playoff odds simulation, kept compact: one bit per remaining
+    # game (did team_1 win), plus the six playoff seeds and the champion as team indexes.
+    # Remaining games are independent, so the simulations where a game went a certain way
+    # are a fair sample of the odds with that result forced; what-if odds just filter the
+    # stored simulations, rather than simulating again. Teams are stored by id, so a sample
+    # set can be saved and loaded without the database
+
+    def __init__(self, team_ids, game_weeks, game_team_1, game_team_2,
+                 game_outcomes, seeds, champions):
+        self.team_ids = numpy.asarray(team_ids, dtype=int)
+        self.game_weeks = numpy.asarray(game_weeks, dtype=int)
+        self.game_team_1 = numpy.asarray(game_team_1, dtype=int)
+        self.game_team_2 = numpy.asarray(game_team_2, dtype=int)
+
+        # packed bits, eight games to a byte; see pack_batch
+        self.game_outcomes = numpy.asarray(game_outcomes, dtype=numpy.uint8)
+        self.seeds = numpy.asarray(seeds, dtype=numpy.uint8)
+        self.champions = numpy.asarray(champions, dtype=numpy.uint8)
+
+    @staticmethod
+    def pack_batch(team_1_wins, seeds, champions):
+        return (
+            numpy.packbits(team_1_wins, axis=1),
+            seeds.astype(numpy.uint8),
+            champions.astype(numpy.uint8),
+        )
+
+    @classmethod
+    def from_batches(cls, plan, batch_samples):
+        return cls(
+            [team.id for team in plan.teams],
+            plan.game_weeks,
+            plan.game_team_1,
+            plan.game_team_2,
+            numpy.concatenate([samples[0] for samples in batch_samples]),
+            numpy.concatenate([samples[1] for samples in batch_samples]),
+            numpy.concatenate([samples[2] for samples in batch_samples]),
+        )
+
+    def to_bytes(self):
+        data = io.BytesIO()
+        numpy.savez_compressed(
+            data,
+            team_ids=self.team_ids,
+            game_weeks=self.game_weeks,
+            game_team_1=self.game_team_1,
+            game_team_2=self.game_team_2,
+            game_outcomes=self.game_outcomes,
+            seeds=self.seeds,
+            champions=self.champions,
+        )
+        return data.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        arrays = numpy.load(io.BytesIO(bytes(data)))
+        return cls(
+            arrays['team_ids'],
+            arrays['game_weeks'],
+            arrays['game_team_1'],
+            arrays['game_team_2'],
+            arrays['game_outcomes'],
+            arrays['seeds'],
+            arrays['champions'],
+        )
+
+    @property
+    def simulations(self):
+        return len(self.seeds)
+
+    def remaining_games(self):
+        # (week, team_1_id, team_2_id) for each game the samples can be filtered on
+        return [
+            (int(week), int(self.team_ids[team_1]), int(self.team_ids[team_2]))
+            for week, team_1, team_2 in zip(self.game_weeks, self.game_team_1, self.game_team_2)
+        ]
+
+    def _game_index(self, week, team_1_id, team_2_id):
+        for i, game in enumerate(self.remaining_games()):
+            if game[0] == week and set(game[1:]) == set((team_1_id, team_2_id)):
+                return i
+
+        return None
+
+    def conditional_odds(self, results):
+        # results are (week, winner_id, loser_id) tuples; returns odds in the same shape as
+        # Season.playoff_odds, from only the simulations where every one of those results
+        # happened, or None if no simulation matched (or a game isn't in the samples)
+        team_1_wins = numpy.unpackbits(
+            self.game_outcomes,
+            axis=1,
+            count=len(self.game_weeks),
+        ).astype(bool)
+
+        matches = numpy.ones(self.simulations, dtype=bool)
+        for week, winner_id, loser_id in results:
+            i = self._game_index(week, winner_id, loser_id)
+            if i is None:
+                return None
+
+            if self.team_ids[self.game_team_1[i]] == winner_id:
+                matches &= team_1_wins[:, i]
+            else:
+                matches &= ~team_1_wins[:, i]
+
+        matching_simulations = int(matches.sum())
+        if matching_simulations == 0:
+            return None
+
+        seeds = self.seeds[matches].astype(int)
+        finish_counts = numpy.stack([
+            numpy.bincount(finishers.ravel(), minlength=len(self.team_ids))
+            for finishers in (
+                seeds[:, :PLAYOFF_TEAMS],
+                seeds[:, :BYE_TEAMS],
+                self.champions[matches].astype(int),
+            )
+        ])
+        finish_lows, finish_highs = wilson_score_interval(finish_counts, matching_simulations)
+
+        store = LeagueStore.load()
+
+        odds = {}
+        for i, team_id in enumerate(self.team_ids):
+            team = store.member(team_id)
+
+            odds[team] = {
+                'simulations': matching_simulations,
+                'intervals': {},
+            }
+
+            for row, finish in enumerate(('playoffs', 'bye', 'champion')):
+                odds[team][finish] = (
+                    decimal.Decimal(int(finish_counts[row, i])) /
+                    decimal.Decimal(matching_simulations)
+                )
+                odds[team]['intervals'][finish] = (
+                    float(finish_lows[row, i]),
+                    float(finish_highs[row, i]),
+                )
+
+        return odds
+
+
+def _simulate_playoff_odds_batch(batch):
+    # batches only get plain arrays, so that pool workers never need the database
+    (wins, points, game_team_1, game_team_2, game_team_1_win_probabilities,
+     bracket_win_probabilities, log_outcomes, keep_samples), simulations, seed_sequence = batch
+
+    rng = numpy.random.default_rng(seed_sequence)
+
+    simulated_wins, simulated_points, team_1_wins = simulate_remaining_games(
+        wins,
+        points,
+        game_team_1,
+        game_team_2,
+        game_team_1_win_probabilities,
+        simulations,
+        rng,
+    )
+
+    simulated_standings = rank_simulated_standings(simulated_wins, simulated_points)
+
+    simulated_playoff_brackets = simulate_playoff_brackets(
+        simulated_standings[:, :PLAYOFF_TEAMS],
+        bracket_win_probabilities,
+        rng,
+    )
+
+    # one row each for playoffs, bye and champion
+    finish_counts = numpy.stack([
+        numpy.bincount(finishers.ravel(), minlength=len(wins))
+        for finishers in (
+            simulated_standings[:, :PLAYOFF_TEAMS],
+            simulated_standings[:, :BYE_TEAMS],
+            simulated_playoff_brackets[:, 0],
+        )
+    ])
+
+    simulated_outcomes = None
+    if log_outcomes:
+        simulated_outcomes = (simulated_standings, simulated_wins, simulated_points)
+
+    samples = None
+    if keep_samples:
+        samples = PlayoffOddsSampleSet.pack_batch(
+            team_1_wins,
+            simulated_standings[:, :PLAYOFF_TEAMS],
+            simulated_playoff_brackets[:, 0],
+        )
+
+    return finish_counts, simulated_outcomes, samples
+
+
+def _run_simulation_batches(batch_function, batch_args, batches, workers=1, interval_width=None):
+    # returns ([(counts, ...) for each batch run], total simulations). Results come
+    # back in batch order, and each batch has its own random stream, so the number of
+    # workers never changes the results; the workers only do NumPy work on their arguments,
+    # so unlike pre_build_cache there are no database or memcached connections to worry about.
+    #
+    # With an interval_width, batches run a round (one per worker) at a time, and stop at
+    # the first batch, in batch order, after which every count's 95% interval is narrower
+    # than interval_width; batches past that point are dropped, even if they already ran
+    work = [(batch_args, simulations, seed_sequence) for simulations, seed_sequence in batches]
+
+    round_size = len(work)
+    if interval_width is not None:
+        round_size = max(1, workers)
+
+    pool = None
+    if workers > 1 and len(work) > 1:
+        pool = multiprocessing.Pool(processes=min(workers, len(work)))
+
+    try:
+        results = []
+        total_counts = 0
+        total_simulations = 0
+
+        for start in range(0, len(work), round_size):
+            round_work = work[start:start + round_size]
+            if pool is not None:
+                round_results = pool.map(batch_function, round_work)
+            else:
+                round_results = list(map(batch_function, round_work))
+
+            for (_batch_args, simulations, _seed_sequence), result in zip(
+                round_work,
+                round_results,
+            ):
+                results.append(result)
+                total_counts = total_counts + result[0]
+                total_simulations += simulations
+
+                if interval_width is not None:
+                    low, high = wilson_score_interval(total_counts, total_simulations)
+                    if (high - low).max() < interval_width:
+                        return results, total_simulations
+
+        return results, total_simulations
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def _playoff_odds_seed(seed, cache_key):
+    # every run is seeded, so that any run can be reproduced from the log
+    if seed is None:
+        seed = numpy.random.SeedSequence().entropy
+        logging.getLogger('blingaleague').info("[{}] Simulating with seed {}".format(
+            cache_key,
+            seed,
+        ))
+
+    return seed
+
+
+class Season(ComparableObject, SharedInstance):
     _comparison_attr = 'year'
 
     def __init__(self, year, include_playoffs=False, week_max=None):
@@ -2569,38 +3371,31 @@ class Season(ComparableObject):
             self.week_max = regular_season_weeks(self.year)
 
         self.cache_key = "|".join(map(str, (year, include_playoffs, week_max)))
+        self.cache_tag = year_cache_tag(self.year)
 
     @fully_cached_property
     def postseason(self):
-        try:
-            return Postseason.objects.get(year=self.year)
-        except Postseason.DoesNotExist:
-            return None  # won't exist for in-progress seasons
+        # won't exist for in-progress seasons
+        return LeagueStore.load().postseason(self.year)
 
     @fully_cached_property
     def all_games(self):
-        all_games = Game.objects.all()
-
-        if self.year is not None:
-            all_games = all_games.filter(year=self.year)
-
-        if self.week_max is not None:
-            all_games = all_games.filter(week__lte=self.week_max)
-        elif not self.include_playoffs:
-            all_games = all_games.filter(week__lte=regular_season_weeks(self.year))
+        week_max = self.week_max
+        if week_max is None and not self.include_playoffs:
+            week_max = regular_season_weeks(self.year)
 
-        return all_games
+        return LeagueStore.load().games(year=self.year, week_max=week_max)
 
     @fully_cached_property
     def total_wins(self):
-        return self.all_games.count()
+        return len(self.all_games)
 
     @fully_cached_property
     def weeks_with_games(self):
         if not self.all_games:
             return 0
 
-        return max(self.all_games.values_list('week', flat=True))
+        return max(game.week for game in self.all_games)
 
     @fully_cached_property
     def weeks(self):
@@ -2609,10 +3404,23 @@ class Season(ComparableObject):
     @fully_cached_property
     def all_game_scores(self):
         all_scores = []
-        for winner_score, loser_score in self.all_games.values_list('winner_score', 'loser_score'):
-            all_scores.extend([winner_score, loser_score])
+        for game in self.all_games:
+            all_scores.extend([game.winner_score, game.loser_score])
         return all_scores
 
+    @fully_cached_property
+    def raw_expected_wins_by_score(self):
+        # expected wins only depend on the score and the base year, so a single
+        # batch over every score in the year (playoffs included) covers all teams
+        full_season_scores = sorted(set(Season(self.year, include_playoffs=True).all_game_scores))
+
+        raw_expected_wins = calculate_expected_wins_batch(
+            full_season_scores,
+            base_year=self.year,
+        )
+
+        return dict(zip(full_season_scores, raw_expected_wins))
+
     @fully_cached_property
     def average_game_score(self):
         return statistics.mean(self.all_game_scores)
@@ -2755,8 +3563,129 @@ class Season(ComparableObject):
             week_max=self.week_max,
         )
 
+    @fully_cached_property
+    def standings_timeline(self):
+        # what Season(year, week_max=week) and each of its TeamSeasons would work out for every
+        # week of the regular season, in one forward pass over the games; keyed by week, with
+        # the team ids in standings order and running totals and ranks for every active team
+        regular_season = Season(self.year)
+        expected_wins_by_score = regular_season.raw_expected_wins_by_score
+
+        games_by_week = defaultdict(list)
+        for game in regular_season.all_games:
+            games_by_week[game.week].append(game)
+
+        totals = OrderedDict()
+        for team in regular_season.active_teams:
+            totals[team.id] = {
+                'games': 0,
+                'wins': 0,
+                'losses': 0,
+                'points': 0,
+                'raw expected wins': 0,
+            }
+
+        season_games = 0
+        season_raw_expected_wins = 0
+
+        timeline = OrderedDict()
+        for week in range(1, regular_season_weeks(self.year) + 1):
+            week_results = {}
+
+            for game in games_by_week[week]:
+                for team, score, outcome in (
+                    (game.winner, game.winner_score, OUTCOME_WIN),
+                    (game.loser, game.loser_score, OUTCOME_LOSS),
+                ):
+                    if score in expected_wins_by_score:
+                        raw_expected_wins = expected_wins_by_score[score]
+                    else:
+                        raw_expected_wins = calculate_expected_wins(score, base_year=self.year)
+
+                    team_totals = totals[team.id]
+                    team_totals['games'] += 1
+                    team_totals['wins' if outcome == OUTCOME_WIN else 'losses'] += 1
+                    team_totals['points'] += score
+                    team_totals['raw expected wins'] += raw_expected_wins
+
+                    season_raw_expected_wins += raw_expected_wins
+                    week_results[team.id] = (outcome, raw_expected_wins)
+
+                season_games += 1
+
+            # same normalization as scale_expected_wins, applied to each team's running sum
+            per_game_delta = 0
+            if season_games > 0:
+                per_game_delta = (season_games - season_raw_expected_wins) / (2 * season_games)
+
+            teams = OrderedDict()
+            for team_id, team_totals in totals.items():
+                outcome, raw_expected_wins = week_results.get(team_id, (None, None))
+
+                win_pct = 0
+                if team_totals['games'] > 0:
+                    win_pct = (
+                        decimal.Decimal(team_totals['wins']) /
+                        decimal.Decimal(team_totals['games'])
+                    )
+
+                teams[team_id] = dict(
+                    team_totals,
+                    **{
+                        'win pct': win_pct,
+                        'expected wins': (
+                            team_totals['raw expected wins'] +
+                            team_totals['games'] * per_game_delta
+                        ),
+                        'outcome': outcome,
+                        'game raw expected wins': raw_expected_wins,
+                        'place': None,
+                        'points rank': None,
+                        'expected wins rank': None,
+                    }
+                )
+
+            # sorts are stable, so ties fall back to active_teams order, like standings_table
+            standings = sorted(
+                [team_id for team_id in teams if teams[team_id]['games'] > 0],
+                key=lambda x: (teams[x]['win pct'], teams[x]['points']),
+                reverse=True,
+            )
+
+            for rank_name, stat in (
+                ('place', None),
+                ('points rank', 'points'),
+                ('expected wins rank', 'expected wins'),
+            ):
+                ranked = standings
+                if stat is not None:
+                    ranked = sorted(standings, key=lambda x: teams[x][stat], reverse=True)
+
+                for rank, team_id in enumerate(ranked, 1):
+                    teams[team_id][rank_name] = rank
+
+            timeline[week] = {
+                'standings': standings,
+                'teams': teams,
+            }
+
+        return timeline
+
     @fully_cached_property
     def standings_table(self):
+        if self.week_max is not None and self.week_max <= regular_season_weeks(self.year):
+            if not self.is_upcoming_season:
+                if self.week_max < 1:
+                    return []
+
+                teams_by_id = {team.id: team for team in self.active_teams}
+                timeline = Season(self.year).standings_timeline
+
+                return [
+                    self._team_season(teams_by_id[team_id])
+                    for team_id in timeline[self.week_max]['standings']
+                ]
+
         team_seasons = []
 
         for team in self.active_teams:
@@ -2789,11 +3718,16 @@ class Season(ComparableObject):
 
     @fully_cached_property
     def active_teams(self):
+        store = LeagueStore.load()
+
         if self.is_upcoming_season:
-            return Member.objects.filter(defunct=False).order_by('first_name', 'last_name')
+            return sorted(
+                [member for member in store.members() if not member.defunct],
+                key=lambda x: (x.first_name, x.last_name),
+            )
 
         teams = set()
-        for game in Game.objects.filter(year=self.year):
+        for game in store.games(year=self.year):
             teams.add(game.winner)
             teams.add(game.loser)
 
@@ -3009,72 +3943,66 @@ class Season(ComparableObject):
 
         return remaining_games
 
-    def _generate_future_outcomes(self):
-        # yields a tuple of (winner, loser)
-        for game in self._remaining_games:
-            weeks_played = self.weeks_with_games
-
-            # don't use game.win_probabilities, as that will use the expected win pct
-            # from the week before the game; for already-played games, that means we aren't
-            # calculating the odds as they looked at *this* point in the season
-            team_season_1 = TeamSeason(game.team_1.id, self.year, week_max=weeks_played)
-            team_season_2 = TeamSeason(game.team_2.id, self.year, week_max=weeks_played)
-
-            raw_prob_1 = calculate_log5_probability(team_season_1, team_season_2)
-
-            weeks_until_game = game.week - weeks_played
-            weeks_total = regular_season_weeks(self.year)
-            weeks_left = weeks_total - weeks_played
-
-            weight_50 = decimal.Decimal(weeks_until_game - 1) / weeks_left
-            weight_past = 1 - weight_50
-
-            adj_prob_1 = raw_prob_1 * weight_past + decimal.Decimal(0.5) * weight_50
+    @fully_cached_property
+    def remaining_schedule_plan(self):
+        return RemainingSchedulePlan(self)
 
-            random_value = random.random()
-            if random_value <= adj_prob_1:
-                yield (game.team_1, game.team_2)
-            else:
-                yield (game.team_2, game.team_1)
+    @fully_cached_property
+    def clinch_table(self):
+        # {team: {target_place: {'clinched', 'eliminated', 'magic_number'}}} for every team
+        # and every place but last (which everyone has clinched), in standings order; built
+        # once for the whole season, see clinch_table in utils
+        wins = dict(
+            (team_season.team, team_season.win_count) for team_season in self.standings_table
+        )
 
-    def _simulate_remaining_games(self, forced_outcomes=None):
-        simulated_total_wins = {}
+        remaining_games = []
         for team_season in self.standings_table:
-            simulated_total_wins[team_season.team] = {
-                'wins': team_season.win_count,
-                'points': team_season.points,
-            }
+            for opponent in team_season.yet_to_play:
+                if opponent in wins and opponent > team_season.team:
+                    remaining_games.append((team_season.team, opponent))
 
-        for (winner, loser) in self._generate_future_outcomes():
-            if forced_outcomes is not None and (loser, winner) in forced_outcomes:
-                winner, loser = loser, winner
+        table = clinch_table(wins, remaining_games, range(1, len(wins)))
 
-            simulated_total_wins[winner]['wins'] += 1
-
-            # randomize the points added so that the teams with more points
-            # don't always stay ahead; assume that winner always has 80-140 points
-            # and that the loser has 70-{winner_score} points
-            winner_points = 80 + (decimal.Decimal(random.random()) * 60)
-            loser_points = min(winner_points - 10, 70 + decimal.Decimal(random.random()) * 50)
+        return OrderedDict(
+            (team_season.team, table[team_season.team]) for team_season in self.standings_table
+        )
 
-            simulated_total_wins[winner]['points'] += winner_points
-            simulated_total_wins[loser]['points'] += loser_points
+    def playoff_odds(self, max_simulations=PLAYOFF_ODDS_SIMULATIONS, bypass_cache=False,
+                     log_outcomes=False, forced_outcomes=None, seed=None, workers=None,
+                     adaptive=True, interval_width=None):
+        finishes, _samples = self.playoff_odds_with_samples(
+            max_simulations=max_simulations,
+            bypass_cache=bypass_cache,
+            log_outcomes=log_outcomes,
+            forced_outcomes=forced_outcomes,
+            seed=seed,
+            workers=workers,
+            adaptive=adaptive,
+            interval_width=interval_width,
+        )
 
-        return simulated_total_wins
+        return finishes
 
-    def playoff_odds(self, max_simulations=500, bypass_cache=False,
-                     log_outcomes=False, forced_outcomes=None):
+    def playoff_odds_with_samples(self, max_simulations=PLAYOFF_ODDS_SIMULATIONS,
+                                  bypass_cache=False, log_outcomes=False, forced_outcomes=None,
+                                  seed=None, workers=None, adaptive=True, interval_width=None,
+                                  keep_samples=False):
+        # returns (finishes, samples); with keep_samples, samples is a PlayoffOddsSampleSet
+        # of every simulation run, for what-if odds later. It is None for cached odds and for
+        # completed regular seasons, which aren't simulated; keep_samples skips the cache
         cache_key = self.playoff_odds_cache_key
 
+        # the odds are built from expected win pcts, which take every season's scores into
+        # account, so they're cached as cross-year values
+        cross_year_generation = cache_tag_generation(CROSS_YEAR_CACHE_TAG)
+
         finishes = defaultdict(lambda: {'playoffs': 0, 'bye': 0, 'champion': 0})
 
         if not self.is_partial:
             # we can short-circuit the playoff odds, and we need to do
             # special handling for championship odds
-            bracket_odds = self.playoff_bracket_odds(
-                max_simulations=max_simulations,
-                bypass_cache=bypass_cache,
-            )
+            bracket_odds = self.playoff_bracket_odds(bypass_cache=bypass_cache)
 
             for team_season in self.standings_table:
                 team = team_season.team
@@ -3098,65 +4026,109 @@ class Season(ComparableObject):
             finishes = dict(finishes)
 
             if not bypass_cache:
-                CACHE.set(cache_key, finishes)
-
-            return finishes
-
-        if cache_key in CACHE and not bypass_cache:
-            return CACHE.get(cache_key)
-
-        if log_outcomes:
-            fh = open(settings.DATA_DIR / 'playoff_odds_outcomes.csv', 'w')
-            fh.write('Run,Place,Team,Wins,Points')
-
-        sim_run = 1
-        while sim_run <= max_simulations:
-            simulated_games = self._simulate_remaining_games(
-                forced_outcomes=forced_outcomes,
-            ).items()
-
-            simulated_standings = sorted(
-                simulated_games,
-                key=lambda x: (x[1]['wins'], x[1]['points']),
-                reverse=True,
-            )
-
-            playoff_teams = []
-            for i, entry in enumerate(simulated_standings[:PLAYOFF_TEAMS], 1):
-                playoff_teams.append((i, TeamSeason(entry[0].id, self.year)))
+                cache_set(
+                    cache_key,
+                    cross_year_value(finishes, cross_year_generation),
+                    tag=self.cache_tag,
+                )
 
-            simulated_playoff_bracket = self._simulate_single_playoff_bracket(playoff_teams)
+            return finishes, None
+
+        if not bypass_cache and not keep_samples:
+            cached_finishes = cache_get(cache_key, tag=self.cache_tag)
+            if cached_finishes is not CACHE_MISS:
+                return cached_finishes, None
+
+        # the plan is shared by every run against this point in the season, including
+        # what-if runs; only the forced outcomes change from one run to the next
+        plan = self.remaining_schedule_plan
+        teams = plan.teams
+
+        if workers is None:
+            workers = settings.PLAYOFF_ODDS_WORKERS
+
+        # in adaptive mode, max_simulations is only a cap; settled seasons
+        # stop early, and close races run until the odds are precise enough
+        if not adaptive:
+            interval_width = None
+        elif interval_width is None:
+            interval_width = settings.PLAYOFF_ODDS_INTERVAL_WIDTH
+
+        batch_results, simulations = _run_simulation_batches(
+            _simulate_playoff_odds_batch,
+            (
+                plan.wins,
+                plan.points,
+                plan.game_team_1,
+                plan.game_team_2,
+                plan.game_win_probabilities(forced_outcomes),
+                plan.bracket_win_probabilities(),
+                log_outcomes,
+                keep_samples,
+            ),
+            # batches also keep memory flat no matter how many simulations there are
+            simulation_batches(
+                max_simulations,
+                PLAYOFF_ODDS_BATCH_SIZE,
+                _playoff_odds_seed(seed, cache_key),
+            ),
+            workers=workers,
+            interval_width=interval_width,
+        )
 
-            for place, (team, wins_points) in enumerate(simulated_standings, 1):
-                if place <= PLAYOFF_TEAMS:
-                    finishes[team]['playoffs'] += 1 / decimal.Decimal(max_simulations)
-                    if place <= BYE_TEAMS:
-                        finishes[team]['bye'] += 1 / decimal.Decimal(max_simulations)
+        finish_counts = sum(batch_result[0] for batch_result in batch_results)
+        finish_lows, finish_highs = wilson_score_interval(finish_counts, simulations)
 
-                    if team == simulated_playoff_bracket[1].team:
-                        finishes[team]['champion'] += 1 / decimal.Decimal(max_simulations)
+        for i, team in enumerate(teams):
+            finishes[team]['simulations'] = simulations
+            finishes[team]['intervals'] = {}
 
-                if log_outcomes:
-                    fh.write("\n{},{},{},{}-{},{:.2f}".format(
-                        sim_run,
-                        place,
-                        team,
-                        wins_points['wins'],
-                        regular_season_weeks(self.year) - wins_points['wins'],
-                        wins_points['points'],
-                    ))
+            for row, finish in enumerate(('playoffs', 'bye', 'champion')):
+                finishes[team][finish] = (
+                    decimal.Decimal(int(finish_counts[row, i])) / decimal.Decimal(simulations)
+                )
+                finishes[team]['intervals'][finish] = (
+                    float(finish_lows[row, i]),
+                    float(finish_highs[row, i]),
+                )
 
-            sim_run += 1
+        if log_outcomes:
+            with open(settings.DATA_DIR / 'playoff_odds_outcomes.csv', 'w') as fh:
+                fh.write('Run,Place,Team,Wins,Points')
+
+                sim_run = 1
+                for _counts, simulated_outcomes, _samples in batch_results:
+                    simulated_standings, simulated_wins, simulated_points = simulated_outcomes
+                    for row, simulated_order in enumerate(simulated_standings):
+                        for place, i in enumerate(simulated_order, 1):
+                            fh.write("\n{},{},{},{}-{},{:.2f}".format(
+                                sim_run,
+                                place,
+                                teams[i],
+                                simulated_wins[row, i],
+                                regular_season_weeks(self.year) - simulated_wins[row, i],
+                                simulated_points[row, i],
+                            ))
+
+                        sim_run += 1
 
         finishes = dict(finishes)
 
         if finishes and not bypass_cache:
-            CACHE.set(cache_key, finishes)
+            cache_set(
+                cache_key,
+                cross_year_value(finishes, cross_year_generation),
+                tag=self.cache_tag,
+            )
 
-        if log_outcomes:
-            fh.close()
+        samples = None
+        if keep_samples:
+            samples = PlayoffOddsSampleSet.from_batches(
+                plan,
+                [batch_samples for _counts, _outcomes, batch_samples in batch_results],
+            )
 
-        return finishes
+        return finishes, samples
 
     @property
     def playoff_odds_cache_key(self):
@@ -3165,10 +4137,6 @@ class Season(ComparableObject):
             self._given_week_max,
         )
 
-    def get_cached_playoff_odds(self):
-        logging.getLogger('blingaleague').info(self.playoff_odds_cache_key)
-        return CACHE.get(self.playoff_odds_cache_key)
-
     @classmethod
     def playoff_odds_cache_key_to_season_object(cls, cache_key):
         _static_str, year, week_max = cache_key.split('|')
@@ -3180,7 +4148,7 @@ class Season(ComparableObject):
 
         return cls(int(year), week_max=week_max)
 
-    def playoff_bracket_odds(self, max_simulations=2000, bypass_cache=False):
+    def playoff_bracket_odds(self, bypass_cache=False):
         if self.is_partial:
             return {}
 
@@ -3204,106 +4172,50 @@ class Season(ComparableObject):
 
         cache_key = self.playoff_bracket_odds_cache_key
 
-        if cache_key in CACHE and not bypass_cache:
-            return CACHE.get(cache_key)
+        # like the playoff odds, these are built from expected win pcts
+        cross_year_generation = cache_tag_generation(CROSS_YEAR_CACHE_TAG)
 
-        finishes_by_place = self._simulate_playoff_bracket_results(
+        if not bypass_cache:
+            cached_finishes_by_place = cache_get(cache_key, tag=self.cache_tag)
+            if cached_finishes_by_place is not CACHE_MISS:
+                return cached_finishes_by_place
+
+        finishes_by_place = self._playoff_bracket_results(
             playoff_teams,
-            max_simulations,
             forced_outcomes=forced_outcomes,
         )
 
         if finishes_by_place and not bypass_cache:
-            CACHE.set(cache_key, finishes_by_place)
-
-        return finishes_by_place
-
-    def _simulate_playoff_bracket_results(self, playoff_teams,
-                                          max_simulations, forced_outcomes=None):
-        # since there is no 5th place game, don't bother with 5 or 6 as keys
-        finishes_by_place = defaultdict(lambda: {1: 0, 2: 0, 3: 0, 4: 0})
-        sim_run = 1
-        while sim_run <= max_simulations:
-            bracket_outcome = self._simulate_single_playoff_bracket(
-                playoff_teams,
-                forced_outcomes=forced_outcomes,
+            cache_set(
+                cache_key,
+                cross_year_value(finishes_by_place, cross_year_generation),
+                tag=self.cache_tag,
             )
-            for place, team_season in bracket_outcome.items():
-                finishes_by_place[team_season.team][place] += 1 / decimal.Decimal(max_simulations)
-
-            sim_run += 1
 
-        return dict(finishes_by_place)
+        return finishes_by_place
 
-    def _simulate_single_playoff_bracket(self, playoff_teams, forced_outcomes=None):
+    def _playoff_bracket_results(self, playoff_teams, forced_outcomes=None):
         # playoff_teams is a list of tuples containing (place, team_season)
-        seed_to_team_season = dict(playoff_teams)
-        team_to_seed = dict((team_season.team, seed) for (seed, team_season) in playoff_teams)
-
-        quarterfinals_games = [
-            (seed_to_team_season[3], seed_to_team_season[6]),
-            (seed_to_team_season[4], seed_to_team_season[5]),
-        ]
-
-        quarterfinals_results = self._simulate_single_playoff_round(
-            quarterfinals_games,
-            forced_outcomes=forced_outcomes,
-        )
-
-        # sort winners by seed so we can easily determine round 2 matchups
-        quarterfinals_winners = sorted(
-            [result[0] for result in quarterfinals_results],
-            key=lambda x: team_to_seed[x.team],
-        )
+        plan = self.remaining_schedule_plan
 
-        semifinals_games = [
-            (seed_to_team_season[1], quarterfinals_winners[-1]),
-            (seed_to_team_season[2], quarterfinals_winners[0]),
+        seeded_teams = [
+            team_season.team for (seed, team_season) in sorted(playoff_teams, key=lambda x: x[0])
         ]
 
-        semifinals_results = self._simulate_single_playoff_round(
-            semifinals_games,
-            forced_outcomes=forced_outcomes,
+        place_odds = playoff_bracket_distribution(
+            plan.team_indexes(seeded_teams),
+            plan.bracket_win_probabilities(forced_outcomes),
         )
 
-        semifinals_winners = [result[0] for result in semifinals_results]
-        semifinals_losers = [result[1] for result in semifinals_results]
-
-        championship_results = self._simulate_single_playoff_round(
-            [semifinals_winners],
-            forced_outcomes=forced_outcomes,
-        )[0]
-
-        third_place_results = self._simulate_single_playoff_round(
-            [semifinals_losers],
-            forced_outcomes=forced_outcomes,
-        )[0]
-
-        return {
-            1: championship_results[0],
-            2: championship_results[1],
-            3: third_place_results[0],
-            4: third_place_results[1],
-        }
-
-    def _simulate_single_playoff_round(self, games, forced_outcomes=None):
-        results = []
-
-        for team_season_1, team_season_2 in games:
-            raw_prob_1 = calculate_log5_probability(team_season_1, team_season_2)
-
-            random_value = random.random()
-            if random_value <= raw_prob_1:
-                result = (team_season_1, team_season_2)
-            else:
-                result = (team_season_2, team_season_1)
-
-            if forced_outcomes and (result[1].team, result[0].team) in forced_outcomes:
-                result = (result[1], result[0])
-
-            results.append(result)
+        # since there is no 5th place game, don't bother with 5 or 6 as keys
+        finishes_by_place = {}
+        for team in seeded_teams:
+            finishes_by_place[team] = dict(
+                (place, decimal.Decimal(place_odds[place - 1, plan.team_to_index[team]]))
+                for place in (1, 2, 3, 4)
+            )
 
-        return results
+        return finishes_by_place
 
     @property
     def playoff_bracket_odds_cache_key(self):
@@ -3512,7 +4424,7 @@ class Season(ComparableObject):
         return str(self)
 
 
-class Week(ComparableObject):
+class Week(ComparableObject, SharedInstance):
     _comparison_attr = 'year_week'
 
     def __init__(self, year, week):
@@ -3520,6 +4432,7 @@ class Week(ComparableObject):
         self.week = int(week)
 
         self.cache_key = "{}|{}".format(year, week)
+        self.cache_tag = year_cache_tag(self.year)
 
     @fully_cached_property
     def year_week(self):
@@ -3531,7 +4444,7 @@ class Week(ComparableObject):
 
     @fully_cached_property
     def games(self):
-        games = Game.objects.filter(year=self.year, week=self.week)
+        games = LeagueStore.load().games(year=self.year, week=self.week)
 
         def _sort(game):
             try:
@@ -3555,10 +4468,7 @@ class Week(ComparableObject):
             return []
 
         return sorted(
-            FutureGame.objects.filter(
-                year=self.year,
-                week=self.week,
-            ),
+            LeagueStore.load().future_games(year=self.year, week=self.week),
             key=lambda x: x.team_1,
         )
 
@@ -3807,9 +4717,7 @@ class Week(ComparableObject):
     def all(cls):
         all_weeks = []
 
-        year_week_combos = set(Game.objects.all().values_list(
-            'year', 'week',
-        ))
+        year_week_combos = LeagueStore.load().game_year_weeks()
         for year, week in sorted(year_week_combos):
             all_weeks.append(cls(year, week))
 
@@ -3871,8 +4779,10 @@ class Week(ComparableObject):
 class Matchup(object):
 
     def __init__(self, team1_id, team2_id, year_min=None):
-        self.team1 = Member.objects.get(id=team1_id)
-        self.team2 = Member.objects.get(id=team2_id)
+        store = LeagueStore.load()
+
+        self.team1 = store.member(team1_id)
+        self.team2 = store.member(team2_id)
 
         if year_min is None:
             year_min = Season.min().year
@@ -3888,19 +4798,19 @@ class Matchup(object):
 
     @fully_cached_property
     def team1_wins(self):
-        return list(Game.objects.filter(
-            winner=self.team1,
-            loser=self.team2,
-            year__gte=self.year_min,
-        ))
+        return LeagueStore.load().games(
+            winner_id=self.team1.id,
+            loser_id=self.team2.id,
+            year_min=self.year_min,
+        )
 
     @fully_cached_property
     def team2_wins(self):
-        return list(Game.objects.filter(
-            winner=self.team2,
-            loser=self.team1,
-            year__gte=self.year_min,
-        ))
+        return LeagueStore.load().games(
+            winner_id=self.team2.id,
+            loser_id=self.team1.id,
+            year_min=self.year_min,
+        )
 
     @fully_cached_property
     def team1_win_count(self):
@@ -4019,6 +4929,10 @@ class Trade(models.Model, ComparableObject):
     def cache_key(self):
         return str(self.pk)
 
+    @property
+    def cache_tag(self):
+        return year_cache_tag(self.year)
+
     @fully_cached_property
     def year_week_date_id(self):
         return (
@@ -4108,8 +5022,11 @@ class Trade(models.Model, ComparableObject):
         return urlresolvers.reverse_lazy('blingaleague.trade', args=(self.id,))
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
         super().save(**kwargs)
-        clear_cached_properties()
+
+        invalidate_cached_years(self, stored_years + _adjacent_years(self.year))
 
     @fully_cached_property
     def gazette_link(self):
@@ -4262,7 +5179,9 @@ class TradedAsset(models.Model, ComparableObject):
 
     def save(self, **kwargs):
         super().save(**kwargs)
-        clear_cached_properties()
+
+        # keeper costs carry into the following season
+        invalidate_cached_years(self, _adjacent_years(self.trade.year))
 
     def __str__(self):
         return "{}, Traded from {} to {}, {} ({})".format(
@@ -4322,8 +5241,11 @@ class Keeper(models.Model, ComparableObject):
         return value_by_pick(self.overall_pick)
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
         super().save(**kwargs)
-        clear_cached_properties()
+
+        invalidate_cached_years(self, stored_years + _adjacent_years(self.year))
 
     def __str__(self):
         return "{} ({}, {}, {} round)".format(
@@ -4366,6 +5288,10 @@ class DraftPick(models.Model, ComparableObject):
     def cache_key(self):
         return str(self.pk)
 
+    @property
+    def cache_tag(self):
+        return year_cache_tag(self.year)
+
     @fully_cached_property
     def year_round_pick(self):
         return (
@@ -4455,8 +5381,11 @@ class DraftPick(models.Model, ComparableObject):
         super().clean()
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
         super().save(**kwargs)
-        clear_cached_properties()
+
+        invalidate_cached_years(self, stored_years + _adjacent_years(self.year))
 
     def __str__(self):
         pick_str = "{}, {}: {} - {} - {}".format(
@@ -4494,6 +5423,10 @@ class DraftOrder(models.Model, ComparableObject):
     def cache_key(self):
         return str(self.pk)
 
+    @property
+    def cache_tag(self):
+        return year_cache_tag(self.year)
+
     @fully_cached_property
     def year_pick(self):
         return (self.year, self.pick)
@@ -4515,8 +5448,11 @@ class DraftOrder(models.Model, ComparableObject):
         super().clean()
 
     def save(self, **kwargs):
+        stored_years = _stored_years(self)
+
         super().save(**kwargs)
-        clear_cached_properties()
+
+        invalidate_cached_years(self, stored_years + [self.year])
 
     def __str__(self):
         return "{}, {}: {}".format(
@@ -4544,6 +5480,7 @@ class Draft(ComparableObject):
         self.is_partial = self.round_max or self.team_id
 
         self.cache_key = "{}|{}|{}".format(year, round_max, team_id)
+        self.cache_tag = year_cache_tag(self.year)
 
     @fully_cached_property
     def draft_picks(self):
@@ -5057,33 +5994,224 @@ def _print_and_log(message):
     print(message)
 
 
-def pre_build_cache():
+# stages run in this order, each one for every year, since later stages build on earlier ones
+CACHE_WARM_STAGES = (
+    'season scores',
+    'season expected wins',
+    'team aggregates',
+    'team comparisons',
+)
+
+# what each page needs, by stage and by the kind of object it is computed on (see _warm_targets)
+CACHE_WARM_PLAN = (
+    {
+        'page': 'season',
+        'stage': 'season scores',
+        'target': 'season_with_playoffs',
+        'properties': ('all_game_scores',),
+    },
+    {
+        'page': 'season',
+        'stage': 'season scores',
+        'target': 'season',
+        'properties': (
+            'all_game_scores', 'average_game_score', 'stdev_game_score', 'median_game_score',
+        ),
+    },
+    {
+        'page': 'season',
+        'stage': 'season expected wins',
+        'target': 'season',
+        'properties': ('raw_expected_wins_by_score',),
+    },
+    {
+        'page': 'season finder',
+        'stage': 'team aggregates',
+        'target': 'team_season',
+        'properties': (
+            'win_count', 'loss_count', 'win_pct', 'points', 'points_against', 'average_score',
+            'expected_wins', 'expected_win_pct', 'expected_win_pct_against', 'all_play_win_pct',
+            'place_numeric', 'playoff_finish', 'standings_note', 'blangums_count',
+            'slapped_heartbeat_count', 'current_streak', 'strength_of_schedule_str',
+        ),
+    },
+    {
+        'page': 'top seasons',
+        'stage': 'team aggregates',
+        'target': 'team_season',
+        'properties': (
+            'average_score_against', 'strength_of_schedule', 'median_score', 'min_score',
+            'max_score', 'stdev_score', 'zscore_points', 'zscore_expected_wins',
+            'average_margin', 'average_margin_win', 'average_margin_loss',
+            'longest_winning_streak', 'longest_losing_streak',
+            'undefeated_odds', 'winless_odds', 'first_pick_odds',
+        ),
+    },
+    {
+        'page': 'season',
+        'stage': 'team aggregates',
+        'target': 'season',
+        'properties': (
+            'standings_timeline', 'standings_table', 'total_raw_expected_wins', 'first_place',
+            'last_place', 'clinch_table',
+            'most_points', 'most_expected_wins',
+        ),
+    },
+    {
+        'page': 'team season',
+        'stage': 'team aggregates',
+        'target': 'team_season_with_playoffs',
+        'properties': (
+            'win_count', 'loss_count', 'points', 'expected_wins', 'expected_wins_by_game',
+            'all_play_wins', 'all_play_losses', 'standings_note', 'playoff_finish',
+        ),
+    },
+    {
+        'page': 'team season',
+        'stage': 'team comparisons',
+        'target': 'team_season',
+        'properties': ('expected_win_distribution', 'most_similar'),
+    },
+    {
+        'page': 'team season',
+        'stage': 'team comparisons',
+        'target': 'team_season_with_playoffs',
+        'properties': ('rank_by_week',),
+    },
+)
+
+
+def _warm_targets(target, year):
+    if target == 'season':
+        return [Season(year)]
+
+    if target == 'season_with_playoffs':
+        return [Season(year, include_playoffs=True)]
+
+    include_playoffs = (target == 'team_season_with_playoffs')
+
+    team_seasons = [
+        TeamSeason(team_id, year, include_playoffs=include_playoffs)
+        for team_id in Member.objects.all().values_list('id', flat=True)
+    ]
+    prefetch_cached_properties(team_seasons, ['games'])
+
+    return [team_season for team_season in team_seasons if len(team_season.games) > 0]
+
+
+def _warm_cache_stage_for_year(stage_year):
+    stage, year = stage_year
+
+    t0 = time.time()
+
+    targets = {}
+    property_count = 0
+
+    for plan_entry in CACHE_WARM_PLAN:
+        if plan_entry['stage'] != stage:
+            continue
+
+        target = plan_entry['target']
+        if target not in targets:
+            targets[target] = _warm_targets(target, year)
+
+        prefetch_cached_properties(targets[target], plan_entry['properties'])
+        property_count += len(targets[target]) * len(plan_entry['properties'])
+
+    return year, property_count, time.time() - t0
+
+
+def _init_pre_build_cache_worker(generation):
+    # keep writing to the generation the parent was building (or serving),
+    # even if another process switches generations partway through
+    use_cache_generation(generation)
+
+
+def pre_build_cache(workers=1):
+    # runs CACHE_WARM_PLAN one stage at a time; within a stage each year is independent,
+    # so with more than one worker the years are split across a process pool,
+    # all writing to the same memcached
     try:
-        for team_season in TeamSeason.all():
-            _wins = team_season.win_count  # noqa: F841
-            _losses = team_season.loss_count  # noqa: F841
-            _points = team_season.points  # noqa: F841
-            _expected_win_pct = team_season.expected_win_pct  # noqa: F841
-            _expected_win_pct_against = team_season.expected_win_pct_against  # noqa: F841
+        t0 = time.time()
 
-            _print_and_log("Pre-built cache for {}".format(team_season))
+        years = [season.year for season in Season.all()]
 
-        for season in Season.all():
-            _average = season.average_game_score  # noqa: F841
-            _first = season.first_place  # noqa: F841
-            _last = season.last_place  # noqa: F841
-            _points = season.most_points  # noqa: F841
-            _expected_wins = season.most_expected_wins  # noqa: F841
+        pool = None
+        if workers > 1:
+            # forked workers must open their own database and memcached
+            # connections, rather than sharing the parent's sockets
+            connections.close_all()
+            CACHE.close()
 
-            _print_and_log("Pre-built cache for {}".format(season))
+            pool = multiprocessing.Pool(
+                processes=workers,
+                initializer=_init_pre_build_cache_worker,
+                initargs=(cache_generation(),),
+            )
+
+        stage_times = []
+
+        try:
+            for stage in CACHE_WARM_STAGES:
+                stage_t0 = time.time()
+
+                stage_years = [(stage, year) for year in years]
+                if pool is not None:
+                    results = pool.imap_unordered(_warm_cache_stage_for_year, stage_years)
+                else:
+                    results = map(_warm_cache_stage_for_year, stage_years)
+
+                for done, (year, property_count, elapsed) in enumerate(results, 1):
+                    _print_and_log(
+                        "[{}] Pre-built {} properties for {} in {:.1f}s; {}/{} years done".format(
+                            stage,
+                            property_count,
+                            year,
+                            elapsed,
+                            done,
+                            len(years),
+                        ),
+                    )
+
+                stage_times.append((stage, time.time() - stage_t0))
+                _print_and_log("[{}] Stage finished in {:.1f}s".format(*stage_times[-1]))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        _print_and_log("Pre-built cache for {} years with {} worker(s) in {:.1f}s ({})".format(
+            len(years),
+            workers,
+            time.time() - t0,
+            ', '.join("{}: {:.1f}s".format(stage, elapsed) for stage, elapsed in stage_times),
+        ))
+
+        _print_and_log("Local property cache: {}".format(LOCAL_CACHE.stats()))
 
     except Exception:
         # print if we're in the shell, but don't actually raise
         import traceback
         print(traceback.format_exc())
+        return False
+
+    return True
+
+
+def rebuild_whole_cache(workers=1):
+    # warm a fresh generation while the current one keeps serving traffic,
+    # then switch over, rather than clearing first and serving a cold cache
+    generation = new_cache_generation()
+
+    with building_cache_generation(generation):
+        built = pre_build_cache(workers=workers)
 
+        if built:
+            switch_cache_generation(generation)
 
-def rebuild_whole_cache():
-    clear_cached_properties()
+    if built:
+        _print_and_log("Switched to cache generation {}".format(generation))
+    else:
+        _print_and_log("Cache rebuild failed; still serving the previous generation")
 
-    pre_build_cache()
+    return built
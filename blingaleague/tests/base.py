@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+from django.test import TestCase
+
+from blingaleague import utils
+from blingaleague.models import Game, Member, LeagueStore
+
+
+# same ids as the pre-2016 import (see import_pre_2016_data)
+RAW_NAME_TO_ID = {
+    'Ed': 1, 'Matt': 2, 'Rob': 3, 'Kevin': 4, 'Dave': 5,
+    'Mike R.': 6, 'Pulley': 7, 'Babel': 8, 'Derrek': 9,
+    'Allen': 10, 'Katie': 11, 'Rabbit': 12, 'Pat': 13,
+    'Richie': 14, 'Schertz': 15,
+}
+
+
+class BlingaleagueTestCase(TestCase):
+    # every test gets an empty cache of its own, rather than whatever memcached is holding,
+    # along with fresh tag generations, shared instances and league snapshots
+
+    def setUp(self):
+        super().setUp()
+
+        cache = LocMemCache('blingaleague-tests', {'TIMEOUT': None})
+        cache.clear()
+
+        patcher = mock.patch.object(utils, 'CACHE', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.reset_local_state()
+
+    def reset_local_state(self):
+        utils.LOCAL_CACHE.clear()
+        utils.LOCAL_CACHE.generation = None
+        utils.LOCAL_CACHE.generation_checked_at = None
+
+        utils._cache_tag_generations.generations = {}
+        utils._pending_tagged_key_counts.counts = {}
+        utils._shared_instances.instances = None
+
+        LeagueStore._by_version.clear()
+
+    def load_games(self, years):
+        # members come from the initial data migration; bulk_create skips Game.save,
+        # so loading a few seasons doesn't invalidate or refresh anything.
+        # members are sorted by nickname, which the migration leaves mostly blank
+        Member.objects.filter(nickname=None).update(nickname=F('first_name'))
+
+        games = []
+        with open(settings.DATA_DIR / 'initial_data.csv') as games_fh:
+            for line in games_fh:
+                year, week, winner, winner_score, loser, loser_score, notes = \
+                    line.strip().split(',')
+
+                if int(year) not in years:
+                    continue
+
+                games.append(Game(
+                    year=int(year),
+                    week=int(week),
+                    winner_id=RAW_NAME_TO_ID[winner],
+                    loser_id=RAW_NAME_TO_ID[loser],
+                    winner_score=winner_score,
+                    loser_score=loser_score,
+                    notes=notes or None,
+                ))
+
+        Game.objects.bulk_create(games)
@@ -0,0 +1,295 @@
+import threading
+
+from decimal import Decimal
+
+from blingaleague import utils
+from blingaleague.models import Game, TeamSeason
+from blingaleague.utils import LocalCache, fully_cached_property, cache_get, cache_set, \
+    cache_round_trips, prefetch_cached_properties, invalidate_cache_tags, year_cache_tag, \
+    new_cache_generation, building_cache_generation, switch_cache_generation, \
+    CACHE_MISS, ALL_TIME_CACHE_TAG, CrossYearValue
+
+from .base import BlingaleagueTestCase
+
+
+class LocalCacheTestCase(BlingaleagueTestCase):
+
+    def test_evicts_least_recently_used(self):
+        local_cache = LocalCache(2)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.get('a')
+        local_cache.set('c', 3)
+
+        self.assertEqual(local_cache.get('a'), 1)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual(local_cache.get('c'), 3)
+        self.assertEqual(local_cache.evictions, 1)
+
+    def test_entries_expire(self):
+        local_cache = LocalCache(10, ttl=0)
+        local_cache.set('a', 1)
+
+        self.assertIsNone(local_cache.get('a'))
+
+    def test_cleared_when_generation_changes(self):
+        local_cache = LocalCache(10)
+        local_cache.sync_generation()
+        local_cache.set('a', 1)
+
+        local_cache.sync_generation()
+        self.assertEqual(local_cache.get('a'), 1)
+
+        # another process cleared the cache
+        cache_set(utils.LOCAL_CACHE_GENERATION_KEY, 'cleared')
+        local_cache.sync_generation()
+        self.assertIsNone(local_cache.get('a'))
+
+
+class Counter(object):
+
+    def __init__(self, cache_key, result=None, cache_tag=ALL_TIME_CACHE_TAG):
+        self.cache_key = cache_key
+        self.cache_tag = cache_tag
+        self.result = result
+        self.calls = 0
+
+    @fully_cached_property
+    def value(self):
+        self.calls += 1
+        return self.result
+
+
+class CacheHelperTestCase(BlingaleagueTestCase):
+
+    def test_none_is_cached(self):
+        cache_set('none', None)
+
+        self.assertIsNone(cache_get('none'))
+        self.assertIs(cache_get('missing'), CACHE_MISS)
+        self.assertEqual(cache_get('missing', 'default'), 'default')
+
+    def test_none_property_is_not_recomputed(self):
+        Counter('none').value
+
+        # a new object, with only memcached to answer from
+        self.reset_local_state()
+        counter = Counter('none')
+
+        self.assertIsNone(counter.value)
+        self.assertEqual(counter.calls, 0)
+
+    def test_hit_takes_one_round_trip(self):
+        Counter('hit', 1).value
+        self.reset_local_state()
+
+        # tag generations are only looked up once per request
+        utils.cache_tag_generation(ALL_TIME_CACHE_TAG)
+
+        round_trips = cache_round_trips()
+        self.assertEqual(Counter('hit', 2).value, 1)
+        self.assertEqual(cache_round_trips() - round_trips, 1)
+
+    def test_miss_takes_two_round_trips(self):
+        utils.cache_tag_generation(ALL_TIME_CACHE_TAG)
+
+        # a get and a set; the key is counted for its tag when the request finishes
+        round_trips = cache_round_trips()
+        self.assertEqual(Counter('miss', 1).value, 1)
+        self.assertEqual(cache_round_trips() - round_trips, 2)
+
+
+class PrefetchTestCase(BlingaleagueTestCase):
+
+    def test_hits_take_one_round_trip(self):
+        Counter('a', 1).value
+        Counter('b', 2).value
+        self.reset_local_state()
+        utils.cache_tag_generation(ALL_TIME_CACHE_TAG)
+
+        counters = [Counter('a', 3), Counter('b', 4)]
+
+        round_trips = cache_round_trips()
+        prefetch_cached_properties(counters, ['value', 'calls'])
+        self.assertEqual(cache_round_trips() - round_trips, 1)
+
+        self.assertEqual([counter.value for counter in counters], [1, 2])
+        self.assertEqual([counter.calls for counter in counters], [0, 0])
+
+    def test_misses_are_computed_once_and_written_back(self):
+        counters = [Counter('c', 1), Counter('c', 2), Counter('d', 3)]
+        prefetch_cached_properties(counters, ['value'])
+
+        self.assertEqual([counter.value for counter in counters], [1, 1, 3])
+        self.assertEqual([counter.calls for counter in counters], [1, 0, 1])
+
+        self.reset_local_state()
+        self.assertEqual(Counter('d', 4).value, 3)
+
+
+class CacheTagTestCase(BlingaleagueTestCase):
+
+    def cached_value(self, cache_key, cache_tag):
+        # a new object each time, so only the local and shared caches can answer
+        return Counter(cache_key, cache_tag=cache_tag).value
+
+    def test_invalidating_a_tag_only_drops_its_own_keys(self):
+        self.cached_value('2010', year_cache_tag(2010))
+        self.cached_value('2011', year_cache_tag(2011))
+
+        invalidated = invalidate_cache_tags([year_cache_tag(2010)])
+        self.assertEqual(invalidated, {year_cache_tag(2010): 1})
+
+        # every Counter starts its count over, so check which keys are still reachable
+        self.assertNotIn(
+            utils.tagged_cache_key('Counter|2010:value', year_cache_tag(2010)),
+            utils.LOCAL_CACHE._entries,
+        )
+        self.assertIn(
+            utils.tagged_cache_key('Counter|2011:value', year_cache_tag(2011)),
+            utils.LOCAL_CACHE._entries,
+        )
+
+    def test_counts_are_written_when_the_request_finishes(self):
+        tag = year_cache_tag(2010)
+        self.cached_value('a', tag)
+        self.cached_value('b', tag)
+
+        count_key = utils._cache_tag_count_key(
+            tag,
+            utils.cache_generation(),
+            utils.cache_tag_generation(tag),
+        )
+        self.assertIs(cache_get(count_key), CACHE_MISS)
+
+        utils._finish_request_cache_tracking()
+        self.assertEqual(cache_get(count_key), 2)
+
+    def test_other_processes_see_invalidations(self):
+        key = utils.tagged_cache_key('Counter|all:value', ALL_TIME_CACHE_TAG)
+        self.cached_value('all', ALL_TIME_CACHE_TAG)
+
+        invalidate_cache_tags([ALL_TIME_CACHE_TAG])
+
+        # another process only has its remembered generations until they're re-checked
+        utils._cache_tag_generations.generations = {}
+        self.assertNotEqual(
+            utils.tagged_cache_key('Counter|all:value', ALL_TIME_CACHE_TAG),
+            key,
+        )
+
+
+class CacheGenerationTestCase(BlingaleagueTestCase):
+
+    def test_rebuilt_generation_is_not_read_until_switched(self):
+        self.assertEqual(Counter('a', 1).value, 1)
+
+        generation = new_cache_generation()
+        with building_cache_generation(generation):
+            self.assertEqual(Counter('a', 2).value, 2)
+
+        self.assertEqual(Counter('a', 3).value, 1)
+
+        switch_cache_generation(generation)
+        self.assertEqual(Counter('a', 4).value, 2)
+
+    def test_saves_during_a_rebuild_reach_the_rebuilt_generation(self):
+        tag = year_cache_tag(2010)
+
+        generation = new_cache_generation()
+        with building_cache_generation(generation):
+            Counter('a', 1, cache_tag=tag).value
+
+            # a save served by another thread, while the rebuild is still warming
+            save = threading.Thread(target=invalidate_cache_tags, args=([tag],))
+            save.start()
+            save.join()
+
+            switch_cache_generation(generation)
+
+        # the next request looks its tag generations up again
+        utils._cache_tag_generations.generations = {}
+        self.assertEqual(Counter('a', 2, cache_tag=tag).value, 2)
+
+
+class GameSaveInvalidationTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2010, 2011, 2012])
+
+    def fresh_expected_wins(self, team_id, year):
+        utils.clear_cached_properties()
+        self.reset_local_state()
+        return TeamSeason(team_id, year).expected_wins
+
+    def stored_value(self, obj, property_name):
+        # what memcached holds for the property, stamped or not
+        prop = getattr(type(obj), property_name)
+        return cache_get(prop.cache_key_for(obj, type(obj)))
+
+    def test_changed_score_reaches_other_years(self):
+        # expected wins are measured against every season's scores, so a score in 2012
+        # moves 2011's expected wins, even though 2011 is nowhere near it
+        stale_expected_wins = TeamSeason(1, 2011).expected_wins
+
+        # a low score pushed past most others, so plenty of comparisons flip
+        game = Game.objects.filter(year=2012).order_by('winner_score').first()
+        game.winner_score = game.winner_score + Decimal('60')
+        game.save()
+
+        utils._shared_instances.instances = None
+        self.assertNotEqual(TeamSeason(1, 2011).expected_wins, stale_expected_wins)
+        self.assertEqual(
+            TeamSeason(1, 2011).expected_wins,
+            self.fresh_expected_wins(1, 2011),
+        )
+
+    def test_notes_change_leaves_other_years_cached(self):
+        TeamSeason(1, 2010).expected_wins
+        generation = utils.cache_tag_generation(year_cache_tag(2010))
+
+        game = Game.objects.filter(year=2012).first()
+        game.notes = 'edited'
+        game.save()
+
+        self.assertEqual(utils.cache_tag_generation(year_cache_tag(2010)), generation)
+
+    def test_changed_score_leaves_other_years_tags(self):
+        team_season = TeamSeason(1, 2010)
+        team_season.win_count
+        team_season.expected_wins
+        generation = utils.cache_tag_generation(year_cache_tag(2010))
+
+        game = Game.objects.filter(year=2012).first()
+        game.winner_score = game.winner_score + Decimal('1')
+        game.save()
+
+        # 2010's own values are still cached; only the ones built from other years are stale
+        self.assertEqual(utils.cache_tag_generation(year_cache_tag(2010)), generation)
+        self.assertNotEqual(self.stored_value(team_season, 'win_count'), CACHE_MISS)
+
+        expected_wins = self.stored_value(team_season, 'expected_wins')
+        self.assertNotEqual(
+            expected_wins.generation,
+            utils.cache_tag_generation(utils.CROSS_YEAR_CACHE_TAG),
+        )
+
+    def test_values_within_a_year_are_not_cross_year(self):
+        team_season = TeamSeason(1, 2010)
+        team_season.win_count
+
+        self.assertNotIsInstance(self.stored_value(team_season, 'win_count'), CrossYearValue)
+
+    def test_values_built_from_cross_year_values_are_cross_year(self):
+        team_season = TeamSeason(1, 2010)
+
+        # expected wins are already cached by the time the luck is built from them
+        team_season.expected_wins
+        team_season.expected_wins_luck
+
+        self.assertIsInstance(self.stored_value(team_season, 'expected_wins'), CrossYearValue)
+        self.assertIsInstance(
+            self.stored_value(team_season, 'expected_wins_luck'),
+            CrossYearValue,
+        )
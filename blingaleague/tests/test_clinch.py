@@ -0,0 +1,103 @@
+import itertools
+import random
+
+from django.test import SimpleTestCase
+
+from blingaleague.models import Season, TeamSeason
+from blingaleague.utils import clinch_table
+
+from .base import BlingaleagueTestCase
+
+
+def brute_force_clinch_table(wins, remaining_games, target_places):
+    # tries every way the remaining games could go; a tie on wins counts against the team
+    finishes = {team: [] for team in wins}
+    for winners in itertools.product(*remaining_games):
+        final_wins = dict(wins)
+        for winner in winners:
+            final_wins[winner] += 1
+
+        for team in wins:
+            others = [final_wins[other] for other in wins if other != team]
+            tied_or_ahead = sum(1 for other_wins in others if other_wins >= final_wins[team])
+            ahead = sum(1 for other_wins in others if other_wins > final_wins[team])
+            finishes[team].append((tied_or_ahead, ahead))
+
+    return dict(
+        (team, dict(
+            (target_place, {
+                'clinched': all(tied_or_ahead < target_place for tied_or_ahead, _ in finish),
+                'eliminated': all(ahead >= target_place for _, ahead in finish),
+            })
+            for target_place in target_places
+        ))
+        for team, finish in finishes.items()
+    )
+
+
+class ClinchTableTestCase(SimpleTestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(2008)
+
+        for _ in range(200):
+            teams = list(range(rng.randint(3, 6)))
+            wins = dict((team, rng.randint(0, 6)) for team in teams)
+            remaining_games = [
+                tuple(rng.sample(teams, 2)) for _ in range(rng.randint(0, 8))
+            ]
+            target_places = range(1, len(teams))
+
+            table = clinch_table(wins, remaining_games, target_places)
+            expected = brute_force_clinch_table(wins, remaining_games, target_places)
+
+            for team in teams:
+                for target_place in target_places:
+                    self.assertEqual(
+                        (
+                            table[team][target_place]['clinched'],
+                            table[team][target_place]['eliminated'],
+                        ),
+                        (
+                            expected[team][target_place]['clinched'],
+                            expected[team][target_place]['eliminated'],
+                        ),
+                        (wins, remaining_games, team, target_place),
+                    )
+
+    def test_magic_number(self):
+        # one game left, against the only team that can still catch up
+        table = clinch_table({'a': 5, 'b': 4, 'c': 1}, [('a', 'b')], [1])
+
+        self.assertEqual(table['a'][1]['magic_number'], 1)
+        self.assertTrue(table['c'][1]['eliminated'])
+        self.assertIsNone(table['c'][1]['magic_number'])
+
+
+class SeasonClinchTestCase(BlingaleagueTestCase):
+    # real seasons whose flags changed when clinching moved to the max-flow check
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2008, 2009])
+
+    def test_2008_week_10_clinch(self):
+        # 8-2 with three to play, and the teams behind play each other too often for six to pass
+        team_season = TeamSeason(8, 2008, week_max=10)
+
+        self.assertTrue(team_season.clinched_playoffs)
+        self.assertFalse(team_season.clinched_bye)
+
+        table = Season(2008, week_max=10).clinch_table[team_season.team]
+        self.assertEqual(table[5], {'clinched': False, 'eliminated': False, 'magic_number': 2})
+        self.assertEqual(table[6], {'clinched': True, 'eliminated': False, 'magic_number': 0})
+
+    def test_2009_week_10_elimination(self):
+        # 2-8 with three to play; even winning out, it can't finish ahead of enough teams
+        team_season = TeamSeason(7, 2009, week_max=10)
+
+        self.assertTrue(team_season.eliminated_playoffs_early)
+
+        table = Season(2009, week_max=10).clinch_table[team_season.team]
+        self.assertEqual(table[6], {'clinched': False, 'eliminated': True, 'magic_number': None})
+        self.assertEqual(table[7], {'clinched': False, 'eliminated': False, 'magic_number': 7})
@@ -0,0 +1,126 @@
+import decimal
+import itertools
+
+from collections import defaultdict
+
+from django.test import override_settings
+
+from blingaleague.models import Game, TeamSeason, calculate_expected_wins, \
+    calculate_expected_wins_batch, HALF, EXPECTED_WINS_ENGINE_BATCH, \
+    EXPECTED_WINS_ENGINE_DECIMAL
+
+from .base import BlingaleagueTestCase
+
+
+def reference_expected_wins(*game_scores, base_year=None, include_playoffs=False):
+    # the original score-by-score loop, which the sorted index has to match exactly
+    all_scores_with_year = Game.all_scores_with_year(include_playoffs=include_playoffs)
+
+    def _smoothing_factor(given_year):
+        if base_year is None:
+            return 1
+
+        year_diff = abs(base_year - given_year)
+        return decimal.Decimal(1 / (2 ** year_diff))
+
+    all_scores_with_factor = []
+    total_denomator = 0
+    for (score, year) in all_scores_with_year:
+        factor = _smoothing_factor(year)
+        all_scores_with_factor.append((score, factor))
+        total_denomator += factor
+
+    def _win_expectancy(test_score):
+        win_sum = 0
+        tie_sum = 0
+
+        for score, factor in all_scores_with_factor:
+            if score < test_score:
+                win_sum += factor
+            elif score == test_score:
+                tie_sum += factor
+
+        total_numerator = win_sum + HALF * tie_sum
+
+        return total_numerator / total_denomator
+
+    return sum(_win_expectancy(score) for score in game_scores)
+
+
+class ExpectedWinsTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2010, 2011, 2012])
+
+        scores = sorted(Game.objects.values_list('winner_score', flat=True))
+
+        # real scores (with ties), scores in between them, and scores off either end
+        self.test_scores = scores[::7] + [
+            scores[0] - 1,
+            (scores[10] + scores[11]) / 2,
+            scores[-1],
+            scores[-1] + 1,
+        ]
+
+    def test_index_matches_reference(self):
+        for base_year in (None, 2010, 2011, 2012, 2016):
+            for include_playoffs in (False, True):
+                for score in self.test_scores:
+                    self.assertEqual(
+                        calculate_expected_wins(
+                            score,
+                            base_year=base_year,
+                            include_playoffs=include_playoffs,
+                        ),
+                        reference_expected_wins(
+                            score,
+                            base_year=base_year,
+                            include_playoffs=include_playoffs,
+                        ),
+                        (score, base_year, include_playoffs),
+                    )
+
+    def test_batch_matches_reference(self):
+        for engine in (EXPECTED_WINS_ENGINE_BATCH, EXPECTED_WINS_ENGINE_DECIMAL):
+            with override_settings(EXPECTED_WINS_ENGINE=engine):
+                for base_year in (None, 2011):
+                    self.assertEqual(
+                        calculate_expected_wins_batch(self.test_scores, base_year=base_year),
+                        [
+                            reference_expected_wins(score, base_year=base_year)
+                            for score in self.test_scores
+                        ],
+                        (engine, base_year),
+                    )
+
+    def test_team_season_matches_reference(self):
+        team_season = TeamSeason(1, 2011)
+
+        self.assertEqual(
+            team_season.raw_expected_wins,
+            reference_expected_wins(*team_season.game_scores, base_year=2011),
+        )
+
+    def test_win_distribution_matches_enumeration(self):
+        team_season = TeamSeason(1, 2011)
+
+        win_probabilities = [
+            min(max(wp, 0), 1) for wp in team_season.regular_season_expected_wins_by_game
+        ]
+
+        # every way the season could have gone, as the distribution used to be built
+        expected = defaultdict(decimal.Decimal)
+        for outcomes in itertools.product([0, 1], repeat=len(win_probabilities)):
+            probability = decimal.Decimal(1)
+            for wp, outcome in zip(win_probabilities, outcomes):
+                probability *= wp if outcome else 1 - wp
+
+            expected[sum(outcomes)] += probability
+
+        distribution = team_season.expected_win_distribution
+
+        self.assertEqual(sorted(distribution.keys()), sorted(expected.keys()))
+        for win_count, probability in expected.items():
+            # the same products, summed in a different order
+            self.assertAlmostEqual(distribution[win_count], probability, places=20)
@@ -0,0 +1,60 @@
+import numpy
+
+from django.test import SimpleTestCase
+
+from blingaleague.utils import playoff_bracket_distribution, simulate_playoff_brackets
+
+
+def random_win_probabilities(rng, team_count, decided=False):
+    # win_probabilities[i, j] + win_probabilities[j, i] is always 1
+    win_probabilities = rng.random((team_count, team_count))
+    if decided:
+        win_probabilities = numpy.round(win_probabilities)
+
+    upper = numpy.triu(win_probabilities, 1)
+    return upper + numpy.triu(1 - win_probabilities, 1).T + numpy.eye(team_count) / 2
+
+
+class PlayoffBracketDistributionTestCase(SimpleTestCase):
+
+    def test_decided_games_match_simulation(self):
+        # with every game a sure thing, both have to land on the same one bracket
+        rng = numpy.random.default_rng(2018)
+
+        for _ in range(200):
+            team_count = rng.integers(6, 13)
+            win_probabilities = random_win_probabilities(rng, team_count, decided=True)
+            seeds = rng.permutation(team_count)[:6]
+
+            finishes = playoff_bracket_distribution(list(seeds), win_probabilities)
+            simulated = simulate_playoff_brackets(seeds[numpy.newaxis, :], win_probabilities, rng)
+
+            expected = numpy.zeros((4, team_count))
+            for place, team in enumerate(simulated[0]):
+                expected[place, team] = 1
+
+            numpy.testing.assert_array_equal(finishes, expected)
+
+    def test_matches_simulation(self):
+        rng = numpy.random.default_rng(2018)
+        simulations = 200000
+
+        for _ in range(5):
+            win_probabilities = random_win_probabilities(rng, 10)
+            seeds = rng.permutation(10)[:6]
+
+            finishes = playoff_bracket_distribution(list(seeds), win_probabilities)
+
+            numpy.testing.assert_allclose(finishes.sum(axis=1), numpy.ones(4))
+
+            simulated = simulate_playoff_brackets(
+                numpy.tile(seeds, (simulations, 1)),
+                win_probabilities,
+                rng,
+            )
+            simulated_finishes = numpy.zeros((4, 10))
+            for place in range(4):
+                simulated_finishes[place] = numpy.bincount(simulated[:, place], minlength=10)
+
+            # the standard error is at most about 0.0011 at this many simulations
+            numpy.testing.assert_allclose(finishes, simulated_finishes / simulations, atol=0.006)
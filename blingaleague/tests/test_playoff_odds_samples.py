@@ -0,0 +1,127 @@
+import decimal
+import numpy
+
+from blingaleague.models import PlayoffOddsSampleSet, PLAYOFF_TEAMS, BYE_TEAMS
+
+from .base import BlingaleagueTestCase
+
+
+class PlayoffOddsSampleSetTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        rng = numpy.random.default_rng(2021)
+
+        self.team_ids = [1, 2, 3, 4, 5, 6, 7, 8]
+        self.game_weeks = [10, 10, 10, 10, 11, 11, 11, 11, 12]
+        self.game_team_1 = [0, 2, 4, 6, 0, 1, 4, 5, 0]
+        self.game_team_2 = [1, 3, 5, 7, 2, 3, 6, 7, 3]
+
+        # more than eight games, so the outcomes take more than one byte per simulation
+        self.team_1_wins = rng.random((3000, len(self.game_weeks))) < 0.6
+        # team 1 always beats team 4 in week 12
+        self.team_1_wins[:, 8] = True
+
+        self.seeds = numpy.array([
+            rng.permutation(len(self.team_ids))[:PLAYOFF_TEAMS] for _ in range(3000)
+        ])
+        self.champions = self.seeds[numpy.arange(3000), rng.integers(0, PLAYOFF_TEAMS, 3000)]
+
+        # packed a batch at a time, the way the simulations hand them back
+        batches = [
+            PlayoffOddsSampleSet.pack_batch(
+                self.team_1_wins[start:start + 1000],
+                self.seeds[start:start + 1000],
+                self.champions[start:start + 1000],
+            )
+            for start in (0, 1000, 2000)
+        ]
+
+        self.sample_set = PlayoffOddsSampleSet(
+            self.team_ids,
+            self.game_weeks,
+            self.game_team_1,
+            self.game_team_2,
+            numpy.concatenate([batch[0] for batch in batches]),
+            numpy.concatenate([batch[1] for batch in batches]),
+            numpy.concatenate([batch[2] for batch in batches]),
+        )
+
+    def expected_odds(self, matches):
+        # counted straight off the unpacked samples
+        simulations = int(matches.sum())
+
+        expected = {}
+        for i, team_id in enumerate(self.team_ids):
+            expected[team_id] = {
+                finish: decimal.Decimal(int((finishers[matches] == i).sum())) /
+                decimal.Decimal(simulations)
+                for finish, finishers in (
+                    ('playoffs', self.seeds[:, :PLAYOFF_TEAMS]),
+                    ('bye', self.seeds[:, :BYE_TEAMS]),
+                    ('champion', self.champions),
+                )
+            }
+
+        return expected
+
+    def conditional_odds(self, sample_set, results):
+        odds = sample_set.conditional_odds(results)
+
+        return {
+            team.id: {finish: team_odds[finish] for finish in ('playoffs', 'bye', 'champion')}
+            for team, team_odds in odds.items()
+        }
+
+    def test_round_trip_through_bytes(self):
+        loaded = PlayoffOddsSampleSet.from_bytes(self.sample_set.to_bytes())
+
+        for attr in ('team_ids', 'game_weeks', 'game_team_1', 'game_team_2',
+                     'game_outcomes', 'seeds', 'champions'):
+            self.assertTrue(
+                numpy.array_equal(getattr(loaded, attr), getattr(self.sample_set, attr)),
+                attr,
+            )
+            self.assertEqual(getattr(loaded, attr).dtype, getattr(self.sample_set, attr).dtype)
+
+        self.assertEqual(loaded.simulations, 3000)
+        self.assertEqual(loaded.remaining_games(), self.sample_set.remaining_games())
+        self.assertEqual(
+            self.conditional_odds(loaded, [(10, 3, 4)]),
+            self.conditional_odds(self.sample_set, [(10, 3, 4)]),
+        )
+
+    def test_conditional_odds_match_the_samples(self):
+        # week 10, team 3 (team_1) vs team 4 (team_2), in both orientations
+        team_1_won = self.team_1_wins[:, 1]
+
+        odds = self.sample_set.conditional_odds([(10, 3, 4)])
+        self.assertEqual(
+            self.conditional_odds(self.sample_set, [(10, 3, 4)]),
+            self.expected_odds(team_1_won),
+        )
+        self.assertEqual(
+            {team_odds['simulations'] for team_odds in odds.values()},
+            {int(team_1_won.sum())},
+        )
+
+        self.assertEqual(
+            self.conditional_odds(self.sample_set, [(10, 4, 3)]),
+            self.expected_odds(~team_1_won),
+        )
+
+        # and two results at once
+        self.assertEqual(
+            self.conditional_odds(self.sample_set, [(10, 4, 3), (11, 7, 5)]),
+            self.expected_odds(~team_1_won & ~self.team_1_wins[:, 6]),
+        )
+
+    def test_no_conditional_odds_without_matching_simulations(self):
+        self.assertIsNotNone(self.sample_set.conditional_odds([(12, 1, 4)]))
+        self.assertIsNone(self.sample_set.conditional_odds([(12, 4, 1)]))
+
+    def test_no_conditional_odds_for_games_not_in_the_samples(self):
+        # right teams, wrong week
+        self.assertIsNone(self.sample_set.conditional_odds([(11, 3, 4)]))
+        self.assertIsNone(self.sample_set.conditional_odds([(10, 3, 4), (13, 1, 2)]))
@@ -0,0 +1,189 @@
+import numpy
+
+from django.test import SimpleTestCase
+
+from blingaleague.models import Season
+from blingaleague.utils import simulate_remaining_games, rank_simulated_standings, \
+    simulate_playoff_brackets, wilson_score_interval
+
+from .base import BlingaleagueTestCase
+
+
+class SimulateRemainingGamesTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.wins = numpy.array([3, 2, 2, 1])
+        self.points = numpy.array([400.0, 380.0, 390.0, 300.0])
+        self.team_1 = numpy.array([0, 2, 0])
+        self.team_2 = numpy.array([1, 3, 3])
+
+    def simulate(self, win_probabilities, simulations=1000, seed=2014):
+        return simulate_remaining_games(
+            self.wins, self.points, self.team_1, self.team_2,
+            numpy.array(win_probabilities), simulations, numpy.random.default_rng(seed),
+        )
+
+    def test_decided_games(self):
+        wins, points, team_1_wins = self.simulate([1, 0, 0])
+
+        for row in wins:
+            self.assertEqual(list(row), [4, 2, 2, 3])
+
+        for row in team_1_wins:
+            self.assertEqual(list(row), [True, False, False])
+
+    def test_every_game_is_played_once(self):
+        wins, points, _team_1_wins = self.simulate([0.5, 0.3, 0.8])
+
+        self.assertTrue((wins.sum(axis=1) == self.wins.sum() + 3).all())
+        self.assertTrue((wins >= self.wins).all())
+        self.assertTrue((wins <= self.wins + [2, 1, 1, 2]).all())
+
+        # each game adds between 70 + 80 and 140 + 130 points
+        added_points = points.sum(axis=1) - self.points.sum()
+        self.assertTrue((added_points >= 3 * 150).all())
+        self.assertTrue((added_points <= 3 * 270).all())
+
+    def test_win_rates_follow_probabilities(self):
+        wins, points, _team_1_wins = self.simulate([0.5, 0.3, 0.8], simulations=100000)
+
+        # team 1 only plays (and wins) the first game half the time
+        self.assertAlmostEqual((wins[:, 1] - self.wins[1]).mean(), 0.5, delta=0.01)
+        # team 3 wins the second game 70% of the time and the third 20%
+        self.assertAlmostEqual((wins[:, 3] - self.wins[3]).mean(), 0.9, delta=0.01)
+
+    def test_same_seed_same_simulations(self):
+        first = self.simulate([0.5, 0.3, 0.8])
+        second = self.simulate([0.5, 0.3, 0.8])
+
+        for first_array, second_array in zip(first, second):
+            self.assertTrue((first_array == second_array).all())
+
+
+class RankSimulatedStandingsTestCase(SimpleTestCase):
+
+    def test_wins_then_points_then_team_order(self):
+        wins = numpy.array([[5, 7, 5, 5], [6, 6, 6, 6]])
+        points = numpy.array([[900, 800, 950, 900], [700, 700, 700, 700]])
+
+        self.assertEqual(
+            rank_simulated_standings(wins, points).tolist(),
+            [[1, 2, 0, 3], [0, 1, 2, 3]],
+        )
+
+
+class SimulatePlayoffBracketsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # the better seed always wins
+        self.win_probabilities = numpy.triu(numpy.ones((6, 6)), k=1)
+        self.seeds = numpy.array([list(range(6))] * 3)
+
+    def test_favorites_win(self):
+        places = simulate_playoff_brackets(
+            self.seeds, self.win_probabilities, numpy.random.default_rng(2014),
+        )
+
+        self.assertEqual(places.tolist(), [[0, 1, 2, 3]] * 3)
+
+    def test_top_seed_plays_an_upset_winner(self):
+        # the 6 seed beats the 3 seed, and then has to play the 1 seed
+        self.win_probabilities[2, 5] = 0
+        self.win_probabilities[5, 2] = 1
+
+        places = simulate_playoff_brackets(
+            self.seeds, self.win_probabilities, numpy.random.default_rng(2014),
+        )
+
+        self.assertEqual(places.tolist(), [[0, 1, 3, 5]] * 3)
+
+
+class WilsonScoreIntervalTestCase(SimpleTestCase):
+
+    def test_known_intervals(self):
+        low, high = wilson_score_interval([0, 50, 100], 100)
+
+        self.assertEqual(low[0], 0)
+        self.assertAlmostEqual(high[0], 0.036994, places=4)
+        self.assertAlmostEqual(low[1], 0.403830, places=4)
+        self.assertAlmostEqual(high[1], 0.596170, places=4)
+        self.assertAlmostEqual(low[2], 1 - 0.036994, places=4)
+        self.assertAlmostEqual(high[2], 1, places=12)
+
+    def test_narrows_with_more_trials(self):
+        low, high = wilson_score_interval([30, 300, 3000], numpy.array([100, 1000, 10000]))
+        widths = high - low
+
+        self.assertTrue(widths[0] > widths[1] > widths[2])
+        self.assertTrue(((low < 0.3) & (high > 0.3)).all())
+
+
+class PlayoffOddsSeedTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2012])
+
+    def test_same_seed_same_odds_for_any_workers(self):
+        # three batches, so the pool really does split them up
+        season = Season(2012, week_max=8)
+
+        odds = [
+            season.playoff_odds(
+                max_simulations=25000,
+                bypass_cache=True,
+                seed=2016,
+                workers=workers,
+            )
+            for workers in (1, 2, 3)
+        ]
+
+        self.assertEqual(len(odds[0]), 14)
+        self.assertEqual(odds[0], odds[1])
+        self.assertEqual(odds[0], odds[2])
+
+        self.assertNotEqual(
+            season.playoff_odds(max_simulations=25000, bypass_cache=True, seed=2017, workers=1),
+            odds[0],
+        )
+
+
+class AdaptivePlayoffOddsTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2012])
+        self.season = Season(2012, week_max=8)
+
+    def playoff_odds(self, **kwargs):
+        return self.season.playoff_odds(
+            max_simulations=100000,
+            bypass_cache=True,
+            seed=2017,
+            **kwargs
+        )
+
+    def simulations(self, odds):
+        simulations = {team_odds['simulations'] for team_odds in odds.values()}
+        self.assertEqual(len(simulations), 1)
+        return simulations.pop()
+
+    def test_stops_once_intervals_are_narrow_enough(self):
+        self.assertEqual(self.simulations(self.playoff_odds(interval_width=0.5, workers=1)), 10000)
+        self.assertEqual(self.simulations(self.playoff_odds(interval_width=0.001)), 100000)
+        self.assertEqual(self.simulations(self.playoff_odds(adaptive=False)), 100000)
+
+    def test_odds_are_inside_their_intervals(self):
+        for team_odds in self.playoff_odds(interval_width=0.02).values():
+            for finish in ('playoffs', 'bye', 'champion'):
+                low, high = team_odds['intervals'][finish]
+
+                self.assertLessEqual(low, team_odds[finish])
+                self.assertGreaterEqual(high, team_odds[finish])
+                self.assertLess(high - low, 0.02)
+
+    def test_same_seed_same_stopping_point_for_any_workers(self):
+        odds = self.playoff_odds(interval_width=0.02, workers=1)
+
+        self.assertLess(self.simulations(odds), 100000)
+        self.assertEqual(odds, self.playoff_odds(interval_width=0.02, workers=3))
@@ -0,0 +1,74 @@
+from blingaleague.models import Season, TeamSeason
+from blingaleague.utils import regular_season_weeks
+
+from .base import BlingaleagueTestCase
+
+
+def reference_standings(year, week_max):
+    # how standings_table used to be built: a TeamSeason for every team, as of week_max
+    team_seasons = []
+
+    for team in Season(year).active_teams:
+        team_season = TeamSeason(team.id, year, week_max=week_max)
+
+        if len(team_season.games) > 0:
+            team_seasons.append(team_season)
+
+    return sorted(team_seasons, key=lambda x: (x.win_pct, x.points), reverse=True)
+
+
+class StandingsTimelineTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2011, 2012])
+
+    def test_timeline_matches_weekly_standings(self):
+        for year in (2011, 2012):
+            timeline = Season(year).standings_timeline
+
+            self.assertEqual(list(timeline.keys()), list(range(1, regular_season_weeks(year) + 1)))
+
+            for week, timeline_week in timeline.items():
+                standings = reference_standings(year, week)
+
+                self.assertEqual(
+                    timeline_week['standings'],
+                    [team_season.team.id for team_season in standings],
+                    (year, week),
+                )
+
+                by_points = sorted(standings, key=lambda x: x.points, reverse=True)
+                by_expected_wins = sorted(standings, key=lambda x: x.expected_wins, reverse=True)
+
+                for place, team_season in enumerate(standings, 1):
+                    team_week = timeline_week['teams'][team_season.team.id]
+
+                    self.assertEqual(team_week['place'], place)
+                    self.assertEqual(team_week['wins'], team_season.win_count)
+                    self.assertEqual(team_week['losses'], team_season.loss_count)
+                    self.assertEqual(team_week['points'], team_season.points)
+                    self.assertEqual(
+                        team_week['raw expected wins'],
+                        team_season.raw_expected_wins,
+                    )
+                    self.assertAlmostEqual(
+                        team_week['expected wins'],
+                        team_season.expected_wins,
+                        places=20,
+                    )
+                    self.assertEqual(
+                        team_week['points rank'],
+                        by_points.index(team_season) + 1,
+                    )
+                    self.assertEqual(
+                        team_week['expected wins rank'],
+                        by_expected_wins.index(team_season) + 1,
+                    )
+
+    def test_standings_table_reads_the_timeline(self):
+        for week in (1, 7, regular_season_weeks(2012)):
+            self.assertEqual(
+                Season(2012, week_max=week).standings_table,
+                reference_standings(2012, week),
+            )
@@ -1,18 +1,70 @@
+import contextlib
 import decimal
+import inspect
 import itertools
 import logging
 import math
+import numpy
 import pygal
+import threading
+import time
+import uuid
+
+from collections import defaultdict, deque, namedtuple, OrderedDict
 
 from django.apps import apps
+from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import ordinal
 from django.core.cache import caches
+from django.core.signals import request_started, request_finished
 
 
 CACHE = caches['blingaleague']
 
 MEMCACHE_KEY_LENGTH_LIMIT = 250
 
+# the current generation is a namespace for every tagged key; a rebuild warms a new
+# generation while the old one keeps serving, then switches readers over in one write
+LOCAL_CACHE_GENERATION_KEY = 'blingaleague_local_cache_generation'
+BUILDING_CACHE_GENERATION_KEY = 'blingaleague_building_cache_generation'
+
+# every cached key belongs to exactly one tag: either the year it was derived from,
+# or the all-time tag for anything that spans seasons (career stats, top seasons, etc.)
+ALL_TIME_CACHE_TAG = 'all'
+
+# no key belongs to this tag; instead, values cached under a year's tag that were built
+# from other tags' values too (expected wins are measured against every season's scores,
+# similar seasons are searched for across every season, etc.) are stamped with its
+# generation, and read as misses once it has moved on. A new result only has to invalidate
+# its own year and this tag, rather than every year's tag (see fully_cached_property)
+CROSS_YEAR_CACHE_TAG = 'cross-year'
+
+# returned by cache_get() when a key isn't cached at all; unlike None,
+# this can't be confused with a property whose value really is None
+CACHE_MISS = object()
+
+# memcached can't tell a stored None from a missing key, so store this instead
+_CACHED_NONE = 'blingaleague_cached_none'
+
+# a value that depends on other years, with the cross-year generation it was built under
+CrossYearValue = namedtuple('CrossYearValue', ('generation', 'value'))
+
+_cache_round_trips = threading.local()
+
+_cache_tag_generations = threading.local()
+
+_building_cache_generation = threading.local()
+
+_cached_value_builds = threading.local()
+
+_pending_tagged_key_counts = threading.local()
+
+# tagged key counts are written once this many keys are waiting to be counted,
+# if the end of the request (or an invalidation) hasn't written them already
+TAGGED_KEY_COUNT_FLUSH_SIZE = 100
+
+_shared_instances = threading.local()
+
 GRAPH_DEFAULT_OPTIONS = {
     'width': 800,
     'height': 400,
@@ -22,6 +74,471 @@ GRAPH_DEFAULT_OPTIONS = {
 }
 
 
+def _count_cache_round_trip():
+    _cache_round_trips.count = cache_round_trips() + 1
+
+
+def cache_round_trips():
+    return getattr(_cache_round_trips, 'count', 0)
+
+
+def cache_get(key, default=CACHE_MISS, tag=None):
+    if tag is not None:
+        key = tagged_cache_key(key, tag)
+
+    # one round trip, where `key in CACHE` followed by CACHE.get() would take two
+    _count_cache_round_trip()
+
+    value = CACHE.get(key, CACHE_MISS)
+
+    if value is CACHE_MISS:
+        # the caller builds the value itself, which still counts as reading it
+        if tag is not None:
+            _note_cached_read(tag)
+
+        return default
+
+    if isinstance(value, str) and value == _CACHED_NONE:
+        value = None
+
+    if tag is not None:
+        # a cross-year value from before the last new result is as good as missing
+        value = _cached_value(value, tag)
+        if value is CACHE_MISS:
+            return default
+
+    return value
+
+
+def cache_get_many(keys):
+    # returns only the keys that were found, like CACHE.get_many()
+    if not keys:
+        return {}
+
+    _count_cache_round_trip()
+
+    values = CACHE.get_many(keys)
+
+    for key, value in values.items():
+        if isinstance(value, str) and value == _CACHED_NONE:
+            values[key] = None
+
+    return values
+
+
+def cache_set(key, value, tag=None):
+    if tag is not None:
+        key = tagged_cache_key(key, tag)
+
+    _count_cache_round_trip()
+
+    if value is None:
+        value = _CACHED_NONE
+
+    CACHE.set(key, value)
+
+    if tag is not None:
+        _count_tagged_keys({tag: 1})
+
+
+def cache_set_many(data):
+    if not data:
+        return
+
+    _count_cache_round_trip()
+
+    CACHE.set_many({
+        key: _CACHED_NONE if value is None else value
+        for key, value in data.items()
+    })
+
+
+def cache_add(key, value):
+    _count_cache_round_trip()
+
+    if value is None:
+        value = _CACHED_NONE
+
+    return CACHE.add(key, value)
+
+
+def cache_delete(key, tag=None):
+    if tag is not None:
+        key = tagged_cache_key(key, tag)
+
+    _count_cache_round_trip()
+
+    CACHE.delete(key)
+
+
+def year_cache_tag(year):
+    return str(int(year))
+
+
+def new_cache_generation():
+    return uuid.uuid4().hex[:8]
+
+
+def cache_generation():
+    # a rebuild thread writes into the generation it is warming; everyone else
+    # reads and writes the generation that is currently live
+    building_generation = getattr(_building_cache_generation, 'generation', None)
+    if building_generation is not None:
+        return building_generation
+
+    return LOCAL_CACHE.current_generation()
+
+
+def _cache_tag_generation_key(tag, cache_gen):
+    return "blingaleague_cache_tag_generation|{}|{}".format(cache_gen, tag)
+
+
+def _cache_tag_count_key(tag, cache_gen, generation):
+    return "blingaleague_cache_tag_count|{}|{}|{}".format(cache_gen, tag, generation)
+
+
+def cache_tag_generation(tag, cache_gen=None):
+    # keys are built with their tag's current generation, so invalidating a tag is
+    # just a matter of starting a new generation; generations are remembered for the
+    # rest of the request (or the local cache TTL, outside of requests)
+    if cache_gen is None:
+        cache_gen = cache_generation()
+
+    generations = getattr(_cache_tag_generations, 'generations', None)
+    if generations is None:
+        generations = _cache_tag_generations.generations = {}
+
+    if (cache_gen, tag) in generations:
+        generation, fetched_at = generations[(cache_gen, tag)]
+
+        ttl = settings.LOCAL_PROPERTY_CACHE_TTL
+        if ttl is None or fetched_at + ttl > time.monotonic():
+            return generation
+
+    generation_key = _cache_tag_generation_key(tag, cache_gen)
+    generation = cache_get(generation_key, None)
+
+    if generation is None:
+        # add() is a no-op if another process has already started a generation
+        cache_add(generation_key, new_cache_generation())
+        generation = cache_get(generation_key, None)
+
+    generations[(cache_gen, tag)] = (generation, time.monotonic())
+
+    return generation
+
+
+def tagged_cache_key(key, tag):
+    cache_gen = cache_generation()
+
+    return "{}/{}:{}|{}".format(cache_gen, tag, cache_tag_generation(tag, cache_gen), key)
+
+
+def _count_tagged_keys(tag_counts):
+    # counted up in memory and written with one incr per tag (see _flush_tagged_key_counts),
+    # rather than one per key written; each count goes to the generation it was written under
+    cache_gen = cache_generation()
+
+    pending = getattr(_pending_tagged_key_counts, 'counts', None)
+    if pending is None:
+        pending = _pending_tagged_key_counts.counts = {}
+
+    for tag, count in tag_counts.items():
+        count_key = _cache_tag_count_key(tag, cache_gen, cache_tag_generation(tag, cache_gen))
+        pending[count_key] = pending.get(count_key, 0) + count
+
+    if sum(pending.values()) >= TAGGED_KEY_COUNT_FLUSH_SIZE:
+        _flush_tagged_key_counts()
+
+
+def _flush_tagged_key_counts():
+    # memcached incr is atomic, so concurrent writers can't lose each other's counts
+    pending = getattr(_pending_tagged_key_counts, 'counts', None)
+    if not pending:
+        return
+
+    _pending_tagged_key_counts.counts = {}
+
+    for count_key, count in pending.items():
+        _count_cache_round_trip()
+        try:
+            CACHE.incr(count_key, count)
+        except ValueError:
+            if not cache_add(count_key, count):
+                _count_cache_round_trip()
+                CACHE.incr(count_key, count)
+
+
+def _invalidate_cache_tags_in(cache_gen, tags):
+    # the counts are read below, so they have to include this thread's pending ones
+    _flush_tagged_key_counts()
+
+    generations = {tag: cache_tag_generation(tag, cache_gen) for tag in tags}
+    count_keys = {
+        _cache_tag_count_key(tag, cache_gen, generation): tag
+        for tag, generation in generations.items()
+    }
+
+    counts = cache_get_many(list(count_keys.keys()))
+
+    invalidated = {tag: 0 for tag in tags}
+    for count_key, count in counts.items():
+        invalidated[count_keys[count_key]] = count
+
+    new_generations = {tag: new_cache_generation() for tag in tags}
+
+    cache_set_many({
+        _cache_tag_generation_key(tag, cache_gen): generation
+        for tag, generation in new_generations.items()
+    })
+
+    for tag, generation in new_generations.items():
+        _cache_tag_generations.generations[(cache_gen, tag)] = (generation, time.monotonic())
+
+    return invalidated
+
+
+def invalidate_cache_tags(tags, source=None):
+    # starts a new generation for each tag, which orphans every key built under the old one;
+    # orphaned keys are never read again, and memcached evicts them as it needs the room.
+    # returns how many keys were written under each old generation
+    tags = sorted(set(tags))
+
+    invalidated = _invalidate_cache_tags_in(cache_generation(), tags)
+
+    # a rebuild that is still warming could otherwise go live with what this save changed
+    building_generation = cache_get(BUILDING_CACHE_GENERATION_KEY, None)
+    if building_generation is not None and building_generation != cache_generation():
+        _invalidate_cache_tags_in(building_generation, tags)
+
+    if source is not None:
+        logging.getLogger('blingaleague').info(
+            "Saving {} invalidated {} cached keys ({})".format(
+                source,
+                sum(invalidated.values()),
+                ', '.join("{}: {}".format(tag, count) for tag, count in invalidated.items()),
+            ),
+        )
+
+    return invalidated
+
+
+class LocalCache(object):
+    # bounded, in-process LRU that sits between an object's own __dict__ and memcached;
+    # entries expire after ttl seconds, and everything is dropped whenever any process
+    # clears memcached, which is detected through a generation token stored in memcached
+
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.generation = None
+        self.generation_checked_at = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                value, expires_at = entry
+
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._entries[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def sync_generation(self):
+        generation = cache_get(LOCAL_CACHE_GENERATION_KEY, None)
+
+        if generation is None:
+            # memcached was cleared or restarted; add() is a no-op if
+            # another process has already started a new generation
+            cache_add(LOCAL_CACHE_GENERATION_KEY, new_cache_generation())
+            generation = cache_get(LOCAL_CACHE_GENERATION_KEY, None)
+
+        if generation != self.generation:
+            self.clear()
+            self.generation = generation
+
+        self.generation_checked_at = time.monotonic()
+
+    def current_generation(self):
+        # requests sync at the start; outside of requests, re-check once the TTL is up
+        stale = self.generation_checked_at is None or (
+            self.ttl is not None and self.generation_checked_at + self.ttl <= time.monotonic()
+        )
+
+        if self.generation is None or stale:
+            self.sync_generation()
+
+        return self.generation
+
+    def stats(self):
+        lookups = self.hits + self.misses
+
+        hit_rate = 0
+        if lookups > 0:
+            hit_rate = self.hits / lookups
+
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': hit_rate,
+        }
+
+
+LOCAL_CACHE = LocalCache(
+    settings.LOCAL_PROPERTY_CACHE_SIZE,
+    ttl=settings.LOCAL_PROPERTY_CACHE_TTL,
+)
+
+
+def _start_request_cache_tracking(**kwargs):
+    _cache_round_trips.count = 0
+
+    sync_cache_state()
+
+
+def sync_cache_state():
+    # for the start of each request, and for long-running workers between jobs
+    _flush_tagged_key_counts()
+
+    # pick up any tags that other processes have invalidated since the last request
+    _cache_tag_generations.generations = {}
+
+    # each request starts with its own set of shared instances
+    _shared_instances.instances = None
+
+    # one memcached round trip per request tells us if another process has cleared the cache
+    LOCAL_CACHE.sync_generation()
+
+
+def _finish_request_cache_tracking(**kwargs):
+    _flush_tagged_key_counts()
+
+    logging.getLogger('blingaleague').info(
+        "Request used {} memcached round trips".format(cache_round_trips()),
+    )
+
+
+request_started.connect(_start_request_cache_tracking)
+request_finished.connect(_finish_request_cache_tracking)
+
+
+class _CachedValueBuild(object):
+    # a value being built for the cache, under the given tag; it's cross-year once it reads
+    # a value cached under any other tag, or a value that was cross-year itself
+
+    __slots__ = ('tag', 'cross_year_generation')
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.cross_year_generation = None
+
+
+def _note_cached_read(tag, cross_year_generation=None):
+    # only the innermost build is marked; it passes the mark on when it's done
+    builds = getattr(_cached_value_builds, 'builds', None)
+    if not builds:
+        return
+
+    build = builds[-1]
+
+    # all-time values are invalidated by every save anyway, so they're never stamped
+    if build.cross_year_generation is not None or build.tag == ALL_TIME_CACHE_TAG:
+        return
+
+    if cross_year_generation is None:
+        if tag == build.tag:
+            return
+
+        cross_year_generation = cache_tag_generation(CROSS_YEAR_CACHE_TAG)
+
+    build.cross_year_generation = cross_year_generation
+
+
+def _cached_value(value, tag):
+    # what a cached value (stamped or not) holds, or CACHE_MISS if it's missing,
+    # or cross-year and built under an older cross-year generation
+    if value is CACHE_MISS:
+        return CACHE_MISS
+
+    if isinstance(value, CrossYearValue):
+        if value.generation != cache_tag_generation(CROSS_YEAR_CACHE_TAG):
+            return CACHE_MISS
+
+        _note_cached_read(tag, value.generation)
+        return value.value
+
+    _note_cached_read(tag)
+    return value
+
+
+def _build_cached_value(tag, func, *args):
+    # returns (what to cache, the value itself)
+    builds = getattr(_cached_value_builds, 'builds', None)
+    if builds is None:
+        builds = _cached_value_builds.builds = []
+
+    build = _CachedValueBuild(tag)
+
+    builds.append(build)
+    try:
+        value = func(*args)
+    finally:
+        builds.pop()
+
+    if build.cross_year_generation is None:
+        _note_cached_read(tag)
+        return value, value
+
+    _note_cached_read(tag, build.cross_year_generation)
+    return CrossYearValue(build.cross_year_generation, value), value
+
+
+def cross_year_value(value, generation):
+    # for values cached by hand that are always built from other years' values;
+    # generation is the cross-year generation from before they were built
+    _note_cached_read(CROSS_YEAR_CACHE_TAG, generation)
+
+    return CrossYearValue(generation, value)
+
+
 class fully_cached_property(object):
 
     def __init__(self, func):
@@ -40,28 +557,207 @@ class fully_cached_property(object):
             )
             return self.func(obj)
 
-        cache_key = "{}|{}:{}".format(cls.__name__, obj.cache_key, self.func.__name__)
+        cache_key = self.cache_key_for(obj, cls)
 
-        if len(cache_key) > MEMCACHE_KEY_LENGTH_LIMIT:
+        if cache_key is None:
             return self.func(obj)
 
-        if cache_key in obj.__dict__:
-            return obj.__dict__[cache_key]
+        tag = self.cache_tag_for(obj)
+
+        # each level holds what memcached does, so cross-year values are checked at every one
+        stored = obj.__dict__.get(cache_key, CACHE_MISS)
+        value = _cached_value(stored, tag)
 
-        if cache_key in CACHE:
-            return CACHE.get(cache_key)
+        if value is CACHE_MISS:
+            stored = LOCAL_CACHE.get(cache_key, CACHE_MISS)
+            value = _cached_value(stored, tag)
 
-        value = self.func(obj)
+            if value is CACHE_MISS:
+                stored = cache_get(cache_key)
+                value = _cached_value(stored, tag)
 
-        obj.__dict__[cache_key] = value
-        CACHE.set(cache_key, value)
+                if value is CACHE_MISS:
+                    stored, value = _build_cached_value(tag, self.func, obj)
+                    cache_set(cache_key, stored)
+                    _count_tagged_keys({tag: 1})
+
+                LOCAL_CACHE.set(cache_key, stored)
+
+            obj.__dict__[cache_key] = stored
 
         return value
 
+    def cache_tag_for(self, obj):
+        # objects that don't say which year they belong to are treated as all-time
+        return getattr(obj, 'cache_tag', ALL_TIME_CACHE_TAG)
+
+    def cache_key_for(self, obj, cls):
+        cache_key = tagged_cache_key(
+            "{}|{}:{}".format(cls.__name__, obj.cache_key, self.func.__name__),
+            self.cache_tag_for(obj),
+        )
+
+        if len(cache_key) > MEMCACHE_KEY_LENGTH_LIMIT:
+            return None
+
+        return cache_key
+
+
+def shared_instances():
+    # the identity map behind SharedInstance; it lasts for one request (per thread),
+    # and starts over whenever a save changes the data those instances were built from
+    version = tagged_cache_key('blingaleague_shared_instances', ALL_TIME_CACHE_TAG)
+
+    instances = getattr(_shared_instances, 'instances', None)
+
+    if instances is None or _shared_instances.version != version:
+        instances = _shared_instances.instances = {}
+        _shared_instances.version = version
+
+    return instances
+
+
+class SharedInstanceMeta(type):
+
+    def __call__(cls, *args, **kwargs):
+        signature = cls.__dict__.get('_init_signature')
+        if signature is None:
+            signature = inspect.signature(cls.__init__)
+            setattr(cls, '_init_signature', signature)
+
+        bound = signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+
+        # matches how the classes build their cache_keys, so '2020' and 2020 are the same
+        identity_key = (cls,) + tuple(str(value) for value in list(bound.arguments.values())[1:])
+
+        instances = shared_instances()
+
+        instance = instances.get(identity_key)
+        if instance is None:
+            instance = super().__call__(*args, **kwargs)
+            instance._shared_instance_args = (args, kwargs)
+            instances[identity_key] = instance
+
+        return instance
+
+
+def _build_shared_instance(cls, args, kwargs):
+    return cls(*args, **kwargs)
+
+
+class SharedInstance(object, metaclass=SharedInstanceMeta):
+    # constructing one of these with the same arguments as before returns the existing
+    # instance, so repeated construction is free, and every caller shares its cached properties
+
+    def __reduce__(self):
+        # pickle as the constructor arguments; on the way back out of memcached this
+        # resolves to the shared instance, instead of a copy of every cached property
+        args, kwargs = self._shared_instance_args
+        return (_build_shared_instance, (type(self), args, kwargs))
+
+
+def prefetch_cached_properties(objs, property_names):
+    # warms the given fully_cached_properties on every object with one get_many,
+    # and writes back anything that had to be computed with one set_many;
+    # names that aren't fully_cached_properties are left to be computed on access
+    to_fetch = {}
+
+    for obj in objs:
+        cls = type(obj)
+
+        if not hasattr(obj, 'cache_key'):
+            continue
+
+        for property_name in property_names:
+            prop = getattr(cls, property_name, None)
+            if not isinstance(prop, fully_cached_property):
+                continue
+
+            cache_key = prop.cache_key_for(obj, cls)
+            if cache_key is None:
+                continue
+
+            tag = prop.cache_tag_for(obj)
+
+            if _cached_value(obj.__dict__.get(cache_key, CACHE_MISS), tag) is not CACHE_MISS:
+                continue
+
+            stored = LOCAL_CACHE.get(cache_key, CACHE_MISS)
+            if _cached_value(stored, tag) is not CACHE_MISS:
+                obj.__dict__[cache_key] = stored
+                continue
+
+            to_fetch.setdefault(cache_key, []).append((obj, prop))
+
+    cached_values = cache_get_many(list(to_fetch.keys()))
+
+    to_set = {}
+    tag_counts = {}
+    for cache_key, obj_props in to_fetch.items():
+        obj, prop = obj_props[0]
+        tag = prop.cache_tag_for(obj)
+
+        stored = cached_values.get(cache_key, CACHE_MISS)
+        if _cached_value(stored, tag) is CACHE_MISS:
+            # equal objects share a key, so only compute it once
+            stored, _value = _build_cached_value(tag, prop.func, obj)
+            to_set[cache_key] = stored
+
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+        LOCAL_CACHE.set(cache_key, stored)
+
+        for obj, prop in obj_props:
+            obj.__dict__[cache_key] = stored
+
+    cache_set_many(to_set)
+    _count_tagged_keys(tag_counts)
+
 
 def clear_cached_properties():
+    _count_cache_round_trip()
     CACHE.clear()
 
+    # the tag generations went with everything else, as did anything they counted
+    _cache_tag_generations.generations = {}
+    _pending_tagged_key_counts.counts = {}
+
+    switch_cache_generation(new_cache_generation())
+
+
+def switch_cache_generation(generation):
+    # one write moves every process over; each picks it up at its next request,
+    # and the old generation is never read again, so memcached evicts it over time
+    cache_set(LOCAL_CACHE_GENERATION_KEY, generation)
+
+    # a new generation also tells every other process to drop its local cache
+    LOCAL_CACHE.clear()
+    LOCAL_CACHE.generation = generation
+    LOCAL_CACHE.generation_checked_at = time.monotonic()
+
+
+def use_cache_generation(generation):
+    # for worker processes, which should stay on the generation their parent was using
+    _building_cache_generation.generation = generation
+
+
+@contextlib.contextmanager
+def building_cache_generation(generation):
+    # everything cached by this thread goes into the given generation,
+    # without affecting what other threads and processes read
+    cache_set(BUILDING_CACHE_GENERATION_KEY, generation)
+    _building_cache_generation.generation = generation
+
+    try:
+        yield generation
+    finally:
+        # the counts for the keys it built belong to the generation, too
+        _flush_tagged_key_counts()
+
+        _building_cache_generation.generation = None
+        cache_delete(BUILDING_CACHE_GENERATION_KEY)
+
 
 def regular_season_weeks(year):
     year = int(year)
@@ -283,16 +979,328 @@ def calculate_log5_probability(team_season_1, team_season_2):
     return (xw_pct_1 - xw_pct_1 * xw_pct_2) / (xw_pct_1 + xw_pct_2 - 2 * xw_pct_1 * xw_pct_2)
 
 
-def possible_outcomes_for_games(games, prior_win_counts):
-    outcomes = []
+def poisson_binomial_distribution(win_probabilities):
+    # odds of each possible win count, given independent per-game win probabilities;
+    # builds the distribution one game at a time, rather than enumerating every outcome
+    win_distribution = [decimal.Decimal(1)]
+
+    for wp in win_probabilities:
+        next_distribution = [decimal.Decimal(0)] * (len(win_distribution) + 1)
+
+        for win_count, probability in enumerate(win_distribution):
+            next_distribution[win_count] += probability * (1 - wp)
+            next_distribution[win_count + 1] += probability * wp
+
+        win_distribution = next_distribution
+
+    return dict(enumerate(win_distribution))
+
+
+def max_flow(capacities, source, sink):
+    # Edmonds-Karp over {node: {neighbor: capacity}}; returns (flow, nodes reachable from the
+    # source in what's left over), and those reachable nodes are one side of a minimum cut
+    residual = defaultdict(dict)
+    for node, edges in capacities.items():
+        for neighbor, capacity in edges.items():
+            residual[node][neighbor] = residual[node].get(neighbor, 0) + capacity
+            residual[neighbor].setdefault(node, 0)
+
+    flow = 0
+    while True:
+        parents = {source: None}
+        queue = deque([source])
+        while queue and sink not in parents:
+            node = queue.popleft()
+            for neighbor, capacity in residual[node].items():
+                if capacity > 0 and neighbor not in parents:
+                    parents[neighbor] = node
+                    queue.append(neighbor)
+
+        if sink not in parents:
+            return flow, set(parents)
+
+        path = []
+        node = sink
+        while parents[node] is not None:
+            path.append((parents[node], node))
+            node = parents[node]
+
+        augment = min(residual[u][v] for u, v in path)
+        for u, v in path:
+            residual[u][v] -= augment
+            residual[v][u] += augment
+
+        flow += augment
+
+
+def _overloaded_teams(teams, capacities, games):
+    # each game between two of the teams has to be charged to one of them (a win or a loss,
+    # depending on the caller); returns an empty set if that can be done without any team
+    # going over its capacity, or else a set of teams whose games among themselves outnumber
+    # their combined capacity, which means at least one of them can't be held under
+    games = [(team_1, team_2) for team_1, team_2 in games if team_1 in teams and team_2 in teams]
+
+    network = {'source': {}}
+    for i, (team_1, team_2) in enumerate(games):
+        network['source'][('game', i)] = 1
+
+        # a game can't be cut away from its teams, so a cut's teams hold all of its games
+        network[('game', i)] = {('team', team_1): len(games), ('team', team_2): len(games)}
+
+    for team in teams:
+        network[('team', team)] = {'sink': capacities[team]}
+
+    flow, reachable = max_flow(network, 'source', 'sink')
+    if flow == len(games):
+        return set()
+
+    return set(node[1] for node in reachable if isinstance(node, tuple) and node[0] == 'team')
+
+
+def _can_hold_teams(capacities, games, needed):
+    # whether at least `needed` teams can all stay within their capacities at once, where
+    # any team left out takes whatever it's given. Every overloaded set found means one of
+    # its teams has to be left out, so this only branches as deep as there are teams to spare
+    if needed <= 0:
+        return True
+
+    candidates = frozenset(team for team, capacity in capacities.items() if capacity >= 0)
+    searched = set()
+
+    def _search(teams):
+        if len(teams) < needed or teams in searched:
+            return False
+
+        searched.add(teams)
+
+        overloaded = _overloaded_teams(teams, capacities, games)
+        if not overloaded:
+            return True
+
+        return any(_search(teams - {team}) for team in overloaded)
+
+    return _search(candidates)
+
+
+def clinch_table(wins, remaining_games, target_places):
+    # wins is {team: wins so far} and remaining_games is a (team_1, team_2) tuple for every
+    # game left; returns {team: {target_place: {'clinched', 'eliminated', 'magic_number'}}}.
+    # Clinches and eliminations are the classic max-flow elimination check, for every team and
+    # place in one pass, instead of trying every way the remaining games could go. Ties on
+    # wins come down to points, which are still to be scored, so a team has only clinched if
+    # nobody else can even tie it, and is only eliminated if it can be passed outright
+    remaining_counts = defaultdict(int)
+    for team_1, team_2 in remaining_games:
+        remaining_counts[team_1] += 1
+        remaining_counts[team_2] += 1
+
+    table = {}
+    for team, team_wins in wins.items():
+        other_games = [game for game in remaining_games if team not in game]
+
+        games_against_team = defaultdict(int)
+        for team_1, team_2 in remaining_games:
+            if team == team_1:
+                games_against_team[team_2] += 1
+            elif team == team_2:
+                games_against_team[team_1] += 1
+
+        # the best case: win out, and let the others split their own games; each of them
+        # can win this many more and still not pass
+        max_wins = team_wins + remaining_counts[team]
+        win_capacities = dict(
+            (other, max_wins - other_wins)
+            for other, other_wins in wins.items() if other != team
+        )
+
+        # the worst case: lose out, which hands every opponent a win; each of them needs
+        # the rest of the wins to tie, and can lose this many of its other games
+        loss_capacities = {}
+        for other, other_wins in wins.items():
+            if other == team:
+                continue
+
+            other_games_left = remaining_counts[other] - games_against_team[other]
+            wins_to_tie = max(0, team_wins - other_wins - games_against_team[other])
+            loss_capacities[other] = other_games_left - wins_to_tie
+
+        # the traditional magic number, against whoever can finish with the most wins without
+        # pushing this team past the target place: each win by this team, or loss by that one,
+        # takes one off. It can overstate what's needed, so a clinch still makes it zero
+        others_max_wins = sorted(
+            (other_wins + remaining_counts[other] for other, other_wins in wins.items()
+             if other != team),
+            reverse=True,
+        )
+
+        table[team] = {}
+        for target_place in target_places:
+            clinched = not _can_hold_teams(loss_capacities, other_games, target_place)
+            eliminated = not _can_hold_teams(
+                win_capacities,
+                other_games,
+                len(win_capacities) - (target_place - 1),
+            )
+
+            magic_number = None
+            if clinched:
+                magic_number = 0
+            elif not eliminated:
+                magic_number = others_max_wins[target_place - 1] + 1 - team_wins
+
+            table[team][target_place] = {
+                'clinched': clinched,
+                'eliminated': eliminated,
+                'magic_number': magic_number,
+            }
+
+    return table
+
+
+def simulate_remaining_games(wins, points, team_1, team_2, team_1_win_probabilities,
+                             simulations, rng):
+    # one row per simulation and one column per team; every remaining game is decided
+    # by a single uniform draw against team_1's win probability, and the points use the
+    # same ranges as always: the winner scores 80-140 and the loser 70-{winner - 10}.
+    # Also returns whether team_1 won each game, one row per simulation
+    game_count = len(team_1)
+    team_count = len(wins)
+
+    team_1_wins = rng.random((simulations, game_count)) <= team_1_win_probabilities
+    winners = numpy.where(team_1_wins, team_1, team_2)
+    losers = numpy.where(team_1_wins, team_2, team_1)
+
+    winner_points = 80 + rng.random((simulations, game_count)) * 60
+    loser_points = numpy.minimum(
+        winner_points - 10,
+        70 + rng.random((simulations, game_count)) * 50,
+    )
+
+    # offset each simulation's team indexes so a single bincount tallies every row at once
+    row_offsets = (numpy.arange(simulations) * team_count)[:, numpy.newaxis]
+    size = simulations * team_count
+
+    simulated_wins = numpy.bincount(
+        (winners + row_offsets).ravel(),
+        minlength=size,
+    ).reshape(simulations, team_count)
+
+    simulated_points = (
+        numpy.bincount((winners + row_offsets).ravel(), winner_points.ravel(), minlength=size) +
+        numpy.bincount((losers + row_offsets).ravel(), loser_points.ravel(), minlength=size)
+    ).reshape(simulations, team_count)
+
+    return simulated_wins + wins, simulated_points + points, team_1_wins
+
+
+def rank_simulated_standings(wins, points):
+    # team indexes for each simulation, best record first, with points as the tiebreak;
+    # the sort is stable, so exact ties keep the original team order
+    return numpy.lexsort((-points, -wins))
+
+
+def simulate_playoff_brackets(seeds, win_probabilities, rng):
+    # seeds holds team indexes in seed order, one row per simulation, and
+    # win_probabilities[i, j] is the chance that team i beats team j; returns
+    # the team indexes that finish first through fourth in each simulation
+    def _play(team_1, team_2):
+        team_1_wins = rng.random(len(team_1)) <= win_probabilities[team_1, team_2]
+        return (
+            numpy.where(team_1_wins, team_1, team_2),
+            numpy.where(team_1_wins, team_2, team_1),
+        )
+
+    # quarterfinals are 3 vs 6 and 4 vs 5
+    winner_3_6 = _play(seeds[:, 2], seeds[:, 5])[0]
+    winner_4_5 = _play(seeds[:, 3], seeds[:, 4])[0]
+
+    # the 1 seed plays whichever quarterfinal winner is seeded lowest;
+    # that's the 6 seed after an upset, and the 4 or 5 seed otherwise
+    upset = winner_3_6 == seeds[:, 5]
+    seed_1_opponent = numpy.where(upset, winner_3_6, winner_4_5)
+    seed_2_opponent = numpy.where(upset, winner_4_5, winner_3_6)
+
+    winner_1, loser_1 = _play(seeds[:, 0], seed_1_opponent)
+    winner_2, loser_2 = _play(seeds[:, 1], seed_2_opponent)
+
+    champion, runner_up = _play(winner_1, winner_2)
+    third_place, fourth_place = _play(loser_1, loser_2)
+
+    return numpy.stack((champion, runner_up, third_place, fourth_place), axis=1)
+
+
+def playoff_bracket_distribution(seeds, win_probabilities):
+    # exact odds of each team finishing first through fourth, for the same bracket as
+    # simulate_playoff_brackets; there are only six games with a winner that matters
+    # (the quarterfinals, semifinals, final and third-place game), so this walks all
+    # 64 ways they can go, skipping any branch a forced result has ruled out
+    finishes = numpy.zeros((4, len(win_probabilities)))
+
+    def _play(team_1, team_2, team_1_wins, probability):
+        team_1_win_probability = win_probabilities[team_1][team_2]
+
+        if team_1_wins:
+            return team_1, team_2, probability * team_1_win_probability
+        return team_2, team_1, probability * (1 - team_1_win_probability)
+
+    seed_1, seed_2, seed_3, seed_4, seed_5, seed_6 = seeds
 
-    outcome_combos = itertools.product([0, 1], repeat=len(games))
-    for outcome_combo in outcome_combos:
-        win_counts = prior_win_counts.copy()
-        for i, outcome in enumerate(outcome_combo):
-            winner = games[i][outcome]
-            win_counts[winner] += 1
+    for outcomes in itertools.product((True, False), repeat=6):
+        probability = 1
 
-        outcomes.append(win_counts)
+        winner_3_6, _loser, probability = _play(seed_3, seed_6, outcomes[0], probability)
+        winner_4_5, _loser, probability = _play(seed_4, seed_5, outcomes[1], probability)
+
+        # the 1 seed plays whichever quarterfinal winner is seeded lowest
+        if winner_3_6 == seed_6:
+            seed_1_opponent, seed_2_opponent = winner_3_6, winner_4_5
+        else:
+            seed_1_opponent, seed_2_opponent = winner_4_5, winner_3_6
+
+        winner_1, loser_1, probability = _play(seed_1, seed_1_opponent, outcomes[2], probability)
+        winner_2, loser_2, probability = _play(seed_2, seed_2_opponent, outcomes[3], probability)
+
+        champion, runner_up, probability = _play(winner_1, winner_2, outcomes[4], probability)
+        third_place, fourth_place, probability = _play(loser_1, loser_2, outcomes[5], probability)
+
+        if probability == 0:
+            continue
+
+        for place, team in enumerate((champion, runner_up, third_place, fourth_place)):
+            finishes[place, team] += probability
+
+    return finishes
+
+
+def simulation_batches(simulations, batch_size, seed, first_batch=0):
+    # splits simulations into fixed-size batches of (simulations, seed_sequence); each
+    # batch's random stream depends only on the seed and the batch's number, so the same
+    # seed gives the same results however the batches are spread across processes
+    batches = []
+
+    batch = first_batch
+    while simulations > 0:
+        batch_simulations = min(batch_size, simulations)
+        batches.append((
+            batch_simulations,
+            numpy.random.SeedSequence(seed, spawn_key=(batch,)),
+        ))
+
+        simulations -= batch_simulations
+        batch += 1
+
+    return batches
+
+
+def wilson_score_interval(successes, trials, z=1.96):
+    # confidence interval for a simulated probability (95% by default); unlike the normal
+    # approximation, it doesn't collapse to zero width for odds of exactly 0 or 1
+    p = numpy.asarray(successes, dtype=float) / trials
+
+    center = (p + z ** 2 / (2 * trials)) / (1 + z ** 2 / trials)
+    half_width = (
+        z * numpy.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) /
+        (1 + z ** 2 / trials)
+    )
 
-    return outcomes
+    return center - half_width, center + half_width
@@ -105,13 +105,16 @@ class SingleSeasonView(TemplateView):
         if season.is_upcoming_season:
             return ''
 
-        weeks = sorted(season.standings_table[0].rank_by_week.keys())
+        timeline = Season(season.year).standings_timeline
+
+        leader = season.standings_table[0]
+        weeks = list(range(1, min(len(leader.games), regular_season_weeks(season.year)) + 1))
         place_series = defaultdict(list)
 
         for team_season in season.standings_table:
             for week in weeks:
                 place_series[team_season.team.nickname].append(
-                    team_season.rank_by_week[week]['place'],
+                    timeline[week]['teams'][team_season.team.id]['place'],
                 )
 
         custom_options = {
@@ -367,18 +370,19 @@ class TeamSeasonView(GamesView):
         if team_season.season_object.is_upcoming_season:
             return
 
-        weeks = []
-        expected_wins_by_outcome = defaultdict(lambda: [None] * len(team_season.games))
-
-        for week, expected_wins in enumerate(team_season.expected_wins_by_game, 1):
-            if week > regular_season_weeks(team_season.year):
-                break
+        timeline = Season(team_season.year).standings_timeline
 
-            weeks.append(week)
+        week_max = min(len(team_season.games), regular_season_weeks(team_season.year))
+        weeks = list(range(1, week_max + 1))
+        expected_wins_by_outcome = defaultdict(lambda: [None] * len(weeks))
 
-            outcome = team_season.week_outcome(week)
+        for week in weeks:
+            team_week = timeline[week]['teams'][team_season.team.id]
+            if team_week['outcome'] is None:
+                continue
 
-            expected_wins_by_outcome[outcome][week - 1] = expected_wins
+            expected_wins_by_outcome[team_week['outcome']][week - 1] = \
+                team_season.season_object.scale_expected_wins(team_week['game raw expected wins'])
 
         custom_options = {
             'title': 'Expected Wins by Week',
@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
 
-from blingalytics.utils import CACHE, PLAYOFF_ODDS_QUEUE_CACHE_KEY, \
-                   PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY
+from blingalytics.models import PlayoffOddsJob
 
 
 class Command(BaseCommand):
@@ -9,7 +8,7 @@ class Command(BaseCommand):
     label = 'caches_to_clear'
 
     def handle(self, *args, **kwargs):
-        CACHE.delete(PLAYOFF_ODDS_QUEUE_CACHE_KEY)
-        CACHE.delete(PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY)
+        # finished jobs keep their results; anything else starts over on the next request
+        PlayoffOddsJob.objects.exclude(status=PlayoffOddsJob.STATUS_DONE).delete()
 
         print('Playoff odds queue cleared')
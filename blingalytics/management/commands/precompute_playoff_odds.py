@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blingalytics.utils import precompute_playoff_odds
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PLAYOFF_ODDS_WORKERS,
+            help='Number of processes to split the weeks across',
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            default=None,
+            help='Only precompute odds for this season',
+        )
+
+    def handle(self, *args, **kwargs):
+        jobs_run = precompute_playoff_odds(workers=kwargs['workers'], year=kwargs['year'])
+
+        print("Precomputed playoff odds for {} weeks".format(jobs_run))
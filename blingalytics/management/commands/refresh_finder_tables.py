@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blingaleague.models import Season
+
+from blingalytics.utils import refresh_finder_tables, run_finder_refresh_worker
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            help='Refresh the tables for every season now, rather than what saves have queued',
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            default=None,
+            help='Refresh the tables for this season now, rather than what saves have queued',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.FINDER_REFRESH_POLL_INTERVAL,
+            help='Seconds to wait between checks when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help='Exit once the queue is empty, rather than waiting for more saves',
+        )
+
+    def handle(self, *args, **kwargs):
+        years = None
+        if kwargs['all']:
+            years = range(Season.min().year, Season.max().year + 1)
+        elif kwargs['year'] is not None:
+            years = [kwargs['year']]
+
+        if years is None:
+            run_finder_refresh_worker(kwargs['poll_interval'], once=kwargs['once'])
+            return
+
+        for table_name, row_count in refresh_finder_tables(years).items():
+            print("Wrote {} changed {} rows".format(row_count, table_name))
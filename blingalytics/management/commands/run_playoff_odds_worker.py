@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blingalytics.utils import run_playoff_odds_worker
+
+
+class Command(BaseCommand):
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.PLAYOFF_ODDS_WORKER_POLL_INTERVAL,
+            help='Seconds to wait between checks when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help='Exit once the queue is empty, rather than waiting for more jobs',
+        )
+
+    def handle(self, *args, **kwargs):
+        run_playoff_odds_worker(kwargs['poll_interval'], once=kwargs['once'])
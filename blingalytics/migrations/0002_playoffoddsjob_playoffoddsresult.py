@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blingaleague', '0027_auto_20260805_1221'),
+        ('blingalytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayoffOddsJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('season_key', models.CharField(unique=True, max_length=100)),
+                ('year', models.IntegerField(db_index=True)),
+                ('week_max', models.IntegerField(blank=True, null=True)),
+                ('status', models.CharField(default='queued', max_length=10, db_index=True, choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')])),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('simulations', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['requested_at', 'pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayoffOddsResult',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('playoffs', models.FloatField()),
+                ('bye', models.FloatField()),
+                ('champion', models.FloatField()),
+                ('playoffs_low', models.FloatField(blank=True, null=True)),
+                ('playoffs_high', models.FloatField(blank=True, null=True)),
+                ('bye_low', models.FloatField(blank=True, null=True)),
+                ('bye_high', models.FloatField(blank=True, null=True)),
+                ('champion_low', models.FloatField(blank=True, null=True)),
+                ('champion_high', models.FloatField(blank=True, null=True)),
+                ('job', models.ForeignKey(related_name='results', to='blingalytics.PlayoffOddsJob')),
+                ('team', models.ForeignKey(related_name='playoff_odds_results', to='blingaleague.Member')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='playoffoddsresult',
+            unique_together=set([('job', 'team')]),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blingalytics', '0002_playoffoddsjob_playoffoddsresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayoffOddsSamples',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('data', models.BinaryField()),
+                ('job', models.OneToOneField(related_name='samples', to='blingalytics.PlayoffOddsJob')),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blingaleague', '0027_auto_20260805_1221'),
+        ('blingalytics', '0003_playoffoddssamples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamSeasonStats',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('year', models.IntegerField(db_index=True)),
+                ('week_max', models.IntegerField()),
+                ('played_through_week_max', models.BooleanField(default=False)),
+                ('game_count', models.IntegerField()),
+                ('win_count', models.IntegerField()),
+                ('loss_count', models.IntegerField()),
+                ('expected_wins', models.DecimalField(max_digits=8, decimal_places=4)),
+                ('points', models.DecimalField(max_digits=8, decimal_places=2)),
+                ('average_score', models.DecimalField(max_digits=8, decimal_places=4)),
+                ('place_numeric', models.IntegerField()),
+                ('made_playoffs', models.BooleanField(default=False)),
+                ('missed_playoffs', models.BooleanField(default=False)),
+                ('clinched_playoffs', models.BooleanField(default=False)),
+                ('clinched_bye', models.BooleanField(default=False)),
+                ('eliminated_playoffs_early', models.BooleanField(default=False)),
+                ('bye', models.BooleanField(default=False)),
+                ('champion', models.BooleanField(default=False)),
+                ('team', models.ForeignKey(related_name='team_season_stats', to='blingaleague.Member')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='teamseasonstats',
+            unique_together=set([('team', 'year', 'week_max')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='teamseasonstats',
+            index_together=set([('year', 'week_max')]),
+        ),
+    ]
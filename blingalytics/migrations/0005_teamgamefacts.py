@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blingaleague', '0027_auto_20260805_1221'),
+        ('blingalytics', '0004_teamseasonstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamGameFacts',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('year', models.IntegerField(db_index=True)),
+                ('week', models.IntegerField(db_index=True)),
+                ('outcome', models.CharField(max_length=1, db_index=True)),
+                ('score', models.DecimalField(max_digits=6, decimal_places=2, db_index=True)),
+                ('opponent_score', models.DecimalField(max_digits=6, decimal_places=2)),
+                ('margin', models.DecimalField(max_digits=6, decimal_places=2, db_index=True)),
+                ('is_playoffs', models.BooleanField(default=False, db_index=True)),
+                ('playoff_title_base', models.CharField(blank=True, max_length=50, db_index=True)),
+                ('blangums', models.BooleanField(default=False, db_index=True)),
+                ('slapped_heartbeat', models.BooleanField(default=False, db_index=True)),
+                ('weekly_rank', models.IntegerField()),
+                ('streak', models.IntegerField(db_index=True)),
+                ('current_streak', models.CharField(max_length=10)),
+                ('current_streak_sort_key', models.IntegerField()),
+                ('wins_before', models.IntegerField()),
+                ('losses_before', models.IntegerField()),
+                ('place_before', models.IntegerField(blank=True, null=True)),
+                ('wins_after', models.IntegerField()),
+                ('losses_after', models.IntegerField()),
+                ('place_after', models.IntegerField(blank=True, null=True)),
+                ('game', models.ForeignKey(related_name='team_facts', to='blingaleague.Game')),
+                ('opponent', models.ForeignKey(related_name='opponent_game_facts', to='blingaleague.Member')),
+                ('team', models.ForeignKey(related_name='team_game_facts', to='blingaleague.Member')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='teamgamefacts',
+            unique_together=set([('game', 'team')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='teamgamefacts',
+            index_together=set([('year', 'week')]),
+        ),
+    ]
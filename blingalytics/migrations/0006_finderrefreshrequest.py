@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blingalytics', '0005_teamgamefacts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinderRefreshRequest',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('table', models.CharField(max_length=50)),
+                ('year', models.IntegerField()),
+                ('week_min', models.IntegerField()),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['requested_at', 'pk'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='finderrefreshrequest',
+            unique_together=set([('table', 'year')]),
+        ),
+        migrations.RemoveField(
+            model_name='teamseasonstats',
+            name='expected_wins',
+        ),
+    ]
@@ -1,6 +1,13 @@
 import ctypes
 
-from django.db import models
+from collections import defaultdict
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from blingaleague.models import Game, Season, TeamSeason, PlayoffOddsSampleSet, \
+                                OUTCOME_WIN, OUTCOME_LOSS
+from blingaleague.utils import regular_season_weeks, prefetch_cached_properties
 
 
 class ShortUrl(models.Model):
@@ -19,3 +26,462 @@ class ShortUrl(models.Model):
 
     def __repr__(self):
         return str(self)
+
+
+class PlayoffOddsJob(models.Model):
+    # one row per season and week_max; a queued job is claimed by exactly one
+    # run_playoff_odds_worker process, which stores the results alongside it
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    season_key = models.CharField(unique=True, max_length=100)
+    year = models.IntegerField(db_index=True)
+    week_max = models.IntegerField(blank=True, null=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        db_index=True,
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    worker = models.CharField(blank=True, max_length=100)
+    simulations = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['requested_at', 'pk']
+
+    @property
+    def is_done(self):
+        return self.status == self.STATUS_DONE
+
+    @property
+    def run_seconds(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def queue_position(self):
+        if self.status != self.STATUS_QUEUED:
+            return None
+
+        return PlayoffOddsJob.objects.filter(
+            status=self.STATUS_QUEUED,
+            requested_at__lte=self.requested_at,
+        ).exclude(pk=self.pk).count() + 1
+
+    def odds(self):
+        # same shape as Season.playoff_odds, so callers don't care where the odds came from
+        odds = {}
+        for result in self.results.select_related('team'):
+            odds[result.team] = {
+                'playoffs': result.playoffs,
+                'bye': result.bye,
+                'champion': result.champion,
+            }
+
+            if self.simulations is not None:
+                odds[result.team]['simulations'] = self.simulations
+                odds[result.team]['intervals'] = {
+                    'playoffs': (result.playoffs_low, result.playoffs_high),
+                    'bye': (result.bye_low, result.bye_high),
+                    'champion': (result.champion_low, result.champion_high),
+                }
+
+        return odds
+
+    def sample_set(self):
+        # the simulations behind odds(), for what-if odds; None when the odds weren't simulated
+        try:
+            return PlayoffOddsSampleSet.from_bytes(self.samples.data)
+        except PlayoffOddsSamples.DoesNotExist:
+            return None
+
+    def __str__(self):
+        return "{} ({})".format(self.season_key, self.status)
+
+    def __repr__(self):
+        return str(self)
+
+
+class PlayoffOddsResult(models.Model):
+    job = models.ForeignKey(PlayoffOddsJob, related_name='results')
+    team = models.ForeignKey('blingaleague.Member', related_name='playoff_odds_results')
+    playoffs = models.FloatField()
+    bye = models.FloatField()
+    champion = models.FloatField()
+
+    # 95% intervals, for odds that were simulated rather than worked out exactly
+    playoffs_low = models.FloatField(blank=True, null=True)
+    playoffs_high = models.FloatField(blank=True, null=True)
+    bye_low = models.FloatField(blank=True, null=True)
+    bye_high = models.FloatField(blank=True, null=True)
+    champion_low = models.FloatField(blank=True, null=True)
+    champion_high = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('job', 'team')
+
+    def __str__(self):
+        return "{}: {}".format(self.job.season_key, self.team)
+
+    def __repr__(self):
+        return str(self)
+
+
+class PlayoffOddsSamples(models.Model):
+    # a PlayoffOddsSampleSet, saved with to_bytes
+    job = models.OneToOneField(PlayoffOddsJob, related_name='samples')
+    data = models.BinaryField()
+
+    def __str__(self):
+        return "{}: {} bytes".format(self.job.season_key, len(self.data))
+
+    def __repr__(self):
+        return str(self)
+
+
+def write_changed_rows(queryset, rows, key_fields):
+    # makes the stored rows in queryset match the given, unsaved rows, matching them up on
+    # key_fields; only rows whose values actually changed are written. Returns how many
+    # rows were created, updated or deleted
+    model = queryset.model
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+
+    def _db_values(row):
+        # as they'd be saved, so 1.50 and 1.5000001 are the same 1.50
+        return [field.get_db_prep_save(getattr(row, field.attname), connection) for field in fields]
+
+    stored_rows = dict(
+        (tuple(getattr(row, key_field) for key_field in key_fields), row) for row in queryset
+    )
+
+    new_rows = []
+    changed_count = 0
+    with transaction.atomic():
+        for row in rows:
+            stored_row = stored_rows.pop(
+                tuple(getattr(row, key_field) for key_field in key_fields),
+                None,
+            )
+
+            if stored_row is None:
+                new_rows.append(row)
+            elif _db_values(row) != _db_values(stored_row):
+                model.objects.filter(pk=stored_row.pk).update(**dict(
+                    (field.attname, getattr(row, field.attname)) for field in fields
+                ))
+                changed_count += 1
+
+        model.objects.filter(pk__in=[row.pk for row in stored_rows.values()]).delete()
+        model.objects.bulk_create(new_rows)
+
+    return changed_count + len(new_rows) + len(stored_rows)
+
+
+class FinderRefreshRequest(models.Model):
+    # a season whose TeamSeasonStats or TeamGameFacts rows are out of date from week_min on;
+    # saves add these rather than refreshing in the request, and the refresh_finder_tables
+    # command works through them (see queue_finder_refresh)
+    table = models.CharField(max_length=50)
+    year = models.IntegerField()
+    week_min = models.IntegerField()
+    requested_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('table', 'year')
+        ordering = ['requested_at', 'pk']
+
+    @classmethod
+    def request(cls, table, year, week_min):
+        while True:
+            request, created = cls.objects.get_or_create(
+                table=table,
+                year=year,
+                defaults={'week_min': week_min},
+            )
+
+            if created:
+                return request
+
+            # a refresh that's already running compares requested_at before it deletes
+            # the request, so moving it on keeps this change queued; if nothing is updated,
+            # that refresh finished in the meantime, so start a new request
+            if cls.objects.filter(pk=request.pk).update(requested_at=timezone.now()):
+                cls.objects.filter(pk=request.pk, week_min__gt=week_min).update(
+                    week_min=week_min,
+                )
+                return request
+
+    def __str__(self):
+        return "{} {} (from week {})".format(self.table, self.year, self.week_min)
+
+    def __repr__(self):
+        return str(self)
+
+
+class TeamSeasonStats(models.Model):
+    # what the season finder filters on, one row per team, year and week_max, so the
+    # filtering can happen in SQL; there's a row for every week with games, plus the full
+    # regular season. Refreshed from TeamSeason after a game, future game or postseason
+    # is saved (see FinderRefreshRequest), rather than expiring like the cache. Only what
+    # a season's own games decide goes in here: expected wins are measured against every
+    # season's scores, so they stay with the cache, which is invalidated across years
+    STATS_ATTRS = (
+        'games', 'win_count', 'loss_count', 'points', 'average_score',
+        'place_numeric', 'made_playoffs', 'missed_playoffs', 'clinched_playoffs',
+        'clinched_bye', 'eliminated_playoffs_early', 'bye', 'champion',
+    )
+
+    team = models.ForeignKey('blingaleague.Member', related_name='team_season_stats')
+    year = models.IntegerField(db_index=True)
+    week_max = models.IntegerField()
+
+    # whether the team has played every week through week_max; teams with byes are
+    # a week short once the playoffs start
+    played_through_week_max = models.BooleanField(default=False)
+
+    game_count = models.IntegerField()
+    win_count = models.IntegerField()
+    loss_count = models.IntegerField()
+    points = models.DecimalField(max_digits=8, decimal_places=2)
+    average_score = models.DecimalField(max_digits=8, decimal_places=4)
+    place_numeric = models.IntegerField()
+    made_playoffs = models.BooleanField(default=False)
+    missed_playoffs = models.BooleanField(default=False)
+    clinched_playoffs = models.BooleanField(default=False)
+    clinched_bye = models.BooleanField(default=False)
+    eliminated_playoffs_early = models.BooleanField(default=False)
+    bye = models.BooleanField(default=False)
+    champion = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('team', 'year', 'week_max')
+        index_together = [('year', 'week_max')]
+
+    @classmethod
+    def week_maxes(cls, year):
+        weeks = set(Game.objects.filter(year=year).values_list('week', flat=True).distinct())
+        weeks.add(regular_season_weeks(year))
+        return sorted(weeks)
+
+    @classmethod
+    def refresh(cls, year, week_min=1):
+        # a game only changes the stats from its own week on
+        week_maxes = [week_max for week_max in cls.week_maxes(year) if week_max >= week_min]
+
+        games = Game.objects.filter(year=year)
+        team_ids = set(games.values_list('winner_id', flat=True))
+        team_ids.update(games.values_list('loser_id', flat=True))
+
+        team_seasons = [
+            TeamSeason(team_id, year, week_max=week_max)
+            for week_max in week_maxes
+            for team_id in sorted(team_ids)
+        ]
+        prefetch_cached_properties(team_seasons, cls.STATS_ATTRS)
+
+        rows = []
+        for team_season in team_seasons:
+            game_count = len(team_season.games)
+            if game_count == 0:
+                continue
+
+            played_through_week_max = game_count >= team_season.week_max
+            if team_season.week_max > regular_season_weeks(year) and team_season.bye:
+                played_through_week_max = game_count >= team_season.week_max - 1
+
+            rows.append(cls(
+                team_id=team_season.team.id,
+                year=year,
+                week_max=team_season.week_max,
+                played_through_week_max=played_through_week_max,
+                game_count=game_count,
+                win_count=team_season.win_count,
+                loss_count=team_season.loss_count,
+                points=team_season.points,
+                average_score=team_season.average_score,
+                place_numeric=team_season.place_numeric,
+                made_playoffs=bool(team_season.made_playoffs),
+                missed_playoffs=bool(team_season.missed_playoffs),
+                clinched_playoffs=bool(team_season.clinched_playoffs),
+                clinched_bye=bool(team_season.clinched_bye),
+                eliminated_playoffs_early=bool(team_season.eliminated_playoffs_early),
+                bye=bool(team_season.bye),
+                champion=bool(team_season.champion),
+            ))
+
+        return write_changed_rows(
+            cls.objects.filter(year=year, week_max__gte=week_min),
+            rows,
+            ('team_id', 'week_max'),
+        )
+
+    def team_season(self, week_max=None):
+        return TeamSeason(self.team_id, self.year, week_max=week_max)
+
+    def __str__(self):
+        return "{} {} (through week {})".format(self.year, self.team, self.week_max)
+
+    def __repr__(self):
+        return str(self)
+
+
+class TeamGameFacts(models.Model):
+    # one row for each team in each game, with everything the game finder filters on or
+    # shows, so the filtering can happen in SQL; refreshed like TeamSeasonStats.
+    # Streaks, weekly ranks and places all depend on the games around them, so a changed
+    # game refreshes every row in its season from its week on
+    game = models.ForeignKey('blingaleague.Game', related_name='team_facts')
+    team = models.ForeignKey('blingaleague.Member', related_name='team_game_facts')
+    opponent = models.ForeignKey('blingaleague.Member', related_name='opponent_game_facts')
+    year = models.IntegerField(db_index=True)
+    week = models.IntegerField(db_index=True)
+    outcome = models.CharField(max_length=1, db_index=True)
+    score = models.DecimalField(max_digits=6, decimal_places=2, db_index=True)
+    opponent_score = models.DecimalField(max_digits=6, decimal_places=2)
+    margin = models.DecimalField(max_digits=6, decimal_places=2, db_index=True)
+
+    # the playoff round and weekly awards belong to the game, not just this team
+    is_playoffs = models.BooleanField(default=False, db_index=True)
+    playoff_title_base = models.CharField(blank=True, max_length=50, db_index=True)
+    blangums = models.BooleanField(default=False, db_index=True)
+    slapped_heartbeat = models.BooleanField(default=False, db_index=True)
+
+    weekly_rank = models.IntegerField()
+
+    # this team's win or loss streak, counting this game, within the season
+    streak = models.IntegerField(db_index=True)
+    current_streak = models.CharField(max_length=10)
+    current_streak_sort_key = models.IntegerField()
+
+    wins_before = models.IntegerField()
+    losses_before = models.IntegerField()
+    place_before = models.IntegerField(blank=True, null=True)
+    wins_after = models.IntegerField()
+    losses_after = models.IntegerField()
+    place_after = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('game', 'team')
+        index_together = [('year', 'week')]
+
+    @classmethod
+    def refresh(cls, year, week_min=1):
+        # one pass over the season's games in order, keeping each team's record and streak as
+        # it goes, with places from the season's standings timeline; every game is walked to
+        # get the running totals right, but only rows from week_min on are built and compared
+        games = sorted(
+            Game.objects.filter(year=year).select_related('winner', 'loser'),
+            key=lambda game: (game.week, game.pk),
+        )
+        prefetch_cached_properties(
+            [game for game in games if game.week >= week_min],
+            ('margin', 'is_playoffs', 'playoff_title_base', 'blangums', 'slapped_heartbeat',
+             'winner_weekly_rank', 'loser_weekly_rank'),
+        )
+
+        timeline = Season(year).standings_timeline
+
+        def _place(team_id, week_max):
+            # as TeamSeason.place_numeric has it: the playoffs don't change anyone's place
+            standings = timeline.get(min(week_max, regular_season_weeks(year)))
+            if standings is None or team_id not in standings['standings']:
+                return None
+
+            return standings['standings'].index(team_id) + 1
+
+        records = defaultdict(lambda: {OUTCOME_WIN: 0, OUTCOME_LOSS: 0})
+        streaks = {}
+
+        rows = []
+        for game in games:
+            for outcome in (OUTCOME_WIN, OUTCOME_LOSS):
+                if outcome == OUTCOME_WIN:
+                    team, opponent = game.winner, game.loser
+                    score, opponent_score = game.winner_score, game.loser_score
+                else:
+                    team, opponent = game.loser, game.winner
+                    score, opponent_score = game.loser_score, game.winner_score
+
+                record = records[team.id]
+                wins_before, losses_before = record[OUTCOME_WIN], record[OUTCOME_LOSS]
+                record[outcome] += 1
+
+                streak = 1
+                last_outcome, last_streak = streaks.get(team.id, (None, 0))
+                if outcome == last_outcome:
+                    streak = last_streak + 1
+                streaks[team.id] = (outcome, streak)
+
+                if game.week < week_min:
+                    continue
+
+                weekly_rank = game.winner_weekly_rank
+                if outcome == OUTCOME_LOSS:
+                    weekly_rank = game.loser_weekly_rank
+
+                current_streak_sort_key = streak
+                if outcome == OUTCOME_LOSS:
+                    current_streak_sort_key = -1 * streak
+
+                rows.append(cls(
+                    game_id=game.pk,
+                    team_id=team.id,
+                    opponent_id=opponent.id,
+                    year=game.year,
+                    week=game.week,
+                    outcome=outcome,
+                    score=score,
+                    opponent_score=opponent_score,
+                    margin=game.margin,
+                    is_playoffs=game.is_playoffs,
+                    playoff_title_base=game.playoff_title_base or '',
+                    blangums=bool(game.blangums),
+                    slapped_heartbeat=bool(game.slapped_heartbeat),
+                    weekly_rank=weekly_rank,
+                    streak=streak,
+                    current_streak="{}{}".format(outcome, streak),
+                    current_streak_sort_key=current_streak_sort_key,
+                    wins_before=wins_before,
+                    losses_before=losses_before,
+                    place_before=_place(team.id, game.week - 1),
+                    wins_after=record[OUTCOME_WIN],
+                    losses_after=record[OUTCOME_LOSS],
+                    place_after=_place(team.id, game.week),
+                ))
+
+        return write_changed_rows(
+            cls.objects.filter(year=year, week__gte=week_min),
+            rows,
+            ('game_id', 'team_id'),
+        )
+
+    @property
+    def extra_description(self):
+        if self.playoff_title_base:
+            return self.playoff_title_base
+        elif self.outcome == OUTCOME_WIN and self.blangums:
+            return 'Team Blangums'
+        elif self.outcome == OUTCOME_LOSS and self.slapped_heartbeat:
+            return 'Slapped Heartbeat'
+
+        return ''
+
+    def __str__(self):
+        return "{}: {} vs. {}".format(self.game, self.team, self.opponent)
+
+    def __repr__(self):
+        return str(self)
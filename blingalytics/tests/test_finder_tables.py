@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+from blingaleague.models import Game, TeamSeason, OUTCOME_WIN, OUTCOME_LOSS
+from blingaleague.tests.base import BlingaleagueTestCase
+
+from ..models import FinderRefreshRequest, TeamSeasonStats, TeamGameFacts
+from ..utils import refresh_finder_tables, run_finder_refresh_worker
+
+
+class FinderRefreshRequestTestCase(BlingaleagueTestCase):
+
+    def test_request_keeps_earliest_week(self):
+        first = FinderRefreshRequest.request('TeamSeasonStats', 2015, 10)
+        FinderRefreshRequest.request('TeamSeasonStats', 2015, 12)
+        FinderRefreshRequest.request('TeamSeasonStats', 2015, 8)
+
+        request = FinderRefreshRequest.objects.get()
+        self.assertEqual(request.week_min, 8)
+        self.assertGreater(request.requested_at, first.requested_at)
+
+    def test_request_during_refresh_stays_queued(self):
+        running = FinderRefreshRequest.request('TeamGameFacts', 2015, 10)
+        FinderRefreshRequest.request('TeamGameFacts', 2015, 10)
+
+        # what the worker does once its refresh is done
+        FinderRefreshRequest.objects.filter(
+            pk=running.pk,
+            requested_at=running.requested_at,
+        ).delete()
+
+        self.assertTrue(FinderRefreshRequest.objects.filter(pk=running.pk).exists())
+
+
+class FinderTablesTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2015])
+        refresh_finder_tables([2015])
+
+    def stored_rows(self, finder_table):
+        return sorted(
+            tuple(row[1:]) for row in finder_table.objects.order_by('pk').values_list()
+        )
+
+    def test_rows_match_team_seasons(self):
+        week_maxes = TeamSeasonStats.week_maxes(2015)
+        self.assertEqual(
+            sorted(set(TeamSeasonStats.objects.values_list('week_max', flat=True))),
+            week_maxes,
+        )
+
+        for row in TeamSeasonStats.objects.filter(week_max__in=(1, 8, week_maxes[-1])):
+            team_season = TeamSeason(row.team_id, 2015, week_max=row.week_max)
+
+            self.assertEqual(row.game_count, len(team_season.games))
+            self.assertAlmostEqual(row.average_score, team_season.average_score, places=4)
+            self.assertEqual(row.points, team_season.points)
+
+            for attr in ('win_count', 'loss_count', 'place_numeric'):
+                self.assertEqual(getattr(row, attr), getattr(team_season, attr), attr)
+
+            for attr in ('made_playoffs', 'missed_playoffs', 'clinched_playoffs', 'clinched_bye',
+                         'eliminated_playoffs_early', 'bye', 'champion'):
+                self.assertEqual(getattr(row, attr), bool(getattr(team_season, attr)), attr)
+
+    def test_game_facts_match_games(self):
+        games = Game.objects.filter(year=2015)
+        self.assertEqual(TeamGameFacts.objects.count(), 2 * games.count())
+
+        for game in games:
+            for side, other_side, outcome in (
+                ('winner', 'loser', OUTCOME_WIN),
+                ('loser', 'winner', OUTCOME_LOSS),
+            ):
+                facts = TeamGameFacts.objects.get(game=game, team=getattr(game, side))
+                before = getattr(game, "{}_team_season_before_game".format(side))
+                after = getattr(game, "{}_team_season_after_game".format(side))
+
+                self.assertEqual(
+                    (
+                        facts.outcome, facts.opponent_id, facts.week,
+                        facts.score, facts.opponent_score, facts.margin,
+                        facts.is_playoffs, facts.playoff_title_base,
+                        facts.blangums, facts.slapped_heartbeat,
+                        facts.weekly_rank, facts.streak,
+                        facts.current_streak, facts.current_streak_sort_key,
+                        facts.wins_before, facts.losses_before, facts.place_before,
+                        facts.wins_after, facts.losses_after, facts.place_after,
+                    ),
+                    (
+                        outcome, getattr(game, other_side).id, game.week,
+                        getattr(game, "{}_score".format(side)),
+                        getattr(game, "{}_score".format(other_side)),
+                        game.margin,
+                        game.is_playoffs, game.playoff_title_base or '',
+                        bool(game.blangums), bool(game.slapped_heartbeat),
+                        getattr(game, "{}_weekly_rank".format(side)),
+                        getattr(game, "{}_streak".format(side)),
+                        after.current_streak, after.current_streak_sort_key,
+                        before.win_count, before.loss_count, before.place_numeric or None,
+                        after.win_count, after.loss_count, after.place_numeric or None,
+                    ),
+                    (game, side),
+                )
+
+    def test_save_queues_refresh(self):
+        stats = self.stored_rows(TeamSeasonStats)
+
+        game = Game.objects.filter(year=2015, week=12).first()
+        game.winner_score = game.winner_score + Decimal('1')
+        game.save()
+
+        # nothing is refreshed during the save itself, and only the game's own season waits
+        self.assertEqual(self.stored_rows(TeamSeasonStats), stats)
+        self.assertEqual(
+            sorted(FinderRefreshRequest.objects.values_list('table', 'year', 'week_min')),
+            [('TeamGameFacts', 2015, 12), ('TeamSeasonStats', 2015, 12)],
+        )
+
+    def test_worker_matches_full_refresh(self):
+        game = Game.objects.filter(year=2015, week=12).first()
+        game.loser_score = game.loser_score - Decimal('30')
+        game.save()
+
+        self.assertEqual(run_finder_refresh_worker(0, once=True), 2)
+        self.assertFalse(FinderRefreshRequest.objects.exists())
+
+        refreshed = [self.stored_rows(TeamSeasonStats), self.stored_rows(TeamGameFacts)]
+
+        TeamSeasonStats.objects.all().delete()
+        TeamGameFacts.objects.all().delete()
+        refresh_finder_tables([2015])
+
+        self.assertEqual(
+            refreshed,
+            [self.stored_rows(TeamSeasonStats), self.stored_rows(TeamGameFacts)],
+        )
+
+    def test_unchanged_rows_not_written(self):
+        self.assertEqual(refresh_finder_tables([2015]), {'TeamSeasonStats': 0, 'TeamGameFacts': 0})
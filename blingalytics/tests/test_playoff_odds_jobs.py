@@ -0,0 +1,171 @@
+import datetime
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blingaleague.models import Game, Member, Season, delete_stored_playoff_odds
+from blingaleague.tests.base import BlingaleagueTestCase
+
+from ..models import PlayoffOddsJob, PlayoffOddsResult
+from ..utils import claim_next_playoff_odds_job, queue_playoff_odds, _store_playoff_odds_results
+
+
+def create_job(year, week_max):
+    return PlayoffOddsJob.objects.create(
+        season_key="{}|{}".format(year, week_max),
+        year=year,
+        week_max=week_max,
+    )
+
+
+class ClaimPlayoffOddsJobTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.team = Member.objects.order_by('pk').first()
+        self.odds = {
+            self.team: {'playoffs': 0.5, 'bye': 0.25, 'champion': 0.125, 'simulations': 1000},
+        }
+
+    def test_each_job_goes_to_one_worker(self):
+        first_job = create_job(2015, 10)
+        second_job = create_job(2015, 11)
+
+        claimed = claim_next_playoff_odds_job('worker-1')
+        self.assertEqual(claimed.pk, first_job.pk)
+        self.assertEqual(claimed.status, PlayoffOddsJob.STATUS_RUNNING)
+        self.assertEqual(claimed.worker, 'worker-1')
+
+        claimed = claim_next_playoff_odds_job('worker-2')
+        self.assertEqual(claimed.pk, second_job.pk)
+        self.assertEqual(claimed.worker, 'worker-2')
+
+        self.assertIsNone(claim_next_playoff_odds_job('worker-3'))
+
+    def test_timed_out_job_is_claimed_again(self):
+        job = create_job(2015, 10)
+        claim_next_playoff_odds_job('worker-1')
+
+        self.assertIsNone(claim_next_playoff_odds_job('worker-2'))
+
+        timeout = datetime.timedelta(seconds=settings.PLAYOFF_ODDS_JOB_TIMEOUT + 1)
+        PlayoffOddsJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timeout)
+
+        claimed = claim_next_playoff_odds_job('worker-2')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.worker, 'worker-2')
+
+    def test_results_stored_by_the_claiming_worker(self):
+        create_job(2015, 10)
+        job = claim_next_playoff_odds_job('worker-1')
+
+        self.assertTrue(_store_playoff_odds_results(job, self.odds))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PlayoffOddsJob.STATUS_DONE)
+        self.assertEqual(job.simulations, 1000)
+
+        result = job.results.get()
+        self.assertEqual(result.team, self.team)
+        self.assertEqual(result.playoffs, 0.5)
+
+    def test_results_refused_after_job_changes_hands(self):
+        create_job(2015, 10)
+        job = claim_next_playoff_odds_job('worker-1')
+
+        timeout = datetime.timedelta(seconds=settings.PLAYOFF_ODDS_JOB_TIMEOUT + 1)
+        PlayoffOddsJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timeout)
+        new_job = claim_next_playoff_odds_job('worker-2')
+
+        self.assertFalse(_store_playoff_odds_results(job, self.odds))
+        self.assertFalse(PlayoffOddsResult.objects.exists())
+
+        self.assertTrue(_store_playoff_odds_results(new_job, self.odds))
+
+    def test_results_refused_after_job_is_deleted(self):
+        create_job(2015, 10)
+        job = claim_next_playoff_odds_job('worker-1')
+
+        PlayoffOddsJob.objects.filter(pk=job.pk).delete()
+
+        self.assertFalse(_store_playoff_odds_results(job, self.odds))
+        self.assertFalse(PlayoffOddsResult.objects.exists())
+
+
+class DeleteStoredPlayoffOddsTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        for week_max in list(range(7, 14)) + [None]:
+            create_job(2015, week_max)
+            create_job(2014, week_max)
+
+    def stored_weeks(self, year):
+        return set(PlayoffOddsJob.objects.filter(year=year).values_list('week_max', flat=True))
+
+    def test_only_later_weeks_deleted(self):
+        delete_stored_playoff_odds([(2015, 11), (2015, 10)])
+
+        self.assertEqual(self.stored_weeks(2015), {7, 8, 9})
+        self.assertEqual(self.stored_weeks(2014), set(range(7, 14)) | {None})
+
+    def test_changed_score_keeps_earlier_weeks(self):
+        self.load_games([2014, 2015])
+
+        game = Game.objects.filter(year=2015, week=10).first()
+        game.winner_score = game.winner_score + Decimal('1')
+        game.save()
+
+        self.assertEqual(self.stored_weeks(2015), {7, 8, 9})
+        self.assertEqual(self.stored_weeks(2014), set(range(7, 14)) | {None})
+
+    def test_changed_matchup_deletes_whole_season(self):
+        self.load_games([2014, 2015])
+
+        game, other_game = Game.objects.filter(year=2015, week=10).order_by('pk')[:2]
+        game.loser_id, other_game.loser_id = other_game.loser_id, game.loser_id
+        Game.objects.filter(pk=other_game.pk).update(loser_id=other_game.loser_id)
+        game.save()
+
+        self.assertEqual(self.stored_weeks(2015), set())
+        self.assertEqual(self.stored_weeks(2014), set(range(7, 14)) | {None})
+
+
+class PlayoffOddsWhatIfTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2015])
+
+        # odds stored without the simulations behind them
+        queue_playoff_odds(Season(2015, week_max=10, include_playoffs=True))
+        job = claim_next_playoff_odds_job('worker-1')
+        _store_playoff_odds_results(job, {
+            team_season.team: {'playoffs': 0.5, 'bye': 0.25, 'champion': 0.125}
+            for team_season in Season(2015, week_max=10).standings_table
+        })
+
+    def get(self, **params):
+        # the views' forms look up the league's seasons when they're defined,
+        # so they can only be imported once there are seasons to look up
+        from ..views import PlayoffOddsView
+
+        request = RequestFactory().get('/', dict(params, year=2015, week_max=10))
+        return PlayoffOddsView.as_view()(request).context_data
+
+    def test_odds_without_whatifs(self):
+        context = self.get()
+
+        self.assertTrue(context['results_ready'])
+        self.assertEqual(len(context['playoff_odds_table']), 14)
+
+    def test_whatifs_without_samples(self):
+        context = self.get(whatif='11-1-2')
+
+        self.assertFalse(context['results_ready'])
+        self.assertEqual(context['playoff_odds_table'], [])
+        self.assertIn('unavailable', context['no_results_message'])
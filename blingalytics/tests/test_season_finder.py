@@ -0,0 +1,41 @@
+from blingaleague.models import Game
+from blingaleague.tests.base import BlingaleagueTestCase
+
+
+class SeasonFinderTestCase(BlingaleagueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.load_games([2011, 2012])
+
+    def find(self, **data):
+        # the finder forms look up the league's seasons when they're defined,
+        # so they can only be imported once there are seasons to look up, and
+        # their year limits are whichever seasons the first import saw
+        from ..forms import SeasonFinderForm
+        from ..views import SeasonFinderView
+
+        form_data = {name: None for name in SeasonFinderForm.base_fields}
+        form_data.update(teams=[], **data)
+
+        return list(SeasonFinderView().filter_seasons(form_data))
+
+    def teams_with_games(self, year):
+        games = Game.objects.filter(year=year)
+        return set(games.values_list('winner_id', flat=True)) | \
+            set(games.values_list('loser_id', flat=True))
+
+    def test_average_score_filter_skips_teams_without_games(self):
+        # the expansion teams have no 2011 games, so no average score for 2011-2012
+        both_years = self.teams_with_games(2011) & self.teams_with_games(2012)
+        self.assertLess(len(both_years), len(self.teams_with_games(2012)))
+
+        team_seasons = self.find(year_min=2011, year_max=2012, year_span=2, avg_score_min=0)
+        self.assertEqual({team_season.team.id for team_season in team_seasons}, both_years)
+
+    def test_average_score_filter(self):
+        team_seasons = self.find(year_min=2011, year_max=2012, year_span=2, avg_score_min=100)
+
+        self.assertTrue(team_seasons)
+        for team_season in team_seasons:
+            self.assertGreaterEqual(team_season.average_score, 100)
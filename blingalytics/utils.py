@@ -1,17 +1,25 @@
+import datetime
 import logging
-import threading
+import multiprocessing
+import os
+import socket
 import time
+import traceback
 
-from django.core.cache import caches
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
 
 from blingaleague.models import TeamSeason, Week, Season
-from blingaleague.utils import regular_season_weeks
+from blingaleague.utils import regular_season_weeks, prefetch_cached_properties, \
+    sync_cache_state, CACHE
 
+from .models import PlayoffOddsJob, PlayoffOddsResult, PlayoffOddsSamples, \
+    FinderRefreshRequest, TeamSeasonStats, TeamGameFacts
 
-CACHE = caches['blingaleague']
 
-PLAYOFF_ODDS_QUEUE_CACHE_KEY = 'blingaleague_playoff_odds_queue'
-PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY = 'blingaleague_playoff_odds_actively_running'
+# odds this early are mostly noise, so neither the page nor the precompute command runs them
+MIN_WEEK_TO_RUN_PLAYOFF_ODDS = 7
 
 TOP_SEASONS_DEFAULT_NUM_FORMAT = '{:.2f}'
 
@@ -26,11 +34,19 @@ def sorted_seasons_by_attr(
     num_format=TOP_SEASONS_DEFAULT_NUM_FORMAT,
     week_max=None,
 ):
-    all_attrs = []
+    team_seasons = []
     for team_season in TeamSeason.all():
-        if week_max and (week_max < regular_season_weeks(team_season.year)):
-            # ignore any specified week_max parameters that are longer than the season
+        # ignore any specified week_max parameters that are longer than the season
+        truncated = week_max and (week_max < regular_season_weeks(team_season.year))
+        if truncated:
             team_season = TeamSeason(team_season.team.id, team_season.year, week_max=week_max)
+        team_seasons.append((team_season, truncated))
+
+    prefetch_cached_properties([ts for ts, _ in team_seasons], ['games', 'is_partial'])
+
+    eligible_seasons = []
+    for team_season, truncated in team_seasons:
+        if truncated:
             if len(team_season.games) < week_max:
                 continue
         else:
@@ -38,9 +54,16 @@ def sorted_seasons_by_attr(
                 if require_full_season or len(team_season.games) < min_games:
                     continue
 
+        eligible_seasons.append(team_season)
+
+    # one memcached round trip for the stat across every season, instead of one per season
+    prefetch_cached_properties(eligible_seasons, [attr])
+
+    all_attrs = []
+    for team_season in eligible_seasons:
         attr_value = getattr(team_season, attr)
         if attr_value is not None:
-            all_attrs.append((team_season, getattr(team_season, attr)))
+            all_attrs.append((team_season, attr_value))
 
     return build_ranked_seasons_table(
         all_attrs,
@@ -137,46 +160,286 @@ def build_belt_holder_list():
     return sequence
 
 
-def run_playoff_odds_in_background(season):
+def queue_playoff_odds(season):
+    # safe to call on every request: a job that is already queued, running or done is left
+    # alone, and a failed one is retried once the job timeout has passed; the unique
+    # season_key settles concurrent requests for the same odds
     logger = logging.getLogger('blingaleague')
-    logger.info("[{}] Requested playoff odds".format(season.playoff_odds_cache_key))
 
-    current_queue = CACHE.get(PLAYOFF_ODDS_QUEUE_CACHE_KEY, [])
-    if season.playoff_odds_cache_key not in current_queue:
-        # if it is queued up, just wait for it and do nothing
-        current_queue.append(season.playoff_odds_cache_key)
-        CACHE.set(PLAYOFF_ODDS_QUEUE_CACHE_KEY, current_queue)
-        logger.info("[{}] Added to playoff odds queue".format(season.playoff_odds_cache_key))
+    retry_before = timezone.now() - datetime.timedelta(seconds=settings.PLAYOFF_ODDS_JOB_TIMEOUT)
 
-    if not CACHE.get(PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY):
-        thread = threading.Thread(target=_run_next_queued_playoff_odds, daemon=True)
-        thread.start()
+    job, created = PlayoffOddsJob.objects.get_or_create(
+        season_key=season.playoff_odds_cache_key,
+        defaults={
+            'year': season.year,
+            'week_max': season._given_week_max,
+        },
+    )
 
+    if created:
+        logger.info("[{}] Added to playoff odds queue".format(job.season_key))
+
+    elif job.status == PlayoffOddsJob.STATUS_FAILED and job.finished_at < retry_before:
+        PlayoffOddsJob.objects.filter(
+            pk=job.pk,
+            status=PlayoffOddsJob.STATUS_FAILED,
+        ).update(
+            status=PlayoffOddsJob.STATUS_QUEUED,
+            requested_at=timezone.now(),
+            started_at=None,
+            finished_at=None,
+            worker='',
+            error='',
+        )
+        job.refresh_from_db()
+
+        logger.info("[{}] Re-queued failed playoff odds".format(job.season_key))
+
+    return job
+
+
+def claim_next_playoff_odds_job(worker_name):
+    # a job still running past the timeout belongs to a worker that died, so put it back
+    timeout = datetime.timedelta(seconds=settings.PLAYOFF_ODDS_JOB_TIMEOUT)
+    PlayoffOddsJob.objects.filter(
+        status=PlayoffOddsJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - timeout,
+    ).update(
+        status=PlayoffOddsJob.STATUS_QUEUED,
+        started_at=None,
+        worker='',
+    )
 
-def _run_next_queued_playoff_odds():
+    for job in PlayoffOddsJob.objects.filter(status=PlayoffOddsJob.STATUS_QUEUED)[:10]:
+        # the status check makes this a compare-and-swap; if another worker
+        # got to the job first, nothing is updated and we try the next one
+        claimed = PlayoffOddsJob.objects.filter(
+            pk=job.pk,
+            status=PlayoffOddsJob.STATUS_QUEUED,
+        ).update(
+            status=PlayoffOddsJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            worker=worker_name,
+        )
+
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+    return None
+
+
+def _store_playoff_odds_results(job, odds, samples=None):
+    with transaction.atomic():
+        # a save to the job's season deletes it (see delete_stored_playoff_odds), and the
+        # timeout can hand it to another worker, so only store results if it's still ours
+        locked_job = PlayoffOddsJob.objects.select_for_update().filter(
+            pk=job.pk,
+            status=PlayoffOddsJob.STATUS_RUNNING,
+            worker=job.worker,
+        ).first()
+
+        if locked_job is None:
+            return False
+
+        results = []
+        simulations = None
+        for team, team_odds in odds.items():
+            intervals = team_odds.get('intervals', {})
+            simulations = team_odds.get('simulations', simulations)
+
+            result = PlayoffOddsResult(
+                job=locked_job,
+                team=team,
+                playoffs=float(team_odds['playoffs']),
+                bye=float(team_odds['bye']),
+                champion=float(team_odds['champion']),
+            )
+
+            for finish in ('playoffs', 'bye', 'champion'):
+                if finish in intervals:
+                    setattr(result, "{}_low".format(finish), intervals[finish][0])
+                    setattr(result, "{}_high".format(finish), intervals[finish][1])
+
+            results.append(result)
+
+        locked_job.results.all().delete()
+        PlayoffOddsResult.objects.bulk_create(results)
+
+        PlayoffOddsSamples.objects.filter(job=locked_job).delete()
+        if samples is not None:
+            PlayoffOddsSamples.objects.create(job=locked_job, data=samples.to_bytes())
+
+        locked_job.status = PlayoffOddsJob.STATUS_DONE
+        locked_job.finished_at = timezone.now()
+        locked_job.simulations = simulations
+        locked_job.save()
+
+    return True
+
+
+def run_playoff_odds_job(job, simulation_workers=None):
     logger = logging.getLogger('blingaleague')
+    logger.info("[{}] Running playoff odds".format(job.season_key))
+
+    season = Season.playoff_odds_cache_key_to_season_object(job.season_key)
+
+    t0 = time.time()
+    try:
+        odds, samples = season.playoff_odds_with_samples(
+            workers=simulation_workers,
+            keep_samples=True,
+        )
+    except Exception:
+        logger.exception("[{}] Playoff odds failed".format(job.season_key))
+
+        PlayoffOddsJob.objects.filter(pk=job.pk, worker=job.worker).update(
+            status=PlayoffOddsJob.STATUS_FAILED,
+            finished_at=timezone.now(),
+            error=traceback.format_exc(),
+        )
+        return False
+
+    if not _store_playoff_odds_results(job, odds, samples):
+        logger.info("[{}] Playoff odds discarded; the job changed while running".format(
+            job.season_key,
+        ))
+        return False
+
+    logger.info("[{}] Playoff odds finished after {:.1f} seconds".format(
+        job.season_key,
+        time.time() - t0,
+    ))
+    return True
+
+
+def run_playoff_odds_worker(poll_interval, once=False, simulation_workers=None):
+    # runs queued jobs one at a time, in the order they were requested; with once,
+    # returns when the queue is empty rather than waiting for more work
+    worker_name = "{}:{}".format(socket.gethostname(), os.getpid())
+
+    jobs_run = 0
+    while True:
+        job = claim_next_playoff_odds_job(worker_name)
+
+        if job is None:
+            if once:
+                return jobs_run
+
+            time.sleep(poll_interval)
+            continue
+
+        run_playoff_odds_job(job, simulation_workers=simulation_workers)
+        jobs_run += 1
+
+
+def playoff_odds_seasons(year=None):
+    # every week the playoff odds by week graph reads: MIN_WEEK_TO_RUN_PLAYOFF_ODDS through
+    # the last regular-season week with games. the page's other views, the season as it
+    # stands and any playoff week, duplicate one of these or are queued when first asked for
+    for season in Season.all(include_playoffs=True):
+        if year is not None and season.year != year:
+            continue
 
-    current_queue = CACHE.get(PLAYOFF_ODDS_QUEUE_CACHE_KEY, [])
-    if not current_queue:
-        return
+        last_week = min(season.weeks_with_games, regular_season_weeks(season.year))
 
-    season_key = current_queue[0]
+        for week_max in range(MIN_WEEK_TO_RUN_PLAYOFF_ODDS, last_week + 1):
+            yield Season(season.year, week_max=week_max, include_playoffs=True)
 
-    logger.info("[{}] Running playoff odds".format(season_key))
-    CACHE.set(PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY, season_key)
-    CACHE.set(PLAYOFF_ODDS_QUEUE_CACHE_KEY, current_queue[1:])
 
-    season = Season.playoff_odds_cache_key_to_season_object(season_key)
+def _run_playoff_odds_worker_until_empty(_worker_number):
+    # pool workers can't start pools of their own, so each job's simulations stay in-process
+    return run_playoff_odds_worker(0, once=True, simulation_workers=1)
+
+
+def precompute_playoff_odds(workers=1, year=None):
+    # queues every point in time that doesn't already have a job (stored results are
+    # skipped), then drains the queue; with more than one worker, each process claims
+    # jobs the same way run_playoff_odds_worker does, so they never run the same one
+    logger = logging.getLogger('blingaleague')
 
     t0 = time.time()
-    _odds = season.playoff_odds()  # noqa: F841
-    logger.info("[{}] Playoff odds finished after {:.1f} seconds".format(
-        season_key,
+
+    season_count = 0
+    for season in playoff_odds_seasons(year=year):
+        queue_playoff_odds(season)
+        season_count += 1
+
+    queued_count = PlayoffOddsJob.objects.filter(status=PlayoffOddsJob.STATUS_QUEUED).count()
+    logger.info("Precomputing playoff odds: {} queued of {} weeks".format(
+        queued_count,
+        season_count,
+    ))
+
+    if workers > 1:
+        # forked workers must open their own database and memcached
+        # connections, rather than sharing the parent's sockets
+        connections.close_all()
+        CACHE.close()
+
+        pool = multiprocessing.Pool(processes=workers)
+        try:
+            jobs_run = sum(pool.map(_run_playoff_odds_worker_until_empty, range(workers)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        jobs_run = run_playoff_odds_worker(0, once=True)
+
+    logger.info("Precomputed playoff odds for {} weeks with {} worker(s) in {:.1f}s".format(
+        jobs_run,
+        workers,
         time.time() - t0,
     ))
 
-    CACHE.delete(PLAYOFF_ODDS_ACTIVELY_RUNNING_CACHE_KEY)
+    return jobs_run
+
+
+def refresh_finder_tables(years):
+    # rebuilds every row for the given seasons, whether or not anything was queued
+    row_counts = {}
+    for finder_table in (TeamSeasonStats, TeamGameFacts):
+        row_counts[finder_table.__name__] = sum(finder_table.refresh(year) for year in years)
+
+    return row_counts
+
+
+def run_finder_refresh_worker(poll_interval, once=False):
+    # refreshes the finder tables for each season that saves have queued, in the order they
+    # were queued; with once, returns when the queue is empty rather than waiting for more.
+    # Run one of these at a time
+    logger = logging.getLogger('blingaleague')
+
+    finder_tables = dict(
+        (finder_table.__name__, finder_table) for finder_table in (TeamSeasonStats, TeamGameFacts)
+    )
+
+    requests_run = 0
+    while True:
+        request = FinderRefreshRequest.objects.first()
+
+        if request is None:
+            if once:
+                return requests_run
+
+            time.sleep(poll_interval)
+            continue
+
+        # the save behind the request invalidated some of what this process remembers
+        sync_cache_state()
+
+        t0 = time.time()
+        row_count = finder_tables[request.table].refresh(request.year, week_min=request.week_min)
+
+        # a save while this was running moved requested_at on, and stays queued
+        FinderRefreshRequest.objects.filter(
+            pk=request.pk,
+            requested_at=request.requested_at,
+        ).delete()
 
-    new_queue = CACHE.get(PLAYOFF_ODDS_QUEUE_CACHE_KEY, [])
-    if new_queue:
-        _run_next_queued_playoff_odds()
+        logger.info("[{}] Wrote {} changed rows in {:.1f} seconds".format(
+            request,
+            row_count,
+            time.time() - t0,
+        ))
+        requests_run += 1
@@ -2,8 +2,7 @@ import logging
 
 from collections import defaultdict, Counter
 
-from django.core.cache import caches
-from django.db.models import F, ExpressionWrapper, DecimalField
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView, RedirectView
 
@@ -13,7 +12,9 @@ from blingaleague.models import Game, Week, Member, TeamSeason, TeamMultiSeasons
                                 Season, Matchup, Trade, Keeper, DraftPick, Player, \
                                 OUTCOME_WIN, OUTCOME_LOSS, \
                                 position_sort_key, calculate_expected_wins
-from blingaleague.utils import scatter_graph_html, regular_season_weeks
+from blingaleague.utils import scatter_graph_html, line_graph_html, regular_season_weeks, \
+                               cache_get, cache_set, CACHE_MISS, prefetch_cached_properties, \
+                               ALL_TIME_CACHE_TAG
 
 from .forms import CHOICE_YES, CHOICE_NO, \
                    CHOICE_BLANGUMS, CHOICE_SLAPPED_HEARTBEAT, \
@@ -26,19 +27,14 @@ from .forms import CHOICE_YES, CHOICE_NO, \
                    GameFinderForm, SeasonFinderForm, \
                    TradeFinderForm, KeeperFinderForm, DraftPickFinderForm, \
                    ExpectedWinsCalculatorForm, PlayerSearchForm
-from .models import ShortUrl
+from .models import ShortUrl, PlayoffOddsJob, PlayoffOddsResult, TeamSeasonStats, \
+                    TeamGameFacts
 from .utils import sorted_seasons_by_attr, \
                    build_belt_holder_list, \
-                   run_playoff_odds_in_background, \
+                   queue_playoff_odds, MIN_WEEK_TO_RUN_PLAYOFF_ODDS, \
                    TOP_SEASONS_DEFAULT_NUM_FORMAT
 
 
-CACHE = caches['blingaleague']
-
-PREFIX_WINNER = 'winner'
-
-PREFIX_LOSER = 'loser'
-
 # number of games to qualify for top seasons
 # leaderboard for non-counting stats
 TOP_SEASONS_GAME_THRESHOLD = 6
@@ -247,6 +243,26 @@ TOP_SEASONS_STATS = [
     },
 ]
 
+# SeasonFinderView filters and the fully_cached_properties they read,
+# prefetched in bulk only when the filter is in use
+SEASON_FINDER_FILTER_ATTRS = (
+    (('wins_min', 'wins_max'), 'win_count'),
+    (('expected_wins_min', 'expected_wins_max'), 'expected_wins'),
+    (('points_min', 'points_max'), 'points'),
+    (('avg_score_min', 'avg_score_max'), 'average_score'),
+    (('week_max', 'bye'), 'bye'),
+    (('champion',), 'champion'),
+)
+
+# properties shown in every row of the season finder results
+SEASON_FINDER_DISPLAY_ATTRS = (
+    'win_count', 'loss_count', 'win_pct', 'points', 'points_against', 'average_score',
+    'expected_wins', 'expected_win_pct', 'all_play_win_pct', 'place_numeric',
+    'playoff_finish', 'standings_note', 'blangums_count', 'slapped_heartbeat_count',
+    'current_streak', 'current_streak_sort_key', 'strength_of_schedule_str',
+    'championships', 'playoff_appearances',
+)
+
 
 class WeeklyScoresView(TemplateView):
     template_name = 'blingalytics/weekly_scores.html'
@@ -355,123 +371,75 @@ class GameFinderView(LongUrlView):
     template_name = 'blingalytics/game_finder.html'
 
     def filter_games(self, form_data):
-        base_games = Game.objects.all()
+        # every filter runs in one query against TeamGameFacts, one row per team per game
+        game_facts = TeamGameFacts.objects.all()
 
         if form_data['year_min'] is not None:
-            base_games = base_games.filter(year__gte=form_data['year_min'])
+            game_facts = game_facts.filter(year__gte=form_data['year_min'])
         if form_data['year_max'] is not None:
-            base_games = base_games.filter(year__lte=form_data['year_max'])
+            game_facts = game_facts.filter(year__lte=form_data['year_max'])
 
         if form_data['week_min'] is not None:
-            base_games = base_games.filter(week__gte=form_data['week_min'])
+            game_facts = game_facts.filter(week__gte=form_data['week_min'])
         if form_data['week_max'] is not None:
-            base_games = base_games.filter(week__lte=form_data['week_max'])
-
-        margin_min = form_data['margin_min']
-        margin_max = form_data['margin_max']
-        if margin_min is not None or margin_max is not None:
-            base_games = base_games.annotate(
-                margin=ExpressionWrapper(
-                    F('winner_score') - F('loser_score'),
-                    output_field=DecimalField(max_digits=6, decimal_places=2),
-                ),
-            )
-            if margin_min is not None:
-                base_games = base_games.filter(margin__gte=margin_min)
-            if margin_max is not None:
-                base_games = base_games.filter(margin__lte=margin_max)
-
-        wins_only = form_data['outcome'] == CHOICE_WINS
-        losses_only = form_data['outcome'] == CHOICE_LOSSES
-
-        teams = form_data['teams']
-        opponents = form_data['opponents']
-        score_min = form_data['score_min']
-        score_max = form_data['score_max']
-        week_type = form_data['week_type']
-        awards = form_data['awards']
-        streak_min = form_data['streak_min']
-        playoff_game_types = form_data['playoff_game_types']
-
-        team_prefixes = (PREFIX_WINNER, PREFIX_LOSER)
-        if wins_only:
-            team_prefixes = (PREFIX_WINNER,)
-        elif losses_only:
-            team_prefixes = (PREFIX_LOSER,)
+            game_facts = game_facts.filter(week__lte=form_data['week_max'])
 
-        all_games = []
-        for team_prefix in team_prefixes:
-            type_kwargs = {}
+        if form_data['margin_min'] is not None:
+            game_facts = game_facts.filter(margin__gte=form_data['margin_min'])
+        if form_data['margin_max'] is not None:
+            game_facts = game_facts.filter(margin__lte=form_data['margin_max'])
 
-            if len(teams) > 0:
-                type_kwargs["{}__id__in".format(team_prefix)] = teams
+        if form_data['outcome'] == CHOICE_WINS:
+            game_facts = game_facts.filter(outcome=OUTCOME_WIN)
+        elif form_data['outcome'] == CHOICE_LOSSES:
+            game_facts = game_facts.filter(outcome=OUTCOME_LOSS)
 
-            opponent_prefix = PREFIX_LOSER if team_prefix == PREFIX_WINNER else PREFIX_WINNER
-            if len(opponents) > 0:
-                type_kwargs["{}__id__in".format(opponent_prefix)] = opponents
+        if len(form_data['teams']) > 0:
+            game_facts = game_facts.filter(team_id__in=form_data['teams'])
+        if len(form_data['opponents']) > 0:
+            game_facts = game_facts.filter(opponent_id__in=form_data['opponents'])
 
-            if score_min is not None:
-                type_kwargs["{}_score__gte".format(team_prefix)] = score_min
-            if score_max is not None:
-                type_kwargs["{}_score__lte".format(team_prefix)] = score_max
+        if form_data['score_min'] is not None:
+            game_facts = game_facts.filter(score__gte=form_data['score_min'])
+        if form_data['score_max'] is not None:
+            game_facts = game_facts.filter(score__lte=form_data['score_max'])
 
-            for game in base_games.filter(**type_kwargs):
-                if week_type == CHOICE_REGULAR_SEASON and game.is_playoffs:
-                    continue
-                if week_type == CHOICE_PLAYOFFS and not game.is_playoffs:
-                    continue
+        if form_data['week_type'] == CHOICE_REGULAR_SEASON:
+            game_facts = game_facts.filter(is_playoffs=False)
+        elif form_data['week_type'] == CHOICE_PLAYOFFS:
+            game_facts = game_facts.filter(is_playoffs=True)
 
-                if CHOICE_BLANGUMS in awards and not game.blangums:
-                    continue
-
-                if CHOICE_SLAPPED_HEARTBEAT in awards and not game.slapped_heartbeat:
-                    continue
-
-                if playoff_game_types and game.playoff_title_base not in playoff_game_types:
-                    continue
-
-                if streak_min is not None:
-                    if team_prefix == PREFIX_WINNER and game.winner_streak < streak_min:
-                        continue
-                    if team_prefix == PREFIX_LOSER and game.loser_streak < streak_min:
-                        continue
-
-                outcome = OUTCOME_WIN
-                weekly_rank = game.winner_weekly_rank
-                team_season = game.winner_team_season_after_game
-                team_season_before_game = game.winner_team_season_before_game
-                if team_prefix == PREFIX_LOSER:
-                    outcome = OUTCOME_LOSS
-                    weekly_rank = game.loser_weekly_rank
-                    team_season = game.loser_team_season_after_game
-                    team_season_before_game = game.loser_team_season_before_game
-
-                game_dict = {
-                    'id': game.id,
-                    'year': game.year,
-                    'week': game.week,
-                    'team': getattr(game, team_prefix),
-                    'score': getattr(game, "{}_score".format(team_prefix)),
-                    'opponent': getattr(game, opponent_prefix),
-                    'opponent_score': getattr(game, "{}_score".format(opponent_prefix)),
-                    'margin': game.margin,
-                    'outcome': outcome,
-                    'weekly_rank': weekly_rank,
-                    'team_season': team_season,
-                    'team_season_before_game': team_season_before_game,
-                }
+        awards = form_data['awards']
+        if CHOICE_BLANGUMS in awards:
+            game_facts = game_facts.filter(blangums=True)
+        if CHOICE_SLAPPED_HEARTBEAT in awards:
+            game_facts = game_facts.filter(slapped_heartbeat=True)
 
-                extra_description = ''
-                if game.playoff_title_base:
-                    extra_description = game.playoff_title_base
-                elif team_prefix == PREFIX_WINNER and game.blangums:
-                    extra_description = 'Team Blangums'
-                elif team_prefix == PREFIX_LOSER and game.slapped_heartbeat:
-                    extra_description = 'Slapped Heartbeat'
+        if form_data['playoff_game_types']:
+            game_facts = game_facts.filter(playoff_title_base__in=form_data['playoff_game_types'])
 
-                game_dict['extra_description'] = extra_description
+        if form_data['streak_min'] is not None:
+            game_facts = game_facts.filter(streak__gte=form_data['streak_min'])
 
-                all_games.append(game_dict)
+        all_games = []
+        for game_fact in game_facts.select_related('team', 'opponent'):
+            all_games.append({
+                'id': game_fact.game_id,
+                'year': game_fact.year,
+                'week': game_fact.week,
+                'team': game_fact.team,
+                'score': game_fact.score,
+                'opponent': game_fact.opponent,
+                'opponent_score': game_fact.opponent_score,
+                'margin': game_fact.margin,
+                'outcome': game_fact.outcome,
+                'weekly_rank': game_fact.weekly_rank,
+                'current_streak': game_fact.current_streak,
+                'current_streak_sort_key': game_fact.current_streak_sort_key,
+                'place_before': game_fact.place_before,
+                'place_after': game_fact.place_after,
+                'extra_description': game_fact.extra_description,
+            })
 
         return sorted(
             all_games,
@@ -547,6 +515,114 @@ class GameFinderView(LongUrlView):
 class SeasonFinderView(LongUrlView):
     template_name = 'blingalytics/season_finder.html'
 
+    def _prefetch_attrs(self, form_data, year_span):
+        attrs = []
+
+        for form_fields, attr in SEASON_FINDER_FILTER_ATTRS:
+            if any(form_data[field] for field in form_fields):
+                attrs.append(attr)
+
+        # place is only filtered on for single seasons
+        if year_span is None or year_span == 1:
+            if form_data['place_min'] is not None or form_data['place_max'] is not None:
+                attrs.append('place_numeric')
+
+        playoffs = form_data['playoffs']
+        if playoffs == CHOICE_MADE_PLAYOFFS:
+            attrs.append('made_playoffs')
+        elif playoffs == CHOICE_MISSED_PLAYOFFS:
+            attrs.append('missed_playoffs')
+
+        clinched = form_data['clinched']
+        if clinched == CHOICE_CLINCHED_BYE:
+            attrs.append('clinched_bye')
+        elif clinched == CHOICE_CLINCHED_PLAYOFFS:
+            attrs.append('clinched_playoffs')
+        elif clinched == CHOICE_ELIMINATED_EARLY:
+            attrs.append('eliminated_playoffs_early')
+
+        return attrs
+
+    def filter_single_seasons(self, form_data, year_min, year_max, team_ids):
+        # every filter but expected wins runs in one query against TeamSeasonStats,
+        # and only the matching rows are turned into TeamSeason objects
+        week_max = form_data['week_max']
+
+        stats = TeamSeasonStats.objects.filter(
+            year__gte=year_min,
+            year__lte=year_max,
+            team_id__in=team_ids,
+            game_count__gt=0,
+        )
+
+        if week_max is not None:
+            stats = stats.filter(week_max=week_max, played_through_week_max=True)
+        else:
+            full_seasons = Q(pk__in=[])
+            for year in range(year_min, year_max + 1):
+                full_seasons |= Q(year=year, week_max=regular_season_weeks(year))
+
+            stats = stats.filter(full_seasons)
+
+        for field, lookup, form_field in (
+            ('win_count', 'gte', 'wins_min'),
+            ('win_count', 'lte', 'wins_max'),
+            ('points', 'gte', 'points_min'),
+            ('points', 'lte', 'points_max'),
+            ('average_score', 'gte', 'avg_score_min'),
+            ('average_score', 'lte', 'avg_score_max'),
+            ('place_numeric', 'gte', 'place_min'),
+            ('place_numeric', 'lte', 'place_max'),
+        ):
+            if form_data[form_field] is not None:
+                stats = stats.filter(**{"{}__{}".format(field, lookup): form_data[form_field]})
+
+        if form_data['playoffs'] == CHOICE_MADE_PLAYOFFS:
+            stats = stats.filter(made_playoffs=True)
+        elif form_data['playoffs'] == CHOICE_MISSED_PLAYOFFS:
+            stats = stats.filter(missed_playoffs=True)
+
+        clinched = form_data['clinched']
+        if clinched == CHOICE_CLINCHED_BYE:
+            stats = stats.filter(clinched_bye=True)
+        elif clinched == CHOICE_CLINCHED_PLAYOFFS:
+            stats = stats.filter(clinched_playoffs=True)
+        elif clinched == CHOICE_ELIMINATED_EARLY:
+            stats = stats.filter(eliminated_playoffs_early=True)
+
+        if form_data['bye']:
+            stats = stats.filter(bye=True)
+
+        if form_data['champion']:
+            stats = stats.filter(champion=True)
+
+        # same order as always: by year, then in the order the teams were given
+        team_order = dict((team_id, i) for i, team_id in enumerate(team_ids))
+        matching_stats = sorted(
+            stats.values_list('year', 'team_id'),
+            key=lambda x: (x[0], team_order[x[1]]),
+        )
+
+        team_seasons = [
+            TeamSeason(team_id, year, week_max=week_max) for year, team_id in matching_stats
+        ]
+
+        # expected wins depend on every season's scores, so they aren't stored
+        # with the rest, and are filtered from the cache once SQL has narrowed things down
+        expected_wins_min = form_data['expected_wins_min']
+        expected_wins_max = form_data['expected_wins_max']
+        if expected_wins_min is not None or expected_wins_max is not None:
+            prefetch_cached_properties(team_seasons, ['expected_wins'])
+
+        for team_season in team_seasons:
+            if expected_wins_min is not None and team_season.expected_wins < expected_wins_min:
+                continue
+
+            if expected_wins_max is not None and team_season.expected_wins > expected_wins_max:
+                continue
+
+            yield team_season
+
     def filter_seasons(self, form_data):
         year_min = Season.min().year
         year_max = Season.max().year
@@ -563,6 +639,11 @@ class SeasonFinderView(LongUrlView):
                 'nickname', 'first_name', 'last_name',
             ).values_list('id', flat=True)
 
+        if year_span is None or year_span == 1:
+            yield from self.filter_single_seasons(form_data, year_min, year_max, list(team_ids))
+            return
+
+        candidate_seasons = []
         for year in range(year_min, year_max + 1):
             for team_id in team_ids:
                 if year_span and year_span > 1:
@@ -590,78 +671,95 @@ class SeasonFinderView(LongUrlView):
                 else:
                     team_season = TeamSeason(team_id, year, week_max=form_data['week_max'])
 
-                game_count = len(team_season.games)
-                if game_count == 0:
-                    continue
-
-                if form_data['week_max'] is not None:
-                    # if the user specified the "Through X Weeks" field,
-                    # and the value given is in the regular season,
-                    # don't show seasons that haven't yet reached that week
-                    # playoffs are special, though - teams with byes won't have the same logic
-                    if form_data['week_max'] <= regular_season_weeks(year) or not team_season.bye:
-                        if game_count < form_data['week_max']:
-                            continue
-                    elif team_season.bye:
-                        if game_count < (form_data['week_max'] - 1):
-                            continue
-
-                if form_data['wins_min'] is not None:
-                    if team_season.win_count < form_data['wins_min']:
-                        continue
-                if form_data['wins_max'] is not None:
-                    if team_season.win_count > form_data['wins_max']:
-                        continue
+                candidate_seasons.append((year, team_season))
 
-                if form_data['expected_wins_min'] is not None:
-                    if team_season.expected_wins < form_data['expected_wins_min']:
-                        continue
-                if form_data['expected_wins_max'] is not None:
-                    if team_season.expected_wins > form_data['expected_wins_max']:
-                        continue
+        # games first: a candidate without any can't match, and some of what the filters
+        # read (average score, for one) can't even be worked out for it
+        prefetch_cached_properties(
+            [team_season for _, team_season in candidate_seasons],
+            ['games'],
+        )
+        candidate_seasons = [
+            (year, team_season) for year, team_season in candidate_seasons
+            if len(team_season.games) > 0
+        ]
+
+        prefetch_cached_properties(
+            [team_season for _, team_season in candidate_seasons],
+            self._prefetch_attrs(form_data, year_span),
+        )
 
-                if form_data['points_min'] is not None:
-                    if team_season.points < form_data['points_min']:
-                        continue
-                if form_data['points_max'] is not None:
-                    if team_season.points > form_data['points_max']:
-                        continue
+        for year, team_season in candidate_seasons:
+            game_count = len(team_season.games)
 
-                if form_data['avg_score_min'] is not None:
-                    if team_season.average_score < form_data['avg_score_min']:
+            if form_data['week_max'] is not None:
+                # if the user specified the "Through X Weeks" field,
+                # and the value given is in the regular season,
+                # don't show seasons that haven't yet reached that week
+                # playoffs are special, though - teams with byes won't have the same logic
+                if form_data['week_max'] <= regular_season_weeks(year) or not team_season.bye:
+                    if game_count < form_data['week_max']:
                         continue
-                if form_data['avg_score_max'] is not None:
-                    if team_season.average_score > form_data['avg_score_max']:
+                elif team_season.bye:
+                    if game_count < (form_data['week_max'] - 1):
                         continue
 
-                if year_span is None or year_span == 1:
-                    if form_data['place_min'] is not None:
-                        if team_season.place_numeric < form_data['place_min']:
-                            continue
-                    if form_data['place_max'] is not None:
-                        if team_season.place_numeric > form_data['place_max']:
-                            continue
-
-                if form_data['playoffs'] == CHOICE_MADE_PLAYOFFS and not team_season.made_playoffs:
+            if form_data['wins_min'] is not None:
+                if team_season.win_count < form_data['wins_min']:
                     continue
-                elif form_data['playoffs'] == CHOICE_MISSED_PLAYOFFS and not team_season.missed_playoffs:  # noqa: E501
+            if form_data['wins_max'] is not None:
+                if team_season.win_count > form_data['wins_max']:
                     continue
 
-                clinched = form_data['clinched']
-                if clinched == CHOICE_CLINCHED_BYE and not team_season.clinched_bye:
-                    continue
-                elif clinched == CHOICE_CLINCHED_PLAYOFFS and not team_season.clinched_playoffs:
+            if form_data['expected_wins_min'] is not None:
+                if team_season.expected_wins < form_data['expected_wins_min']:
                     continue
-                elif clinched == CHOICE_ELIMINATED_EARLY and not team_season.eliminated_playoffs_early:  # noqa: E501
+            if form_data['expected_wins_max'] is not None:
+                if team_season.expected_wins > form_data['expected_wins_max']:
                     continue
 
-                if form_data['bye'] and not team_season.bye:
+            if form_data['points_min'] is not None:
+                if team_season.points < form_data['points_min']:
+                    continue
+            if form_data['points_max'] is not None:
+                if team_season.points > form_data['points_max']:
                     continue
 
-                if form_data['champion'] and not team_season.champion:
+            if form_data['avg_score_min'] is not None:
+                if team_season.average_score < form_data['avg_score_min']:
                     continue
+            if form_data['avg_score_max'] is not None:
+                if team_season.average_score > form_data['avg_score_max']:
+                    continue
+
+            if year_span is None or year_span == 1:
+                if form_data['place_min'] is not None:
+                    if team_season.place_numeric < form_data['place_min']:
+                        continue
+                if form_data['place_max'] is not None:
+                    if team_season.place_numeric > form_data['place_max']:
+                        continue
+
+            if form_data['playoffs'] == CHOICE_MADE_PLAYOFFS and not team_season.made_playoffs:
+                continue
+            elif form_data['playoffs'] == CHOICE_MISSED_PLAYOFFS and not team_season.missed_playoffs:  # noqa: E501
+                continue
+
+            clinched = form_data['clinched']
+            if clinched == CHOICE_CLINCHED_BYE and not team_season.clinched_bye:
+                continue
+            elif clinched == CHOICE_CLINCHED_PLAYOFFS and not team_season.clinched_playoffs:
+                continue
+            elif clinched == CHOICE_ELIMINATED_EARLY and not team_season.eliminated_playoffs_early:  # noqa: E501
+                continue
 
-                yield team_season
+            if form_data['bye'] and not team_season.bye:
+                continue
+
+            if form_data['champion'] and not team_season.champion:
+                continue
+
+            yield team_season
 
     def build_summary_tables(self, team_seasons):
         team_dict = defaultdict(int)
@@ -694,6 +792,7 @@ class SeasonFinderView(LongUrlView):
             form_data = season_finder_form.cleaned_data
 
             team_seasons = list(self.filter_seasons(form_data))
+            prefetch_cached_properties(team_seasons, SEASON_FINDER_DISPLAY_ATTRS)
 
             if form_data['year_span'] and form_data['year_span'] > 1:
                 is_multi_season_view = True
@@ -1076,11 +1175,10 @@ class TopSeasonsView(TemplateView):
 
         cache_key = "blingalytics_top_seasons|{}|{}".format(row_limit, week_max)
 
-        if cache_key in CACHE:
-            top_seasons_tables = CACHE.get(cache_key)
-        else:
+        top_seasons_tables = cache_get(cache_key, tag=ALL_TIME_CACHE_TAG)
+        if top_seasons_tables is CACHE_MISS:
             top_seasons_tables = self.generate_top_seasons_tables(row_limit, week_max)
-            CACHE.set(cache_key, top_seasons_tables)
+            cache_set(cache_key, top_seasons_tables, tag=ALL_TIME_CACHE_TAG)
 
         context = {
             'top_seasons_tables': top_seasons_tables,
@@ -1138,11 +1236,10 @@ class TopSeasonsSingleStatView(TemplateView):
             week_max,
         )
 
-        if cache_key in CACHE:
-            top_seasons_table = CACHE.get(cache_key)
-        else:
+        top_seasons_table = cache_get(cache_key, tag=ALL_TIME_CACHE_TAG)
+        if top_seasons_table is CACHE_MISS:
             top_seasons_table = self.generate_top_seasons_table(single_stat, week_max)
-            CACHE.set(cache_key, top_seasons_table)
+            cache_set(cache_key, top_seasons_table, tag=ALL_TIME_CACHE_TAG)
 
         context = {
             'single_stat': single_stat,
@@ -1221,6 +1318,92 @@ class ShortUrlView(RedirectView):
 class PlayoffOddsView(TemplateView):
     template_name = 'blingalytics/playoff_odds.html'
 
+    def _playoff_odds_by_week_graph(self, season):
+        # only reads stored results (see the precompute_playoff_odds command),
+        # so any week that hasn't been run yet is just a gap in the lines
+        last_week = min(season.weeks_with_games, regular_season_weeks(season.year))
+        weeks = list(range(MIN_WEEK_TO_RUN_PLAYOFF_ODDS, last_week + 1))
+        if not weeks:
+            return ''
+
+        results = PlayoffOddsResult.objects.filter(
+            job__year=season.year,
+            job__week_max__in=weeks,
+            job__status=PlayoffOddsJob.STATUS_DONE,
+        ).select_related(
+            'job', 'team',
+        )
+
+        playoff_pct_by_week = defaultdict(dict)
+        for result in results:
+            playoff_pct_by_week[result.team.nickname][result.job.week_max] = 100 * result.playoffs
+
+        if not playoff_pct_by_week:
+            return ''
+
+        y_series = sorted(
+            (nickname, [pct_by_week.get(week) for week in weeks])
+            for nickname, pct_by_week in playoff_pct_by_week.items()
+        )
+
+        custom_options = {
+            'title': 'Playoff Odds by Week',
+            'x_title': 'Week',
+            'range': (0, 100),
+            'y_labels': [0, 25, 50, 75, 100],
+            'value_formatter': lambda x: "{:.0f}%".format(x),
+        }
+
+        graph_html = line_graph_html(
+            weeks,  # x_data
+            y_series,  # y_series
+            **custom_options,
+        )
+
+        return graph_html
+
+    def _whatif_results(self, request):
+        # each what-if is "week-winner_id-loser_id"; blank (no pick) selections are ignored
+        whatif_results = []
+        for whatif in request.GET.getlist('whatif'):
+            try:
+                week, winner_id, loser_id = (int(x) for x in whatif.split('-'))
+            except ValueError:
+                continue
+
+            whatif_results.append((week, winner_id, loser_id))
+
+        return whatif_results
+
+    def _whatif_games(self, sample_set, season, whatif_results):
+        teams = {team_season.team.id: team_season.team for team_season in season.standings_table}
+
+        whatif_games = []
+        for week, team_1_id, team_2_id in sample_set.remaining_games():
+            choices = []
+            for winner_id, loser_id in ((team_1_id, team_2_id), (team_2_id, team_1_id)):
+                choices.append({
+                    'value': "{}-{}-{}".format(week, winner_id, loser_id),
+                    'label': "{} beats {}".format(teams[winner_id], teams[loser_id]),
+                    'selected': (week, winner_id, loser_id) in whatif_results,
+                })
+
+            whatif_games.append({
+                'week': week,
+                'team_1': teams[team_1_id],
+                'team_2': teams[team_2_id],
+                'choices': choices,
+            })
+
+        return whatif_games
+
+    def _pct_interval(self, interval):
+        if interval is None:
+            return ''
+
+        low, high = interval
+        return "{:.1f}% - {:.1f}%".format(100 * low, 100 * high)
+
     def get(self, request):
         season = Season.latest()
 
@@ -1238,32 +1421,71 @@ class PlayoffOddsView(TemplateView):
                 # ignore both if user passed in a non-int
                 pass
 
+        whatif_results = self._whatif_results(request)
+
         playoff_odds_table = []
+        playoff_odds_job = None
+        simulations = 0
+        whatif_games = []
+        whatif_simulations = 0
         results_ready = False
         no_results_message = 'Playoff odds are currently being run and are not yet ready.  Please try again in a few minutes.'  # noqa: E501
 
-        MIN_WEEK_TO_RUN_ODDS = 7
-
-        if season.weeks_with_games < MIN_WEEK_TO_RUN_ODDS:
+        if season.weeks_with_games < MIN_WEEK_TO_RUN_PLAYOFF_ODDS:
             no_results_message = "Playoff odds are not available until after week {}.".format(
-                MIN_WEEK_TO_RUN_ODDS,
+                MIN_WEEK_TO_RUN_PLAYOFF_ODDS,
             )
         else:
-            cached_playoff_odds = season.get_cached_playoff_odds()
+            playoff_odds_job = queue_playoff_odds(season)
 
             logging.getLogger('blingaleague').info(
-                "Cached odds - {} - {}".format(
-                    season.playoff_odds_cache_key,
-                    bool(cached_playoff_odds),
+                "Playoff odds - {} - {}".format(
+                    playoff_odds_job.season_key,
+                    playoff_odds_job.status,
                 ),
             )
 
-            if cached_playoff_odds:
+            if playoff_odds_job.status == PlayoffOddsJob.STATUS_QUEUED:
+                no_results_message = "Playoff odds are queued to run (#{} in line).  Please try again in a few minutes.".format(  # noqa: E501
+                    playoff_odds_job.queue_position,
+                )
+            elif playoff_odds_job.status == PlayoffOddsJob.STATUS_FAILED:
+                no_results_message = 'Playoff odds could not be calculated.  Please try again later.'  # noqa: E501
+
+            playoff_odds = None
+            if playoff_odds_job.is_done:
+                playoff_odds = playoff_odds_job.odds()
+
+                # what-if mode: the same odds, but from only the stored
+                # simulations where the remaining games went the chosen way
+                sample_set = playoff_odds_job.sample_set()
+                if sample_set is not None:
+                    whatif_games = self._whatif_games(sample_set, season, whatif_results)
+
+                    if whatif_results:
+                        whatif_simulations = sample_set.simulations
+                        playoff_odds = sample_set.conditional_odds(whatif_results)
+
+                        if playoff_odds is None:
+                            no_results_message = 'None of the simulations had all of those results.  Try fewer what-ifs.'  # noqa: E501
+                elif whatif_results:
+                    # odds stored without their simulations can't answer a what-if,
+                    # and showing them anyway would look like they had
+                    playoff_odds = None
+                    no_results_message = 'What-if odds are unavailable for this run.  Clear the what-ifs to see the regular odds.'  # noqa: E501
+
+            if playoff_odds:
                 for team_season in season.standings_table:
+                    team_odds = playoff_odds.get(team_season.team, {})
+
                     # multiply by 100 to convert to percentages, decimal formatting done in template
-                    playoffs_pct = 100 * cached_playoff_odds.get(team_season.team, {}).get('playoffs', 0)  # noqa: E501
-                    bye_pct = 100 * cached_playoff_odds.get(team_season.team, {}).get('bye', 0)  # noqa: E501
-                    champion_pct = 100 * cached_playoff_odds.get(team_season.team, {}).get('champion', 0)  # noqa: E501
+                    playoffs_pct = 100 * team_odds.get('playoffs', 0)
+                    bye_pct = 100 * team_odds.get('bye', 0)
+                    champion_pct = 100 * team_odds.get('champion', 0)
+
+                    # simulated odds come with a 95% interval for each percentage
+                    simulations = max(simulations, team_odds.get('simulations', 0))
+                    intervals = team_odds.get('intervals', {})
 
                     playoffs_pct_display = round(playoffs_pct)
                     bye_pct_display = round(bye_pct)
@@ -1302,16 +1524,22 @@ class PlayoffOddsView(TemplateView):
                         'bye_pct_display': bye_pct_display,
                         'champion_pct_exact': champion_pct,
                         'champion_pct_display': champion_pct_display,
+                        'playoff_pct_interval': self._pct_interval(intervals.get('playoffs')),
+                        'bye_pct_interval': self._pct_interval(intervals.get('bye')),
+                        'champion_pct_interval': self._pct_interval(intervals.get('champion')),
                     })
 
                 results_ready = True
-            else:
-                run_playoff_odds_in_background(season)
 
         return self.render_to_response({
             'season': season,
             'playoff_odds_table': playoff_odds_table,
             'week_max': week_max,
+            'simulations': simulations,
+            'whatif_games': whatif_games,
+            'whatif_simulations': whatif_simulations,
+            'playoff_odds_job': playoff_odds_job,
+            'playoff_odds_by_week_graph_html': self._playoff_odds_by_week_graph(season),
             'results_ready': results_ready,
             'no_results_message': no_results_message,
         })
@@ -0,0 +1,11 @@
+#!/usr/bin/env bash
+
+BASE_DIR=/data/blingaleague
+PYTHON=$BASE_DIR/environ/bin/python
+LOG_FILE=$BASE_DIR/logs/finder_refresh_worker.log
+
+echo "STARTED: `date`" >> $LOG_FILE
+
+$PYTHON $BASE_DIR/manage.py refresh_finder_tables >> $LOG_FILE 2>&1
+
+echo "ENDED: `date`" >> $LOG_FILE
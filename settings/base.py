@@ -117,6 +117,34 @@ CACHES = {
 
 PAGE_CACHE_DEFAULT_TIMEOUT = 365 * 24 * 60 * 60
 
+# per-process LRU in front of memcached for fully_cached_property values;
+# a size of 0 disables it, and a TTL of None keeps entries until evicted or cleared
+LOCAL_PROPERTY_CACHE_SIZE = 20000
+LOCAL_PROPERTY_CACHE_TTL = 300
+
+# processes used by the pre_build_cache and rebuild_cache commands; each takes a year at a time
+PRE_BUILD_CACHE_WORKERS = 4
+
+# processes used to run playoff odds simulations; the results for a given seed are the same
+# for any number of workers
+PLAYOFF_ODDS_WORKERS = 4
+
+# adaptive playoff odds keep simulating until every team's 95% interval for its playoffs,
+# bye and champion odds is narrower than this (0.01 is one percentage point, end to end)
+PLAYOFF_ODDS_INTERVAL_WIDTH = 0.01
+
+# the run_playoff_odds_worker command checks for queued jobs this often (in seconds), and
+# hands a job back to the queue if it has been running longer than the timeout
+PLAYOFF_ODDS_WORKER_POLL_INTERVAL = 5
+PLAYOFF_ODDS_JOB_TIMEOUT = 60 * 60
+
+# the refresh_finder_tables command checks for seasons that saves have queued this often
+FINDER_REFRESH_POLL_INTERVAL = 5
+
+# 'batch' computes a season's expected wins in one NumPy pass; 'verify' does the same,
+# but also logs any value that differs from the one-score-at-a-time 'decimal' engine
+EXPECTED_WINS_ENGINE = 'batch'
+
 LOGGING = {
     'version': 1,
     'disable_existing_logger': False,